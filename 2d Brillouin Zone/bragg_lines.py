@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Bragg lines as arrays of coefficients a*x + b*y = c """
+
+import itertools
+
+import numpy as np
+
+PARALLEL_EPS = 1e-9 # relative approximation of the sine between lines
+
+def points_array(points):
+  """ Return float array (N, 2) of coordinates of points """
+
+  return np.array([(float(point[0]), float(point[1])) for point in points],
+                  dtype=np.float64).reshape(-1, 2)
+
+def bragg_line_coefficients(zone_points, center):
+  """ Return float array (N, 3) of Bragg lines a*x + b*y = c
+  which bisect vectors from the center to the points of zones,
+  (a, b) is the vector, so a*x + b*y > c is the far side of a line """
+
+  points = points_array(itertools.chain.from_iterable(zone_points))
+  center = points_array([center])[0]
+  vectors = points - center
+  return np.column_stack((vectors,
+                          vectors @ center + 0.5 * np.sum(vectors ** 2,
+                                                          axis=1)))
+
+def line_intersections(lines, tolerance=1e-6):
+  """ Return float array (M, 2) of unique intersection points of every
+  unordered pair of lines a*x + b*y = c, parallel lines are skipped
+  and points nearer than the tolerance are merged """
+
+  lines = np.asarray(lines, dtype=np.float64).reshape(-1, 3)
+  first, second = np.triu_indices(len(lines), 1)
+  first_lines = lines[first]
+  second_lines = lines[second]
+  determinants = first_lines[:, 0] * second_lines[:, 1] - \
+      first_lines[:, 1] * second_lines[:, 0]
+  modules = np.hypot(first_lines[:, 0], first_lines[:, 1]) * \
+      np.hypot(second_lines[:, 0], second_lines[:, 1])
+  mask = np.abs(determinants) > PARALLEL_EPS * modules
+  first_lines = first_lines[mask]
+  second_lines = second_lines[mask]
+  determinants = determinants[mask]
+  points = np.column_stack((
+      first_lines[:, 2] * second_lines[:, 1] -
+      first_lines[:, 1] * second_lines[:, 2],
+      first_lines[:, 0] * second_lines[:, 2] -
+      first_lines[:, 2] * second_lines[:, 0])) / determinants[:, np.newaxis]
+  keys = np.round(points / tolerance).astype(np.int64)
+  _, unique = np.unique(keys, axis=0, return_index=True)
+  return points[np.sort(unique)]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Composition of RGBA images of zones by array operations
+
+Images are uint8 arrays (height, width, 4) of samples of pixels whose
+coordinates are given by sample_positions of zone_raster. Zones are colored
+by one lookup of the palette (zone_colors), then all Bragg lines and all
+atoms are drawn at once;
+supersampled images are reduced by the mean of the samples of every pixel,
+so the edges are antialiased """
+
+import numpy as np
+from PIL import ImageColor
+
+def rgba(color):
+  """ Return RGBA tuple of a color name or tuple """
+
+  if isinstance(color, str):
+    color = ImageColor.getrgb(color)
+  return tuple(color) + (0xff,) * (4 - len(color))
+
+def polygon_labels(polygons, positions):
+  """ Return int32 array of zone numbers of samples which are covered by
+  tuple(zone number, polygon) items (0 out of polygons), later polygons
+  are drawn over former ones
+
+  Rows of samples are filled between pairs of crossings of the sides
+  (even-odd rule, edges are half-open in y, spans are half-open in x), so
+  a sample on a side shared by two polygons is covered by one of them;
+  the samples are compared with the polygons in the coordinates of the
+  image, so any window of samples (a tile) is labeled alike """
+
+  pos_x, pos_y = positions
+  labels = np.zeros((len(pos_y), len(pos_x)), dtype=np.int32)
+  for zone, polygon in polygons:
+    polygon = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    low, high = polygon.min(axis=0), polygon.max(axis=0)
+    top, bottom = np.searchsorted(pos_y, (low[1], high[1]))
+    left, right = np.searchsorted(pos_x, (low[0], high[0]))
+    if top >= bottom or left >= right:
+      continue
+    starts, ends = polygon, np.roll(polygon, -1, axis=0)
+    # Crossings are computed from the lower end of every side, so a side
+    # which is shared by two polygons is crossed at the same point.
+    lower = (starts[:, 1] > ends[:, 1])[:, np.newaxis]
+    starts, ends = np.where(lower, ends, starts), np.where(lower, starts, ends)
+    # Every side crosses the rows start y <= y < end y.
+    firsts = np.searchsorted(pos_y, starts[:, 1])
+    counts = np.searchsorted(pos_y, ends[:, 1]) - firsts
+    sides = np.repeat(np.arange(len(starts)), counts)
+    rows = firsts[sides] + np.arange(len(sides)) - \
+        np.repeat(np.cumsum(counts) - counts, counts)
+    starts, ends = starts[sides], ends[sides]
+    crossings = starts[:, 0] + ((pos_y[rows] - starts[:, 1]) *
+                                (ends[:, 0] - starts[:, 0]) /
+                                (ends[:, 1] - starts[:, 1]))
+    # Crossings of a row are paired in the order of x, the samples of
+    # every span are labeled at once.
+    order = np.lexsort((crossings, rows))
+    columns = np.searchsorted(pos_x, crossings[order]).reshape(-1, 2)
+    lengths = columns[:, 1] - columns[:, 0]
+    samples = np.repeat(rows[order][0::2] * len(pos_x) + columns[:, 0] -
+                        np.cumsum(lengths) + lengths, lengths) + \
+        np.arange(lengths.sum())
+    labels.reshape(-1)[samples] = zone
+  return labels
+
+def _line_samples(along, across, lines, half_widths):
+  """ Return tuple(indices along, indices across) of the samples which are
+  nearer than half_widths to the lines a*p + b*q = c (p along, q across,
+  |b| >= |a|), every line is walked by the samples along it """
+
+  step = along[1] - along[0] if len(along) > 1 else 1.0
+  a, b, c = (lines[:, index, np.newaxis] for index in range(3))
+  middles = (c - a * along) / b
+  spreads = half_widths[:, np.newaxis] / np.abs(b)
+  # Candidates are one sample wider, the samples are tested exactly by
+  # their coordinates, so any window of samples (a tile) is drawn alike.
+  lows = np.floor((middles - spreads - across[0]) / step).astype(int)
+  highs = np.ceil((middles + spreads - across[0]) / step).astype(int)
+  count = int(np.max(highs - lows, initial=-1)) + 1
+  if count <= 0:
+    return (np.empty(0, dtype=int), np.empty(0, dtype=int))
+  indices = lows[..., np.newaxis] + np.arange(count)
+  valid = ((indices <= highs[..., np.newaxis]) & (indices >= 0) &
+           (indices < len(across)))
+  line_indices, along_indices, _ = np.nonzero(valid)
+  indices = indices[valid]
+  near = (np.abs(lines[line_indices, 0] * along[along_indices] +
+                 lines[line_indices, 1] * across[indices] -
+                 lines[line_indices, 2]) <= half_widths[line_indices])
+  return (along_indices[near], indices[near])
+
+def draw_lines(pixels, positions, lines, color, width=1.0):
+  """ Draw the lines a*x + b*y = c (array (N, 3)) of the width in pixels """
+
+  pos_x, pos_y = positions
+  lines = np.asarray(lines, dtype=np.float64).reshape(-1, 3)
+  # Distances are compared in the units of the normals of the lines.
+  half_widths = 0.5 * width * np.hypot(lines[:, 0], lines[:, 1])
+  # Flat lines are walked by columns, steep lines are walked by rows.
+  flat = np.abs(lines[:, 1]) >= np.abs(lines[:, 0])
+  columns, rows = _line_samples(pos_x, pos_y, lines[flat], half_widths[flat])
+  pixels[rows, columns] = rgba(color)
+  rows, columns = _line_samples(pos_y, pos_x, lines[~flat][:, (1, 0, 2)],
+                                half_widths[~flat])
+  pixels[rows, columns] = rgba(color)
+
+def draw_disks(pixels, positions, centers, radius, color):
+  """ Draw the disks of the radius in pixels around the centers
+  (array (N, 2) of points) """
+
+  pos_x, pos_y = positions
+  centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+  if not len(centers):
+    return
+  step = pos_x[1] - pos_x[0] if len(pos_x) > 1 else 1.0
+  reach = int(np.ceil(radius / step)) + 1
+  steps = np.arange(-reach, reach + 1)
+  # Samples of the square around every center are tested at once.
+  columns = (np.round((centers[:, 0] - pos_x[0]) / step).astype(int)
+             [:, np.newaxis, np.newaxis] + steps)
+  rows = (np.round((centers[:, 1] - pos_y[0]) / step).astype(int)
+          [:, np.newaxis, np.newaxis] + steps[:, np.newaxis])
+  columns, rows = np.broadcast_arrays(columns, rows)
+  inside = ((columns >= 0) & (columns < len(pos_x)) &
+            (rows >= 0) & (rows < len(pos_y)))
+  columns, rows = columns[inside], rows[inside]
+  centers = np.broadcast_to(centers[:, np.newaxis, np.newaxis],
+                            inside.shape + (2,))[inside]
+  covered = ((pos_x[columns] - centers[:, 0]) ** 2 +
+             (pos_y[rows] - centers[:, 1]) ** 2 <= radius ** 2)
+  pixels[rows[covered], columns[covered]] = rgba(color)
+
+def downsample(pixels, supersampling):
+  """ Return uint8 array of pixels which are the means of the blocks
+  of supersampling x supersampling samples """
+
+  if supersampling == 1:
+    return pixels
+  height = pixels.shape[0] // supersampling
+  width = pixels.shape[1] // supersampling
+  blocks = pixels.reshape(height, supersampling, width, supersampling, -1)
+  sums = blocks.sum(axis=(1, 3), dtype=np.uint32)
+  count = supersampling * supersampling
+  return ((sums + count // 2) // count).astype(np.uint8)
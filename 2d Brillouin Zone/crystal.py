@@ -5,41 +5,136 @@
 
 import abc
 
+import numpy as np
+from sympy.geometry import Point
+
+SHELL_RTOL = 1e-9 # relative approximation of squared distances in a shell
+POINT_EPS = 1e-6 # points nearer than this value are the same point
+
 class Crystal:
-  """ Primitive model of crystal """
+  """ Primitive model of crystal, points are stored as float array (N, 2) """
 
   def __init__(self, size, center):
+    self._size = size
     self._center = center
-    self._points = []
-    for pos_y in range(-size, size + 1):
-      for pos_x in range(-size, size + 1):
-        self._points += self._translate(pos_x, pos_y)
+    self._points = self.__translations(size).reshape(-1, 2)
+    self._radius = self.__calculate_radius(self._points, size)
+
+  def __translations(self, size):
+    """ Return array (M, K, 2) of K points of every translation
+    in the square block of (2 * size + 1) ** 2 translations """
+
+    pos_y, pos_x = np.mgrid[-size:size + 1, -size:size + 1]
+    return self._translate(pos_x.reshape(-1), pos_y.reshape(-1))
+
+  def __calculate_radius(self, points, size):
+    """ Return distance from the center to the nearest point
+    which is out of the block of points (translations of the next ring) """
+
+    translations = self.__translations(size + 1)
+    pos_y, pos_x = np.mgrid[-size - 1:size + 2, -size - 1:size + 2]
+    ring = np.maximum(np.abs(pos_x), np.abs(pos_y)).reshape(-1) == size + 1
+    ring_points = translations[ring].reshape(-1, 2)
+    keys = np.round(np.concatenate((points, ring_points))
+                    / POINT_EPS).astype(np.int64)
+    _, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    is_new = ~np.isin(inverse[len(points):], inverse[:len(points)])
+    return float(np.min(np.linalg.norm(ring_points[is_new] -
+                                       _coords(self._center), axis=1)))
 
   @abc.abstractmethod
   def _translate(self, pos_x, pos_y):
-    pass
+    """ Return array (M, K, 2) of K points of M translations,
+    pos_x and pos_y are integer arrays (M,) """
+
+  @property
+  def radius(self):
+    """ Return radius of the circle around the center
+    which contains all points of the crystal that are generated """
+
+    return self._radius
+
+  def parameters(self):
+    """ Return dict of the parameters which define the points: the class,
+    the period (_a of the subclasses), the size of the block and the center """
+
+    return {"crystal": type(self).__name__, "period": float(self._a),
+            "size": self._size, "center": _coords(self._center).tolist()}
 
   def points(self):
     """ Return generator of nearest points out the center in the crystal """
 
     return Crystal.nearly_points(self._points, self._center)
 
+  def shells(self):
+    """ Return generator of sets of points with the same distance to the
+    center in increasing order, the first set is the center
+
+    The block of translations is doubled on demand and a shell is yielded
+    only when it is nearer than the nearest point out of the block """
+
+    center = _coords(self._center)
+    size = 1
+    next_key = 0.0
+    while True:
+      points = self.__translations(size).reshape(-1, 2)
+      # Keys of the points of a complete shell are less than the limit.
+      limit = self.__calculate_radius(points, size) ** 2 * (1 - SHELL_RTOL)
+      keys = np.sum((points - center) ** 2, axis=1)
+      inside = keys >= next_key
+      points = points[inside]
+      keys = keys[inside]
+      order = np.argsort(keys, kind='stable')
+      keys = keys[order]
+      tolerance = SHELL_RTOL * limit
+      starts = _shell_starts(keys, tolerance)
+      ends = np.append(starts[1:], len(keys))
+      # All points whose keys are less than next_key are yielded,
+      # points which are farther than the radius may be out of the block.
+      next_key = limit
+      for start, end in zip(starts, ends):
+        if keys[start] + tolerance >= limit:
+          next_key = min(keys[start], limit)
+          break
+        yield set(map(_point, points[order[start:end]]))
+      size *= 2
+
   @staticmethod
   def nearly_points(points, center):
-    """ Return generator of nearest points """
-
-    points = list(map(
-        lambda point:
-        (point.distance(center), point),
-        points))
-    points.sort(key=lambda v: v[0])
-    distance = None
-    if points:
-      distance = points[0][0]
-    yield_points = []
-    for (distance_to_center, point) in points: # first is center
-      if abs(distance_to_center - distance) > 0.1:
-        distance = distance_to_center
-        yield set(yield_points)
-        yield_points = []
-      yield_points.append(point)
+    """ Return generator of nearest points
+
+    Points are sorted by squared distances to the center, distances of
+    points of a shell differ less than SHELL_RTOL of the largest one """
+
+    if not isinstance(points, np.ndarray):
+      points = [_coords(point) for point in points]
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    keys = np.sum((points - _coords(center)) ** 2, axis=1)
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = _shell_starts(keys, SHELL_RTOL * np.max(keys, initial=0))
+    # The last group is not complete.
+    for start, end in zip(starts[:-1], starts[1:]):
+      yield set(map(_point, points[order[start:end]]))
+
+def _shell_starts(keys, tolerance):
+  """ Return indices of sorted keys where shells start,
+  keys of a shell differ less than the tolerance """
+
+  if not len(keys):
+    return np.empty(0, dtype=int)
+  return np.flatnonzero(np.diff(keys, prepend=keys[0] - 2 * tolerance - 1)
+                        > tolerance)
+
+def _coords(point):
+  """ Return float array (2,) of coordinates of a point """
+
+  return np.array((float(point[0]), float(point[1])), dtype=np.float64)
+
+def _point(coords):
+  """ Return sympy Point of float array (2,), integer coordinates
+  are kept as integers and the others are not converted to rationals """
+
+  return Point(*(int(value) if value.is_integer() else value
+                 for value in coords.tolist()), evaluate=False)
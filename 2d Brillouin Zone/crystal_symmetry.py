@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Point groups of 2D crystals and their fundamental wedges
+
+An orthogonal map of a crystal onto itself sends the two shortest independent
+vectors from the center to the atoms to vectors of the same lengths and the
+same angle, so the point group is searched among such pairs. Images of the
+fundamental wedge under the operations of the group cover the plane """
+
+import itertools
+
+import numpy as np
+
+SYMMETRY_EPS = 1e-6 # relative approximation of lengths and coordinates
+WEDGE_ANGLE = 0.1234 # direction which is not on a mirror line of crystals
+
+def point_group(vectors, eps=SYMMETRY_EPS):
+  """ Return array (K, 2, 2) of orthogonal matrices which map the finite
+  set of vectors (N, 2) onto itself (x -> R @ x), the identity is
+  the first one """
+
+  vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, 2)
+  norms = np.linalg.norm(vectors, axis=1)
+  tolerance = eps * max(np.max(norms, initial=0), 1)
+  vectors = vectors[norms > tolerance]
+  norms = norms[norms > tolerance]
+  if not len(vectors):
+    # Every orthogonal map keeps the center, only the identity is returned.
+    return np.eye(2)[np.newaxis]
+  order = np.argsort(norms, kind='stable')
+  first = vectors[order[0]]
+  crosses = np.abs(vectors[order] @ (-first[1], first[0]))
+  independent = crosses > tolerance * norms[order]
+  if not np.any(independent):
+    # Collinear vectors are kept or reversed by the mirror in their line,
+    # the mirror in its normal and the half turn.
+    direction = first / np.linalg.norm(first)
+    mirror = 2 * np.outer(direction, direction) - np.eye(2)
+    operations = np.array((np.eye(2), mirror, -mirror, -np.eye(2)))
+  else:
+    second = vectors[order[np.argmax(independent)]]
+    inverse = np.linalg.inv(np.column_stack((first, second)))
+    candidates = [vectors[np.abs(norms - np.linalg.norm(vector)) <= tolerance]
+                  for vector in (first, second)]
+    operations = []
+    for image_first, image_second in itertools.product(*candidates):
+      if abs(image_first @ image_second - first @ second) <= \
+          tolerance * np.linalg.norm(second):
+        operations.append(np.column_stack((image_first, image_second)) @
+                          inverse)
+    operations = np.array(operations).reshape(-1, 2, 2)
+  # Images of vectors are searched among the vectors of the same length.
+  order = np.argsort(norms, kind='stable')
+  starts = np.flatnonzero(np.diff(norms[order], prepend=-np.inf) > tolerance)
+  is_symmetric = np.ones(len(operations), dtype=bool)
+  for group in np.split(order, starts[1:]):
+    images = vectors[group] @ operations.transpose(0, 2, 1)
+    distances = np.linalg.norm(images[:, :, np.newaxis] - vectors[group],
+                               axis=3)
+    is_symmetric &= np.all(np.min(distances, axis=2) <= tolerance, axis=1)
+  operations = list(operations[is_symmetric])
+  operations.sort(key=lambda operation: np.abs(operation - np.eye(2)).sum())
+  return np.array(operations)
+
+def fundamental_wedge(operations):
+  """ Return array (M, 3) of lines a*x + b*y <= 0 which bound a wedge
+  around the origin whose images under the operations cover the plane
+  and do not overlap: the points nearer to a direction p than to its
+  images R @ p """
+
+  direction = np.array((np.cos(WEDGE_ANGLE), np.sin(WEDGE_ANGLE)))
+  images = np.asarray(operations) @ direction
+  normals = images - direction
+  normals = normals[np.linalg.norm(normals, axis=1) > SYMMETRY_EPS]
+  return np.column_stack((normals, np.zeros(len(normals))))
+
+def symmetric_polygons(polygons, operations, center=(0, 0)):
+  """ Return list of tuple(zone number, polygon) of images of polygons
+  under the operations around the center, sorted by zone numbers """
+
+  center = np.asarray(center, dtype=np.float64)
+  images = []
+  for operation in operations:
+    # Reflections reverse the order of vertices.
+    step = 1 if np.linalg.det(operation) > 0 else -1
+    for zone, polygon in polygons:
+      images.append((zone, ((polygon - center) @ operation.T +
+                            center)[::step]))
+  images.sort(key=lambda image: image[0])
+  return images
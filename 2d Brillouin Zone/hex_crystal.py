@@ -5,8 +5,9 @@
 
 import math
 
+import numpy as np
+
 from crystal import Crystal
-from sympy.geometry import Point
 
 class HexCrystal(Crystal):
   """ Model of simple hexagonal lattice """
@@ -17,25 +18,18 @@ class HexCrystal(Crystal):
 
   def _translate(self, pos_x, pos_y):
     width = self._a
-    points = []
     half_width = int(width / 2)
     side_length = int(width * math.sqrt(3))
     height = int(math.sqrt(side_length ** 2 - width ** 2 / 4))
-    pos_y *= (side_length + height)
-    pos_x *= width
-    half_width_periodic = half_width if pos_y % 2 == 0 else 0
-
-    points.append(Point(pos_x + half_width_periodic,
-                        pos_y))
-    points.append(Point(pos_x + half_width_periodic + width,
-                        pos_y))
-    points.append(Point(pos_x + half_width_periodic,
-                        pos_y + side_length))
-    points.append(Point(pos_x + half_width_periodic + width,
-                        pos_y + side_length))
-    points.append(Point(pos_x + half_width_periodic + half_width,
-                        pos_y - height))
-    points.append(Point(pos_x + half_width_periodic + half_width,
-                        pos_y + side_length + height))
-
-    return points
+    pos_y = pos_y * (side_length + height)
+    pos_x = pos_x * width
+    half_width_periodic = np.where(pos_y % 2 == 0, half_width, 0)
+    atoms = np.array([(0, 0),
+                      (width, 0),
+                      (0, side_length),
+                      (width, side_length),
+                      (half_width, -height),
+                      (half_width, side_length + height)], dtype=np.float64)
+
+    return np.column_stack((pos_x + half_width_periodic, pos_y)) \
+        [:, np.newaxis] + atoms
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Writers of PNG and TIFF files which stream rows of an image
+
+Images are uint8 RGBA arrays (height, width, 4), usually memory-mapped;
+only ROWS_PER_CHUNK rows are read and compressed at once, so posters are
+written without loading them into memory """
+
+import os
+import struct
+import zlib
+
+import numpy as np
+
+ROWS_PER_CHUNK = 256
+COMPRESSION_LEVEL = 6
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+TIFF_LIMIT = 2 ** 32 # bytes, offsets of classic TIFF are 32-bit
+TIFF_DIRECTORY_SIZE = 256 # bytes, bound of the directory and its arrays
+
+def _png_chunk(kind, data):
+  """ Return bytes of the PNG chunk """
+
+  return (struct.pack(">I", len(data)) + kind + data +
+          struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+def write_png(file_name, pixels, rows_per_chunk=ROWS_PER_CHUNK):
+  """ Write uint8 RGBA array (height, width, 4) to the PNG file, rows are
+  filtered by the difference with the row above (filter "Up") """
+
+  height, width = pixels.shape[:2]
+  compressor = zlib.compressobj(COMPRESSION_LEVEL)
+  previous = np.zeros((1, width * 4), dtype=np.uint8)
+  with open(file_name, "wb") as png_file:
+    png_file.write(PNG_SIGNATURE)
+    png_file.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height,
+                                                   8, 6, 0, 0, 0)))
+    for top in range(0, height, rows_per_chunk):
+      rows = np.asarray(pixels[top:top + rows_per_chunk],
+                        dtype=np.uint8).reshape(-1, width * 4)
+      data = np.empty((len(rows), 1 + width * 4), dtype=np.uint8)
+      data[:, 0] = 2
+      np.subtract(rows, np.vstack((previous, rows[:-1])), out=data[:, 1:])
+      previous = rows[-1:]
+      compressed = compressor.compress(data.tobytes())
+      if compressed:
+        png_file.write(_png_chunk(b"IDAT", compressed))
+    png_file.write(_png_chunk(b"IDAT", compressor.flush()))
+    png_file.write(_png_chunk(b"IEND", b""))
+
+def write_tiff(file_name, pixels, rows_per_chunk=ROWS_PER_CHUNK):
+  """ Write uint8 RGBA array (height, width, 4) to the little-endian TIFF
+  file, every chunk of rows is a strip compressed by Deflate
+
+  Raises ValueError as soon as a strip does not fit into the 32-bit
+  offsets with the directory, the partial file is removed """
+
+  height, width = pixels.shape[:2]
+  offsets, counts = [], []
+  # The offsets and the counts of strips are written after the strips.
+  directory_size = TIFF_DIRECTORY_SIZE + 8 * -(-height // rows_per_chunk)
+  with open(file_name, "wb") as tiff_file:
+    tiff_file.write(b"II" + struct.pack("<HI", 42, 0))
+    for top in range(0, height, rows_per_chunk):
+      strip = zlib.compress(np.ascontiguousarray(
+          pixels[top:top + rows_per_chunk], dtype=np.uint8).tobytes(),
+                            COMPRESSION_LEVEL)
+      if tiff_file.tell() + len(strip) + directory_size >= TIFF_LIMIT:
+        tiff_file.close()
+        os.remove(file_name)
+        raise ValueError("Image is too large for TIFF: " + file_name)
+      offsets.append(tiff_file.tell())
+      counts.append(len(strip))
+      tiff_file.write(strip)
+    tiff_file.write(b"\0" * (tiff_file.tell() % 2))
+    # Arrays of the tags are written before the directory.
+    arrays = {}
+    for tag, values in ((258, struct.pack("<4H", 8, 8, 8, 8)),
+                        (273, np.array(offsets, dtype="<u4").tobytes()),
+                        (279, np.array(counts, dtype="<u4").tobytes())):
+      if len(values) > 4:
+        arrays[tag] = tiff_file.tell()
+        tiff_file.write(values)
+    directory = tiff_file.tell()
+    # Tags are sorted: size, compression (Deflate), RGB, strips, samples,
+    # planar configuration and the unassociated alpha.
+    entries = ((256, 4, 1, width), (257, 4, 1, height),
+               (258, 3, 4, arrays[258]), (259, 3, 1, 8), (262, 3, 1, 2),
+               (273, 4, len(offsets), arrays.get(273, offsets[0])),
+               (277, 3, 1, 4), (278, 4, 1, rows_per_chunk),
+               (279, 4, len(counts), arrays.get(279, counts[0])),
+               (284, 3, 1, 1), (338, 3, 1, 2))
+    tiff_file.write(struct.pack("<H", len(entries)))
+    for tag, kind, count, data in entries:
+      tiff_file.write(struct.pack("<HHI", tag, kind, count))
+      if kind == 3 and count == 1:
+        tiff_file.write(struct.pack("<HH", data, 0))
+      else:
+        tiff_file.write(struct.pack("<I", data))
+    tiff_file.write(struct.pack("<I", 0))
+    tiff_file.seek(4)
+    tiff_file.write(struct.pack("<I", directory))
+
+def write_image(file_name, pixels, rows_per_chunk=ROWS_PER_CHUNK):
+  """ Write uint8 RGBA array to the PNG or TIFF file by the extension """
+
+  extension = os.path.splitext(file_name)[1].lower()
+  if extension == ".png":
+    write_png(file_name, pixels, rows_per_chunk)
+  elif extension in (".tif", ".tiff"):
+    write_tiff(file_name, pixels, rows_per_chunk)
+  else:
+    raise ValueError("Tiled images are saved to PNG or TIFF: " + file_name)
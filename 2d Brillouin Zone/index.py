@@ -7,36 +7,76 @@ import itertools
 import os
 import sys
 
+import numpy as np
 from PIL import Image, ImageDraw
+from sympy.geometry import Point
 
-#from hex_crystal import HexCrystal
-#from parallelogram_crystal import ParallelogramCrystal
+# The geometry cache is shared by both drawers, it is next to their
+# directories.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bragg_lines
+import crystal as crystal_module
+import crystal_symmetry
+import zone_polygons as zone_polygons_module
+from bragg_lines import (bragg_line_coefficients, line_intersections,
+                         points_array)
+from compositor import (downsample, draw_disks, draw_lines, polygon_labels,
+                        rgba)
+from crystal_symmetry import (fundamental_wedge, point_group,
+                              symmetric_polygons)
+from geometry_cache import cache_key, default_cache, source_version
+from hex_crystal import HexCrystal
+from parallelogram_crystal import ParallelogramCrystal
 from primitive_crystal import PrimitiveCrystal
-from sympy.geometry import Line, Point, Point2D, Segment
+from region_graph import (connected_components, crossing_labels,
+                          region_adjacency, region_distances)
+from tiled_render import render_tiles
+from zone_polygons import (arrays_to_polygons, circle_polygon, clip_polygon,
+                           merge_polygons, polygons_to_arrays, save_polygons,
+                           zone_polygons)
+from zone_raster import sample_positions, zone_colors, zone_indices
 
 IMAGE_FILE_NAME = os.environ.get("BRILLOUIN_OUTPUT", "brillouin_zone.png")
-IMAGE_SIZE = (720, 720)
+POLYGONS_FILE_NAME = os.environ.get("BRILLOUIN_POLYGONS") # .json or .npz
+IMAGE_SIZE = tuple(map(int, os.environ.get("BRILLOUIN_IMAGE_SIZE",
+                                           "720x720").split("x")))
 WIDTH = 160 # px, lattice period
 IMAGE_CENTER = (0.5 * IMAGE_SIZE[0], 0.5 * IMAGE_SIZE[1])
 CENTER = Point(0, 0)
 ZONES_COUNT = int(os.environ.get("BRILLOUIN_ZONES", "12"))
-CRYSTAL_RANGE = 4 # (4+4) x (4+4)
+CRYSTAL_RANGE = int(os.environ.get("BRILLOUIN_CRYSTAL_RANGE",
+                                   "4")) # (4+4) x (4+4)
+# "primitive", "hex" or "parallelogram"
+CRYSTAL = os.environ.get("BRILLOUIN_CRYSTAL", "primitive")
+CRYSTALS = {"primitive": PrimitiveCrystal,
+            "hex": HexCrystal,
+            "parallelogram": ParallelogramCrystal}
 ATOM_COLOR = "black"
 ATOM_RADIUS = 3 # px
+SUPERSAMPLING = int(os.environ.get("BRILLOUIN_SUPERSAMPLING",
+                                   "1")) # samples of a pixel per side
 LINE_STRETCH = 1000
 LINE_COLOR = "black"
-RADIUS_EXPLORER = 2 # distance out the border
-ZERO_EPS_EXPLORER = 1e-4
-COLORS = itertools.cycle([(0xef, 0x9a, 0x9a, 0xff),
-                          (0xce, 0x93, 0xd8, 0xff),
-                          (0x9f, 0xa8, 0xda, 0xff),
-                          (0x81, 0xd4, 0xfa, 0xff),
-                          (0x80, 0xcb, 0xc4, 0xff),
-                          (0xc5, 0xe1, 0xa5, 0xff),
-                          (0xff, 0xf5, 0x9d, 0xff),
-                          (0x8F, 0xF4, 0xEE, 0xFF),
-                          (0xb0, 0xbe, 0xc5, 0xFF),
-                          (0x90, 0xCA, 0xF9, 0xFF)])
+LINE_WIDTH = 1 # px
+TILE_SIZE = int(os.environ.get("BRILLOUIN_TILE_SIZE",
+                               "0")) # px, 0 renders the image at once
+WORKERS = int(os.environ.get("BRILLOUIN_WORKERS",
+                             "0")) # processes of tiles, 0 is count of CPUs
+BACKGROUND_COLOR = (0xff, 0xff, 0xff, 0xff)
+ZONE_COLORS = ((0xef, 0x9a, 0x9a, 0xff),
+               (0xce, 0x93, 0xd8, 0xff),
+               (0x9f, 0xa8, 0xda, 0xff),
+               (0x81, 0xd4, 0xfa, 0xff),
+               (0x80, 0xcb, 0xc4, 0xff),
+               (0xc5, 0xe1, 0xa5, 0xff),
+               (0xff, 0xf5, 0x9d, 0xff),
+               (0x8F, 0xF4, 0xEE, 0xFF),
+               (0xb0, 0xbe, 0xc5, 0xFF),
+               (0x90, 0xCA, 0xF9, 0xFF))
+# "raster", "polygons" or "explore"
+ENGINE = os.environ.get("BRILLOUIN_ENGINE", "raster")
+CACHE = default_cache() # None unless BRILLOUIN_CACHE is set
 
 def can_show_image():
   """ Return True if an image viewer can be opened (interactive session) """
@@ -49,176 +89,284 @@ def can_show_image():
     return False
   return True
 
-def flat_intersections(vals):
-  """ Return 1d list from 1d list """
-
-  for val in itertools.chain.from_iterable(vals):
-    if isinstance(val, Point2D):
-      #if val.x == 20: print(val)
-      yield val
-
-def get_bragg_plane_lines(zone_points):
-  """ Return bragg plane boundaries
-  Bragg plane is a plane in reciprocal space
-  which bisects a reciprocal lattice vector"""
-
-  for points in zone_points:
-    middle_points = map(lambda point: point * 0.5, points)
-    perpendicular_lines = []
-    for middle_point in middle_points:
-      line = Line(CENTER, middle_point).perpendicular_line(middle_point)
-      vec = line.p2 - line.p1
-      perpendicular_lines.append(Line(line.points[0] - vec * LINE_STRETCH,
-                                      line.points[0] + vec * LINE_STRETCH))
-    yield from perpendicular_lines
-
-def get_area_points(image, start_point, points_map):
-  """ Return points of area """
-
-  points_to_explore = [tuple(start_point + IMAGE_CENTER)]
-  points = set()
-  while points_to_explore:
-    point = points_to_explore.pop()
-    pos_x = round(point[0])
-    pos_y = round(point[1])
-    try:
-      if points_map[pos_y][pos_x] is not None and points_map[pos_y][pos_x] != 0:
-        points.add(points_map[pos_y][pos_x])
-      red, green, blue = image.getpixel((pos_x, pos_y))[:3]
-    except IndexError:
-      continue
-    if (red, green, blue) == (0, 0, 0):
-      continue
-    points_map[pos_y][pos_x] = 0 # The point is processed
-    if pos_x == 0 or pos_y == 0 \
-        or pos_x == IMAGE_SIZE[0] \
-        or pos_y == IMAGE_SIZE[1]:
-      continue
-    if points_map[pos_y - 1][pos_x] != 0:
-      points_to_explore.append((pos_x, pos_y - 1))
-    if points_map[pos_y + 1][pos_x] != 0:
-      points_to_explore.append((pos_x, pos_y + 1))
-    if points_map[pos_y][pos_x - 1] != 0:
-      points_to_explore.append((pos_x - 1, pos_y))
-    if points_map[pos_y][pos_x + 1] != 0:
-      points_to_explore.append((pos_x + 1, pos_y))
-  return points
-
-def explore_next(image, point, points_map):
-  """ Explore nearest zones """
-
-  area_points = list(get_area_points(image, point, points_map))
-  for points_pair in itertools.combinations(area_points, 2):
-    segment = Segment(points_pair[0], points_pair[1])
-    if segment.length == 0: # is the same point
-      continue
-    mid = segment.midpoint
-    p_line = segment.perpendicular_line(mid)
-    vec = p_line.p2 - p_line.p1
-    if abs(vec.x) < ZERO_EPS_EXPLORER:
-      yield mid + (0, RADIUS_EXPLORER * vec.y / abs(vec.y))
-      yield mid - (0, RADIUS_EXPLORER * vec.y / abs(vec.y))
-    elif abs(vec.y) < ZERO_EPS_EXPLORER:
-      yield mid + (RADIUS_EXPLORER * vec.x / abs(vec.x), 0)
-      yield mid - (RADIUS_EXPLORER * vec.x / abs(vec.x), 0)
-    else:
-      yield mid + (vec.x / abs(vec.x), RADIUS_EXPLORER * vec.y / abs(vec.y))
-      yield mid - (vec.x / abs(vec.x), RADIUS_EXPLORER * vec.y / abs(vec.y))
-    # angle = segment.angle_between(Line(CENTER, Point(0, 10)))
-    # angle += math.pi/3.0
-    # yield mid + (RADIUS * math.cos(angle), RADIUS * math.sin(angle))
-    # yield mid - (RADIUS * math.cos(angle), RADIUS * math.sin(angle))
-
-def explore(image, start_point, points_map):
-  """ Start zone exploring """
-  exploring_points = explore_next(image,
-                                  start_point,
-                                  points_map)
-  exploring_points = list(set(exploring_points))
-  zone = 1
-  while zone <= ZONES_COUNT:
-    print("Exploring zone #:" + str(zone))
-    points_to_explore = []
-    color = next(COLORS)
-    for point in exploring_points:
-      coords = (int(point.x + IMAGE_CENTER[0]), int(point.y + IMAGE_CENTER[1]))
-      try:
-        red, green, blue = image.getpixel(coords)[:3]
-      except IndexError:
-        continue
-      if (red, green, blue) == (0xFF, )*3:
-        ImageDraw.floodfill(image, coords, color)
-        points_to_explore.append(point)
-    print(str(len(points_to_explore)) + " points to explore")
-    exploring_points = []
-    for point in points_to_explore:
-      exploring_points += explore_next(image, point, points_map)
-    zone += 1
+def draw_zones_by_exploring(zone_points):
+  """ Return image with zones which are found by the regions between
+  the drawn Bragg lines and the graph of their adjacency """
+
+  image = Image.new('RGBA', IMAGE_SIZE, BACKGROUND_COLOR)
+  draw = ImageDraw.Draw(image)
+  for segment in get_bragg_line_segments(zone_points):
+    draw.line(segment, fill=LINE_COLOR)
+  del draw
+  print("Lines are drawn.")
+
+  # Regions are the pixels out of lines.
+  pixels = np.array(image)
+  free = np.any(pixels[..., :3] != rgba(LINE_COLOR)[:3], axis=2)
+  labels, count = connected_components(free)
+  crossings = line_intersections(bragg_line_coefficients(zone_points, CENTER))
+  edges = region_adjacency(labels, crossing_labels(crossings + IMAGE_CENTER,
+                                                   labels.shape))
+  print("{0} regions with {1} borders are found.".format(count, len(edges)))
+  start = labels[int(IMAGE_CENTER[1]), int(IMAGE_CENTER[0])]
+  indices = region_distances(edges, count, start)[labels] + 1
+  colors = zone_colors(indices, ZONE_COLORS, ZONES_COUNT + 1,
+                       BACKGROUND_COLOR)
+  pixels[free] = colors[free]
+  return pixels
+
+def complete_bragg_lines(crystal):
+  """ Return array (N, 3) of Bragg lines of the crystal which are nearer
+  than the half of the crystal radius to the center """
+
+  # Zone numbers are exact where all Bragg lines of the crystal are known:
+  # nearer than the half of the crystal radius.
+  complete_shells = itertools.takewhile(
+      lambda points: next(iter(points)).distance(CENTER) < crystal.radius,
+      itertools.islice(crystal.points(), 1, None))
+  return bragg_line_coefficients(complete_shells, CENTER)
+
+def get_bragg_line_segments(zone_points):
+  """ Return stretched segments of Bragg lines as tuple(x1, y1, x2, y2)
+  in image coordinates """
+
+  for vector_x, vector_y, offset in bragg_line_coefficients(zone_points,
+                                                            CENTER):
+    middle = np.array((vector_x, vector_y)) * offset / \
+        (vector_x ** 2 + vector_y ** 2)
+    direction = np.array((-vector_y, vector_x)) * LINE_STRETCH
+    yield tuple(middle - direction + IMAGE_CENTER) + \
+        tuple(middle + direction + IMAGE_CENTER)
+
+def draw_bragg_lines(pixels, positions, zone_points):
+  """ Draw Bragg lines of zone points on the samples of pixels """
+
+  draw_lines(pixels, positions, bragg_line_coefficients(zone_points, CENTER),
+             LINE_COLOR, LINE_WIDTH)
+  print("Lines are drawn.")
+
+def draw_zones_by_raster(lines, radius, zone_points, positions):
+  """ Return samples of pixels with zones which are found by the count of
+  Bragg lines between every pixel and the center, the pixels which are
+  images of others under the point group of the lines are copied """
+
+  indices = zone_indices(lines, IMAGE_SIZE, IMAGE_CENTER, 0.5 * radius,
+                         SUPERSAMPLING, point_group(lines[:, :2]))
+  pixels = zone_colors(indices, ZONE_COLORS, ZONES_COUNT + 1,
+                       BACKGROUND_COLOR)
+  draw_bragg_lines(pixels, positions, zone_points)
+  return pixels
+
+def get_zone_polygons(lines, radius):
+  """ Return list of tuple(zone number, polygon) of the visible zones,
+  polygons are clipped by the image and by the half of the crystal radius
+
+  Zones are found in the fundamental wedge of the point group of the Bragg
+  lines only, the rest of polygons are images of them; the cells and
+  their images are merged into one polygon of every zone (even-odd rule),
+  so the borders of the wedge do not split zones """
+
+  center = points_array([CENTER])[0]
+  image_lines = np.array(((1, 0, IMAGE_SIZE[0] - IMAGE_CENTER[0]),
+                          (-1, 0, IMAGE_CENTER[0]),
+                          (0, 1, IMAGE_SIZE[1] - IMAGE_CENTER[1]),
+                          (0, -1, IMAGE_CENTER[1])), dtype=np.float64)
+  operations = point_group(lines[:, :2])
+  corners = np.array([(x, y) for x in (image_lines[0, 2], -image_lines[1, 2])
+                      for y in (image_lines[2, 2], -image_lines[3, 2])])
+  images = (corners - center) @ operations.transpose(0, 2, 1) + center
+  is_symmetric_image = all(np.allclose(np.sort(image, axis=0),
+                                       np.sort(corners, axis=0))
+                           for image in images)
+  domain_radius = 0.5 * radius
+  if not is_symmetric_image:
+    # The images of the wedge must cover the image.
+    domain_radius = min(domain_radius, np.max(np.linalg.norm(corners - center,
+                                                             axis=1)))
+  domain = circle_polygon(domain_radius, center)
+  if is_symmetric_image:
+    for line in image_lines:
+      domain = clip_polygon(domain, line)
+  for normal_x, normal_y, _ in fundamental_wedge(operations):
+    domain = clip_polygon(domain, np.array(
+        (normal_x, normal_y, normal_x * center[0] + normal_y * center[1])))
+  polygons = symmetric_polygons(zone_polygons(lines, ZONES_COUNT + 1, domain),
+                                operations, center)
+  if is_symmetric_image or not polygons:
+    return merge_polygons(polygons)
+  # Only polygons which cross the border of the image are clipped.
+  arrays = polygons_to_arrays(polygons)
+  outside = np.maximum.reduceat(arrays["vertices"] @ image_lines[:, :2].T -
+                                image_lines[:, 2], arrays["offsets"][:-1])
+  visible = []
+  for (zone, polygon), distances in zip(polygons, outside):
+    for line, distance in zip(image_lines, distances):
+      if distance > 0 and len(polygon) >= 3:
+        polygon = clip_polygon(polygon, line)
+    if len(polygon) >= 3:
+      visible.append((zone, polygon))
+  return merge_polygons(visible)
+
+def needs_polygons():
+  """ Return True if polygons of zones are drawn or saved """
+
+  return (ENGINE == "polygons" or bool(POLYGONS_FILE_NAME) or
+          IMAGE_FILE_NAME.endswith(".svg"))
+
+def compute_geometry(crystal, with_polygons=True):
+  """ Return dict of arrays: points of zone shells (shell_points,
+  shell_offsets), Bragg lines of complete shells (lines), the crystal
+  radius and, with_polygons, polygons of zones (polygon_zones,
+  polygon_offsets and polygon_vertices of polygons_to_arrays) """
+
+  zone_points = list(itertools.islice(crystal.shells(), 1,
+                                     ZONES_COUNT + 2)) # first is center
+  print("Crystal is generated.")
+  lines = complete_bragg_lines(crystal)
+  geometry = {"shell_points": points_array(
+                  itertools.chain.from_iterable(zone_points)),
+              "shell_offsets": np.cumsum([0] + [len(points)
+                                                for points in zone_points]),
+              "lines": lines,
+              "radius": np.float64(crystal.radius)}
+  if not with_polygons:
+    return geometry
+  polygons = get_zone_polygons(lines, crystal.radius)
+  print(str(len(polygons)) + " polygons of zones are calculated.")
+  for name, array in polygons_to_arrays(polygons).items():
+    geometry["polygon_" + name] = array
+  return geometry
+
+def get_geometry(crystal, cache=None, with_polygons=True):
+  """ Return dict of arrays of compute_geometry from the cache if it is
+  given (CACHE by default), the crystal is not used on a cache hit """
+
+  cache = CACHE if cache is None else cache
+  if not cache:
+    return compute_geometry(crystal, with_polygons)
+  sources = [__file__] + [module.__file__ for module in (
+      bragg_lines, crystal_module, crystal_symmetry, zone_polygons_module,
+      sys.modules[type(crystal).__module__])]
+  key = cache_key(crystal=crystal.parameters(), zones_count=ZONES_COUNT,
+                  image_size=list(IMAGE_SIZE),
+                  image_center=list(IMAGE_CENTER),
+                  with_polygons=with_polygons,
+                  version=source_version(*sources))
+  return cache.get(key, lambda: compute_geometry(crystal, with_polygons))
+
+def draw_zones_by_polygons(polygons, zone_points, positions):
+  """ Return samples of pixels with filled polygons of zones """
+
+  pixels = zone_colors(polygon_labels(polygons, positions), ZONE_COLORS,
+                       ZONES_COUNT + 1, BACKGROUND_COLOR)
+  draw_bragg_lines(pixels, positions, zone_points)
+  return pixels
+
+def svg_color(color):
+  """ Return SVG color and opacity attributes of RGBA tuple """
+
+  return 'fill="#{0:02x}{1:02x}{2:02x}" fill-opacity="{3:.3g}"'.format(
+      color[0], color[1], color[2], color[3] / 0xff)
+
+def save_svg(file_name, polygons, zone_points):
+  """ Write zones, Bragg lines and atoms to SVG file element by element """
+
+  atoms = [(float(CENTER[0]), float(CENTER[1]))]
+  atoms += itertools.chain.from_iterable(zone_points)
+  with open(file_name, "w") as svg_file:
+    svg_file.write('<svg xmlns="http://www.w3.org/2000/svg" '
+                   'width="{0}" height="{1}" viewBox="0 0 {0} {1}">\n'
+                   .format(*IMAGE_SIZE))
+    svg_file.write('<rect width="100%" height="100%" {0}/>\n'
+                   .format(svg_color(BACKGROUND_COLOR)))
+    for zone, polygon in polygons:
+      points = " ".join("{0:.3f},{1:.3f}".format(*point)
+                        for point in polygon + IMAGE_CENTER)
+      svg_file.write('<polygon points="{0}" fill-rule="evenodd" {1}/>\n'
+                     .format(points, svg_color(
+                         ZONE_COLORS[(zone - 1) % len(ZONE_COLORS)])))
+    for segment in get_bragg_line_segments(zone_points):
+      svg_file.write('<line x1="{0:.3f}" y1="{1:.3f}" x2="{2:.3f}" '
+                     'y2="{3:.3f}" stroke="{4}"/>\n'
+                     .format(*segment, LINE_COLOR))
+    for atom in atoms:
+      svg_file.write('<circle cx="{0:.3f}" cy="{1:.3f}" r="{2}" '
+                     'fill="{3}"/>\n'.format(atom[0] + IMAGE_CENTER[0],
+                                              atom[1] + IMAGE_CENTER[1],
+                                              ATOM_RADIUS, ATOM_COLOR))
+    svg_file.write('</svg>\n')
+
+def draw_tiles(geometry, polygons, zone_points, atoms):
+  """ Render the image by tiles in parallel processes and save it,
+  return the exit code """
+
+  if ENGINE not in ("raster", "polygons"):
+    print("Tiles are rendered by the raster or polygons engine only")
+    return 2
+  scene = {"image_center": IMAGE_CENTER, "supersampling": SUPERSAMPLING,
+           "lines": geometry["lines"], "radius": 0.5 * geometry["radius"],
+           "polygons": polygons if ENGINE == "polygons" else None,
+           "bragg_lines": bragg_line_coefficients(zone_points, CENTER),
+           "atoms": atoms, "zone_colors": ZONE_COLORS,
+           "zones_count": ZONES_COUNT + 1, "background": BACKGROUND_COLOR,
+           "line_color": LINE_COLOR, "line_width": LINE_WIDTH,
+           "atom_color": ATOM_COLOR, "atom_radius": ATOM_RADIUS + 0.5}
+  render_tiles(IMAGE_FILE_NAME, IMAGE_SIZE, scene, TILE_SIZE, WORKERS or None)
+  print('Image is saved to ' + IMAGE_FILE_NAME)
+  return 0
 
 def main():
   """ Generate Brillouin zones for crystal """
 
-  image = Image.new('RGBA', IMAGE_SIZE, (255, 255, 255, 255))
-
   ### CRYSTAL INITIALIZATION ###
-  #crystal = ParallelogramCrystal(WIDTH, CRYSTAL_RANGE, CENTER)
-  crystal = PrimitiveCrystal(WIDTH, CRYSTAL_RANGE, CENTER)
-  #crystal = HexCrystal(WIDTH, CRYSTAL_RANGE, CENTER)
-  zone_points = list(crystal.points())[1:ZONES_COUNT+2] # first is center
-  #zone_points.reverse()
-  print("Crystal is generated.")
+  if CRYSTAL not in CRYSTALS:
+    print("Unknown crystal: " + CRYSTAL)
+    return 2
+  crystal = CRYSTALS[CRYSTAL](WIDTH, CRYSTAL_RANGE, CENTER)
+  geometry = get_geometry(crystal, with_polygons=needs_polygons())
+  zone_points = np.split(geometry["shell_points"],
+                         geometry["shell_offsets"][1:-1])
+  polygons = None
+  if "polygon_zones" in geometry:
+    polygons = arrays_to_polygons(geometry["polygon_zones"],
+                                  geometry["polygon_offsets"],
+                                  geometry["polygon_vertices"])
+  print("Geometry of zones is ready.")
 
-  ### BRAGG PLANES ###
-  bragg_plane_lines = list(get_bragg_plane_lines(zone_points))
-  print("Bragg planes are constructed.")
-
-  ### INTERSECTIONS ###
-  line_combinations = itertools.permutations(bragg_plane_lines, 2)
-  intersections = map(lambda line_pair:
-                      line_pair[0].intersection(line_pair[1]),
-                      line_combinations)
-  intersection_points = list(set(flat_intersections(intersections)))
-  points_map = [[None for x in range(IMAGE_SIZE[0] + 1)]
-                for y in range(IMAGE_SIZE[1] + 1)]
-  for intersection in intersection_points:
-    point_x = int(intersection.x + IMAGE_CENTER[0])
-    point_y = int(intersection.y + IMAGE_CENTER[1])
-    for pos_y in range(point_y - 5, point_y + 5):
-      if pos_y > IMAGE_SIZE[1] or pos_y < 0: break
-      for pos_x in range(point_x - 5, point_x + 5):
-        if pos_x > IMAGE_SIZE[0] or pos_x < 0: break
-        points_map[pos_y][pos_x] = Point(round(intersection.x), round(intersection.y))
-  print("Intersections are calculated.")
-
-  ### DRAWING ###
-  # lines
-  draw = ImageDraw.Draw(image)
-  for line in bragg_plane_lines:
-    draw.line(
-        tuple((line.points[0] + IMAGE_CENTER)) +
-        tuple((line.points[1] + IMAGE_CENTER)),
-        fill=LINE_COLOR)
-  print("Lines are drawn.")
+  if POLYGONS_FILE_NAME:
+    save_polygons(POLYGONS_FILE_NAME, polygons)
+    print('Polygons are saved to ' + POLYGONS_FILE_NAME)
+  if IMAGE_FILE_NAME.endswith(".svg"):
+    save_svg(IMAGE_FILE_NAME, polygons, zone_points)
+    print('Image is saved to ' + IMAGE_FILE_NAME)
+    return 0
 
-  # zone highlighting
-  ImageDraw.floodfill(image, IMAGE_CENTER, next(COLORS))
-  explore(image, CENTER, points_map)
+  atoms = np.vstack([points_array([CENTER])] + zone_points)
+  if TILE_SIZE:
+    return draw_tiles(geometry, polygons, zone_points, atoms)
+
+  positions = sample_positions(IMAGE_SIZE, IMAGE_CENTER, SUPERSAMPLING)
+  if ENGINE == "explore":
+    # Regions are found on pixels, the image is not supersampled.
+    pixels = draw_zones_by_exploring(zone_points)
+    positions = sample_positions(IMAGE_SIZE, IMAGE_CENTER)
+  elif ENGINE == "raster":
+    pixels = draw_zones_by_raster(geometry["lines"], geometry["radius"],
+                                  zone_points, positions)
+  elif ENGINE == "polygons":
+    pixels = draw_zones_by_polygons(polygons, zone_points, positions)
+  else:
+    print("Unknown engine: " + ENGINE)
+    return 2
   print('Zones are highlighted.')
 
   # draw atoms
-  draw.ellipse(
-      [(IMAGE_CENTER[0] - ATOM_RADIUS, IMAGE_CENTER[1] - ATOM_RADIUS),
-       (IMAGE_CENTER[0] + ATOM_RADIUS, IMAGE_CENTER[1] + ATOM_RADIUS)],
-      fill=ATOM_COLOR)
-  for points in zone_points:
-    for point in points:
-      draw.ellipse(
-          [tuple(point - (ATOM_RADIUS,)*2 + IMAGE_CENTER),
-           tuple(point + (ATOM_RADIUS,)*2 + IMAGE_CENTER)],
-          fill=ATOM_COLOR)
+  # Disks cover the pixels of the border as ellipses of Pillow.
+  draw_disks(pixels, positions, atoms, ATOM_RADIUS + 0.5, ATOM_COLOR)
   print('Atoms are allocated on plot.')
 
-  del draw
+  image = Image.fromarray(downsample(pixels, len(positions[0]) //
+                                     IMAGE_SIZE[0]), 'RGBA')
   image.save(IMAGE_FILE_NAME)
   print('Image is saved to ' + IMAGE_FILE_NAME)
   if can_show_image():
@@ -3,8 +3,9 @@
 
 """ Model of simple trigonal lattice """
 
+import numpy as np
+
 from crystal import Crystal
-from sympy.geometry import Point
 
 class ParallelogramCrystal(Crystal):
   """ Model of simple trigonal lattice """
@@ -14,5 +15,7 @@ class ParallelogramCrystal(Crystal):
     super().__init__(size, center)
 
   def _translate(self, pos_x, pos_y):
-    half_a_periodic = self._a / 2 if pos_y % 2 == 0 else 0
-    return [Point(pos_x * self._a + half_a_periodic, pos_y * self._a)]
+    half_a_periodic = np.where(pos_y % 2 == 0, self._a / 2, 0)
+    return np.column_stack((pos_x * self._a + half_a_periodic,
+                            pos_y * self._a))[:, np.newaxis] \
+        .astype(np.float64)
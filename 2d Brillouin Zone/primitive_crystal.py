@@ -3,8 +3,9 @@
 
 """ Model of simple cubic lattice """
 
+import numpy as np
+
 from crystal import Crystal
-from sympy.geometry import Point
 
 class PrimitiveCrystal(Crystal):
   """ Model of simple cubic lattice """
@@ -14,4 +15,5 @@ class PrimitiveCrystal(Crystal):
     super().__init__(size, center)
 
   def _translate(self, pos_x, pos_y):
-    return [Point(pos_x, pos_y) * self._a]
+    return np.column_stack((pos_x, pos_y))[:, np.newaxis] * \
+        np.float64(self._a)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Regions of an image with drawn Bragg lines and their adjacency
+
+Regions are 4-connected components of the pixels which are not lines,
+so they do not leak through diagonal steps of lines. Two regions are
+adjacent if a single line separates them: the zone number of a region
+is 1 + the count of lines between it and the center, i.e. 1 + its
+distance from the region of the center in the graph. Regions across
+a crossing of lines are separated by two lines, so the pixels near the
+crossings are labeled too.
+
+The pixels are labeled in int32 arrays (4 bytes per pixel): LINE_LABEL
+for the pixels of lines and 1, 2, ... for the regions, 1, 2, ... for the
+windows of crossings and NO_CROSSING for the other pixels """
+
+import collections
+
+import numpy as np
+
+LINE_LABEL = 0 # label of the pixels of lines, regions are 1, 2, ...
+NO_CROSSING = 0 # label of the pixels out of windows of crossings
+CROSSING_WINDOW = 2 # px, pixels nearer to a crossing are labeled by it
+
+def _root(parents, node):
+  """ Return the root of the node in the union-find forest, the path
+  to the root is halved """
+
+  while parents[node] != node:
+    parents[node] = parents[parents[node]]
+    node = parents[node]
+  return node
+
+def connected_components(mask):
+  """ Return tuple(int32 array of labels 1..count of the 4-connected
+  components of true pixels of the mask, LINE_LABEL for false pixels,
+  count) """
+
+  mask = np.asarray(mask, dtype=bool)
+  # The first pass labels the runs of every row and unites the runs
+  # which touch in the neighbour rows.
+  starts = mask.copy()
+  starts[:, 1:] &= ~mask[:, :-1]
+  runs = np.cumsum(starts.ravel(), dtype=np.int32).reshape(mask.shape)
+  runs[~mask] = LINE_LABEL
+  touching = mask[1:] & mask[:-1]
+  pairs = np.unique(np.column_stack((runs[1:][touching],
+                                     runs[:-1][touching])), axis=0)
+  parents = list(range(int(runs.max(initial=0)) + 1))
+  for first, second in pairs.tolist():
+    first, second = _root(parents, first), _root(parents, second)
+    if first != second:
+      parents[max(first, second)] = min(first, second)
+  # The second pass replaces the runs by the numbers of their roots.
+  roots = np.array([_root(parents, run) for run in range(len(parents))],
+                   dtype=np.int32)
+  numbers, roots = np.unique(roots, return_inverse=True)
+  return (roots.reshape(-1).astype(np.int32)[runs], len(numbers) - 1)
+
+def crossing_labels(points, shape, window=CROSSING_WINDOW):
+  """ Return int32 array of the shape of labels of pixels: the pixels of
+  the square window around the crossing point i are labeled i + 1 (later
+  crossings overwrite), other pixels are NO_CROSSING
+
+  Keyword arguments:
+    points -- float array (N, 2) of crossings of lines in pixel coordinates
+    shape -- tuple(height, width) of the image
+    window -- half of the side of windows in pixels """
+
+  points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+  labels = np.full(shape, NO_CROSSING, dtype=np.int32)
+  # Windows of all crossings are written at once.
+  origins = np.floor(points).astype(np.int64)
+  steps = np.arange(-window, window + 1)
+  pos_x, pos_y = np.broadcast_arrays(origins[:, 0, np.newaxis, np.newaxis] +
+                                     steps,
+                                     origins[:, 1, np.newaxis, np.newaxis] +
+                                     steps[:, np.newaxis])
+  values = np.broadcast_to(np.arange(1, len(points) + 1,
+                                     dtype=np.int32).reshape(-1, 1, 1),
+                           pos_x.shape)
+  inside = ((pos_x >= 0) & (pos_x < shape[1]) &
+            (pos_y >= 0) & (pos_y < shape[0]))
+  labels[pos_y[inside], pos_x[inside]] = values[inside]
+  return labels
+
+def region_adjacency(labels, crossings=None):
+  """ Return int32 array (E, 2) of sorted pairs of labels of regions which
+  are separated by one line: the pixels at both sides of a line pixel in
+  its row or its column; line pixels near crossings of lines are skipped,
+  regions across a crossing are separated by two lines
+
+  Line pixels with more than two line neighbours are crossings; lines at
+  a small angle run together farther than that, so the line pixels in
+  the windows of crossing_labels are skipped too if they are given """
+
+  lines = labels == LINE_LABEL
+  padded = np.pad(lines, 1)
+  height, width = labels.shape
+  neighbours = sum(padded[row:row + height, column:column + width]
+                   .astype(np.int32) for row in range(3)
+                   for column in range(3))
+  # A pixel of a single line has at most two line neighbours.
+  single = lines & (neighbours <= 3)
+  if crossings is not None:
+    single &= crossings == NO_CROSSING
+  middles = (single[:, 1:-1], single[1:-1])
+  sides = ((labels[:, :-2], labels[:, 2:]), (labels[:-2], labels[2:]))
+  pairs = np.concatenate([np.column_stack((first[middle], second[middle]))
+                          for middle, (first, second) in zip(middles, sides)])
+  pairs = pairs[(pairs[:, 0] != LINE_LABEL) & (pairs[:, 1] != LINE_LABEL) &
+                (pairs[:, 0] != pairs[:, 1])]
+  return np.unique(np.sort(pairs, axis=1), axis=0).astype(np.int32)
+
+def region_distances(edges, count, start):
+  """ Return int32 array (count + 1) of distances of regions 1..count from
+  the start region in the graph of edges, -1 for unreachable regions """
+
+  neighbours = [[] for _ in range(count + 1)]
+  for first, second in np.asarray(edges).tolist():
+    neighbours[first].append(second)
+    neighbours[second].append(first)
+  distances = np.full(count + 1, -1, dtype=np.int32)
+  distances[start] = 0
+  queue = collections.deque([start])
+  while queue:
+    region = queue.popleft()
+    for neighbour in neighbours[region]:
+      if distances[neighbour] < 0:
+        distances[neighbour] = distances[region] + 1
+        queue.append(neighbour)
+  return distances
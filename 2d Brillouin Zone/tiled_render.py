@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Tiled rendering of large 2D images of zones
+
+The image is split into tiles which are rendered independently by the
+processes of a pool from the shared scene: zones (Bragg lines of the raster
+engine or polygons), Bragg lines and atoms to draw. Every tile is written
+into a memory-mapped buffer next to the output file and the buffer is
+streamed to PNG or TIFF, so the memory is bounded by the size of tiles.
+
+The scene is a dict with the keys: image_center, supersampling, lines and
+radius (zones are counted by the lines) or polygons (list of tuple(zone,
+polygon)), bragg_lines (array (N, 3) of lines to draw), atoms (array (N, 2)),
+zone_colors, zones_count, background, line_color, line_width, atom_color,
+atom_radius. Coordinates are relative to the image center in pixels """
+
+import concurrent.futures
+import os
+import tempfile
+
+import numpy as np
+
+from compositor import downsample, draw_disks, draw_lines, polygon_labels
+from image_stream import write_image
+from zone_raster import sample_indices, sample_positions, zone_colors
+
+TILE_SIZE = 1024 # px
+
+_SCENE = None # scene of the worker process
+_PIXELS = None # memory-mapped image of the worker process
+
+def tile_windows(image_size, tile_size=TILE_SIZE):
+  """ Return list of tuple(left, top, right, bottom) of tiles which cover
+  the image row by row """
+
+  width, height = image_size
+  return [(left, top, min(left + tile_size, width),
+           min(top + tile_size, height))
+          for top in range(0, height, tile_size)
+          for left in range(0, width, tile_size)]
+
+def polygon_bounds(polygons):
+  """ Return array (N, 4) of bounds (min x, min y, max x, max y) of
+  tuple(zone, polygon) items """
+
+  return np.array([np.concatenate((np.min(polygon, axis=0),
+                                   np.max(polygon, axis=0)))
+                   for _, polygon in polygons]).reshape(-1, 4)
+
+def render_tile(scene, image_size, window):
+  """ Return uint8 RGBA array of the pixels of the window of the image """
+
+  left, top, right, bottom = window
+  supersampling = scene["supersampling"]
+  pos_x, pos_y = sample_positions(image_size, scene["image_center"],
+                                  supersampling)
+  positions = (pos_x[left * supersampling:right * supersampling],
+               pos_y[top * supersampling:bottom * supersampling])
+  if scene.get("polygons") is None:
+    indices = sample_indices(scene["lines"], positions, scene["radius"])
+  else:
+    # Only polygons whose bounds cross the tile are filled.
+    bounds = scene.get("polygon_bounds")
+    if bounds is None:
+      bounds = polygon_bounds(scene["polygons"])
+    crossing = ((bounds[:, 2] >= positions[0][0] - 1) &
+                (bounds[:, 0] <= positions[0][-1] + 1) &
+                (bounds[:, 3] >= positions[1][0] - 1) &
+                (bounds[:, 1] <= positions[1][-1] + 1))
+    indices = polygon_labels([scene["polygons"][index] for index in
+                              np.flatnonzero(crossing)], positions)
+  pixels = zone_colors(indices, scene["zone_colors"], scene["zones_count"],
+                       scene["background"])
+  draw_lines(pixels, positions, scene["bragg_lines"], scene["line_color"],
+             scene["line_width"])
+  atoms = np.asarray(scene["atoms"], dtype=np.float64).reshape(-1, 2)
+  reach = scene["atom_radius"] + 1
+  near = ((atoms[:, 0] >= positions[0][0] - reach) &
+          (atoms[:, 0] <= positions[0][-1] + reach) &
+          (atoms[:, 1] >= positions[1][0] - reach) &
+          (atoms[:, 1] <= positions[1][-1] + reach))
+  draw_disks(pixels, positions, atoms[near], scene["atom_radius"],
+             scene["atom_color"])
+  return downsample(pixels, supersampling)
+
+def _start_worker(scene, buffer_name):
+  """ Keep the scene and open the image buffer in the worker process """
+
+  global _SCENE, _PIXELS
+  if scene.get("polygons") is not None:
+    scene = dict(scene, polygon_bounds=polygon_bounds(scene["polygons"]))
+  _SCENE = scene
+  _PIXELS = np.load(buffer_name, mmap_mode="r+")
+
+def _stop_worker():
+  """ Release the scene and the image buffer """
+
+  global _SCENE, _PIXELS
+  _SCENE = _PIXELS = None
+
+def _render_window(window):
+  """ Render the window into the image buffer, return the window """
+
+  left, top, right, bottom = window
+  image_size = (_PIXELS.shape[1], _PIXELS.shape[0])
+  _PIXELS[top:bottom, left:right] = render_tile(_SCENE, image_size, window)
+  _PIXELS.flush()
+  return window
+
+def _report(rendered, count):
+  """ Print the progress of rendered windows """
+
+  for number, _ in enumerate(rendered, 1):
+    print("Tile {0} of {1} is rendered.".format(number, count))
+
+def render_tiles(file_name, image_size, scene, tile_size=TILE_SIZE,
+                 workers=None):
+  """ Render the image of the scene by tiles and save it to the PNG or TIFF
+  file; workers is the count of processes (default count of CPUs),
+  1 renders the tiles in this process """
+
+  windows = tile_windows(image_size, tile_size)
+  directory = os.path.dirname(os.path.abspath(file_name))
+  with tempfile.TemporaryDirectory(dir=directory) as buffer_directory:
+    buffer_name = os.path.join(buffer_directory, "pixels.npy")
+    np.lib.format.open_memmap(buffer_name, mode="w+", dtype=np.uint8,
+                              shape=(image_size[1], image_size[0], 4)).flush()
+    if workers == 1:
+      _start_worker(scene, buffer_name)
+      try:
+        _report(map(_render_window, windows), len(windows))
+      finally:
+        _stop_worker()
+    else:
+      with concurrent.futures.ProcessPoolExecutor(
+          workers, initializer=_start_worker,
+          initargs=(scene, buffer_name)) as executor:
+        _report(executor.map(_render_window, windows), len(windows))
+    pixels = np.load(buffer_name, mmap_mode="r")
+    write_image(file_name, pixels)
+    del pixels
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Exact polygons of Brillouin zones by the arrangement of Bragg lines
+
+Bragg lines cut the plane into convex cells; the zone of a cell is 1 + N,
+where N is the number of lines between the cell and the center. Two cells
+with a common side are on the different sides of one line only, so their
+zones are different and every cell is a polygon of its zone """
+
+import collections
+import json
+
+import numpy as np
+
+POLYGON_EPS = 1e-9 # relative approximation of the distance to a line
+CIRCLE_SIDES = 64 # count of sides of the polygon which replaces a circle
+
+def circle_polygon(radius, center=(0, 0), sides=CIRCLE_SIDES):
+  """ Return counterclockwise regular polygon which is inscribed
+  in the circle """
+
+  angles = np.arange(sides) * 2 * np.pi / sides
+  return np.column_stack((np.cos(angles), np.sin(angles))) * radius + center
+
+def _split(polygon, distances, eps):
+  """ Return tuple(near part, far part) of a convex polygon,
+  distances are signed distances of vertices to the line """
+
+  near = []
+  far = []
+  for k, (point, distance) in enumerate(zip(polygon, distances)):
+    next_k = (k + 1) % len(polygon)
+    if distance <= eps:
+      near.append(point)
+    if distance >= -eps:
+      far.append(point)
+    next_distance = distances[next_k]
+    if (distance < -eps and next_distance > eps) \
+        or (distance > eps and next_distance < -eps):
+      t = distance / (distance - next_distance)
+      crossing = point + (polygon[next_k] - point) * t
+      near.append(crossing)
+      far.append(crossing)
+  return (np.array(near).reshape(-1, 2), np.array(far).reshape(-1, 2))
+
+def clip_polygon(polygon, line):
+  """ Return the part of a convex polygon where a*x + b*y <= c """
+
+  module = np.hypot(line[0], line[1])
+  distances = (polygon @ line[:2] - line[2]) / module
+  eps = POLYGON_EPS * max(np.max(np.abs(polygon)), 1)
+  return _split(polygon, distances, eps)[0]
+
+def zone_polygons(lines, zones_count, domain):
+  """ Return list of tuple(zone number, polygon) sorted by zone numbers,
+  polygons are float arrays (N, 2) of vertices of convex cells
+
+  Keyword arguments:
+    lines -- array (N, 3) of Bragg lines a*x + b*y = c, far side is > c
+    zones_count -- polygons of zones over this number are skipped
+    domain -- counterclockwise convex polygon which contains the zones """
+
+  domain = np.asarray(domain, dtype=np.float64)
+  eps = POLYGON_EPS * max(np.max(np.abs(domain)), 1)
+  lines = np.asarray(lines, dtype=np.float64).reshape(-1, 3)
+  lines = lines / np.hypot(lines[:, 0], lines[:, 1])[:, np.newaxis]
+  lines = lines[np.argsort(np.abs(lines[:, 2]), kind='stable')]
+  domain_distances = domain @ lines[:, :2].T - lines[:, 2]
+  crossing = (np.min(domain_distances, axis=0) < -eps) \
+      & (np.max(domain_distances, axis=0) > eps)
+  # The whole domain is on the far side of lines which do not cross it.
+  counts_offset = np.count_nonzero(~crossing &
+                                   (np.max(domain_distances, axis=0) > eps))
+  if counts_offset >= zones_count:
+    return []
+  cells = [domain]
+  counts = [counts_offset]
+  for line in lines[crossing]:
+    if not cells:
+      break
+    sizes = [len(cell) for cell in cells]
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    distances = np.concatenate(cells) @ line[:2] - line[2]
+    minimums = np.minimum.reduceat(distances, starts)
+    maximums = np.maximum.reduceat(distances, starts)
+    new_cells = []
+    new_counts = []
+    for cell, count, start, minimum, maximum in zip(cells, counts, starts,
+                                                     minimums, maximums):
+      if maximum <= eps:
+        new_cells.append(cell)
+        new_counts.append(count)
+      elif minimum >= -eps:
+        if count + 1 < zones_count:
+          new_cells.append(cell)
+          new_counts.append(count + 1)
+      else:
+        near, far = _split(cell, distances[start:start + len(cell)], eps)
+        new_cells.append(near)
+        new_counts.append(count)
+        if count + 1 < zones_count:
+          new_cells.append(far)
+          new_counts.append(count + 1)
+    cells = new_cells
+    counts = new_counts
+  order = np.argsort(counts, kind='stable')
+  return [(counts[index] + 1, cells[index]) for index in order]
+
+def _loops(sides):
+  """ Return list of lists of vertex indices of the closed loops which
+  are walked by the directed sides (list of tuple(start, end)), a loop
+  is closed early at a vertex without sides from it """
+
+  following = collections.defaultdict(list)
+  for start, end in sides:
+    following[start].append(end)
+  loops = []
+  for first in list(following):
+    while following[first]:
+      loop = [first]
+      vertex = following[first].pop()
+      while vertex != first:
+        loop.append(vertex)
+        if not following[vertex]:
+          break
+        vertex = following[vertex].pop()
+      loops.append(loop)
+  return loops
+
+def merge_polygons(polygons):
+  """ Return list of tuple(zone number, polygon) with one polygon for every
+  zone, sorted by zone numbers: sides which are shared by polygons of the
+  zone cancel and the loops of the other sides are joined by bridges from
+  the first loop which are walked there and back, so the polygon must be
+  filled by the even-odd rule (it may have holes) """
+
+  if not polygons:
+    return []
+  arrays = polygons_to_arrays(polygons)
+  vertices = arrays["vertices"]
+  eps = POLYGON_EPS * max(np.max(np.abs(vertices)), 1)
+  # Vertices nearer than eps are replaced by the first of them, so shared
+  # sides of polygons and their images have the same ends.
+  _, firsts, indices = np.unique(np.round(vertices / eps), axis=0,
+                                 return_index=True, return_inverse=True)
+  vertices, indices = vertices[firsts], indices.reshape(-1)
+  zone_sides = collections.defaultdict(collections.Counter)
+  for zone, start, end in zip(arrays["zones"].tolist(),
+                              arrays["offsets"][:-1], arrays["offsets"][1:]):
+    polygon = indices[start:end]
+    points, following = vertices[polygon], vertices[np.roll(polygon, -1)]
+    if np.sum(points[:, 0] * following[:, 1] -
+              points[:, 1] * following[:, 0]) < 0:
+      polygon = polygon[::-1]
+    zone_sides[zone].update((first, second) for first, second in
+                            zip(polygon.tolist(), np.roll(polygon, -1).tolist())
+                            if first != second)
+  merged = []
+  for zone in sorted(zone_sides):
+    sides = zone_sides[zone]
+    kept = [side for side, count in sides.items()
+            for _ in range(count - sides[side[::-1]])]
+    loops = _loops(kept)
+    if not loops:
+      continue
+    ring = loops[0]
+    for loop in loops[1:]:
+      ring = ring + [loops[0][0]] + loop + [loop[0]]
+    merged.append((zone, vertices[ring]))
+  return merged
+
+def polygons_to_arrays(polygons):
+  """ Return dict of arrays: zones (P,), offsets (P + 1,) of polygons
+  in vertices and vertices (V, 2) of all polygons one by one """
+
+  sizes = [len(polygon) for _, polygon in polygons]
+  return {"zones": np.array([zone for zone, _ in polygons], dtype=np.int32),
+          "offsets": np.concatenate(([0], np.cumsum(sizes))).astype(np.int64),
+          "vertices": np.concatenate([polygon for _, polygon in polygons]
+                                     or [np.empty((0, 2))])}
+
+def arrays_to_polygons(zones, offsets, vertices):
+  """ Return list of tuple(zone number, polygon) of polygons_to_arrays """
+
+  return [(int(zone), vertices[start:end])
+          for zone, start, end in zip(zones, offsets[:-1], offsets[1:])]
+
+def save_polygons(file_name, polygons):
+  """ Save zone polygons to JSON (.json) or NumPy (.npz) file """
+
+  if file_name.endswith(".npz"):
+    np.savez_compressed(file_name, **polygons_to_arrays(polygons))
+    return
+  with open(file_name, "w") as json_file:
+    json.dump({"polygons": [{"zone": int(zone), "vertices": polygon.tolist()}
+                            for zone, polygon in polygons]}, json_file)
+
+def load_polygons(file_name):
+  """ Return list of tuple(zone number, polygon) from JSON or NumPy file """
+
+  if file_name.endswith(".npz"):
+    with np.load(file_name) as data:
+      return arrays_to_polygons(data["zones"], data["offsets"],
+                                data["vertices"])
+  with open(file_name) as json_file:
+    return [(item["zone"], np.array(item["vertices"], dtype=np.float64))
+            for item in json.load(json_file)["polygons"]]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Zone numbers of pixels by the count of separating Bragg lines
+
+A pixel belongs to the zone 1 + N, where N is the number of Bragg lines
+between the pixel and the center """
+
+import numpy as np
+
+LINES_BATCH = 16 # count of lines which are processed at once
+CROSSING_EPS = 1e-9
+SYMMETRY_EPS = 1e-6 # approximation of the entries of operations and samples
+
+def sample_positions(image_size, image_center, supersampling=1):
+  """ Return tuple(x, y) of coordinates of the samples of the columns and
+  the rows, every pixel has supersampling x supersampling samples whose
+  mean is the point (x, y) - image_center of the pixel (x, y) """
+
+  width, height = image_size
+  step = 1.0 / supersampling
+  offset = 0.5 * step - 0.5
+  pos_x = np.arange(width * supersampling) * step + offset - image_center[0]
+  pos_y = np.arange(height * supersampling) * step + offset - image_center[1]
+  return (pos_x, pos_y)
+
+def sample_indices(lines, positions, radius=np.inf):
+  """ Return int32 array (len(y), len(x)) of zone numbers of the samples
+  at tuple(x, y) positions, 0 is for samples which are out of the radius;
+  lines which do not cross the rectangle of the samples are counted once """
+
+  pos_x, pos_y = positions
+  lines = np.asarray(lines, dtype=np.float64).reshape(-1, 3)
+  middle = (0.5 * (pos_x[0] + pos_x[-1]), 0.5 * (pos_y[0] + pos_y[-1]))
+  offsets = lines[:, 0] * middle[0] + lines[:, 1] * middle[1] - lines[:, 2]
+  reach = (0.5 * np.abs(lines[:, 0]) * (pos_x[-1] - pos_x[0]) +
+           0.5 * np.abs(lines[:, 1]) * (pos_y[-1] - pos_y[0]))
+  # Lines near the corners are counted by samples against rounding.
+  crossing = np.abs(offsets) <= reach * (1 + CROSSING_EPS) + CROSSING_EPS
+  counts = np.full((len(pos_y), len(pos_x)),
+                   1 + np.count_nonzero(offsets[~crossing] > 0),
+                   dtype=np.int32)
+  lines = lines[crossing]
+  for start in range(0, len(lines), LINES_BATCH):
+    batch = lines[start:start + LINES_BATCH, :, np.newaxis, np.newaxis]
+    sides = (batch[:, 0] * pos_x + batch[:, 1] * pos_y[:, np.newaxis] >
+             batch[:, 2])
+    counts += np.count_nonzero(sides, axis=0).astype(np.int32)
+  if np.isfinite(radius):
+    counts[pos_x[np.newaxis] ** 2 + pos_y[:, np.newaxis] ** 2
+           >= radius ** 2] = 0
+  return counts
+
+def _mirror_partners(positions):
+  """ Return int array of indices of the samples at -positions, -1 where
+  there is no such sample, or None if the evenly spaced positions are not
+  symmetric about 0 """
+
+  if len(positions) < 2:
+    return None
+  shift = -2 * positions[0] / (positions[1] - positions[0])
+  if abs(shift - round(shift)) > SYMMETRY_EPS:
+    return None
+  partners = int(round(shift)) - np.arange(len(positions))
+  partners[(partners < 0) | (partners >= len(positions))] = -1
+  return partners
+
+def symmetric_sample_indices(lines, positions, radius=np.inf,
+                             operations=()):
+  """ Return sample_indices of the samples at tuple(x, y) positions, only
+  a half or a quarter of them is computed if the point group (operations)
+  of the lines has the mirrors in the axes or the half turn and the samples
+  are symmetric about the center """
+
+  pos_x, pos_y = positions
+  operations = np.asarray(operations, dtype=np.float64).reshape(-1, 2, 2)
+
+  def _has(operation):
+    return bool(np.any(np.all(np.abs(operations - operation) <=
+                              SYMMETRY_EPS, axis=(1, 2))))
+
+  partners_x, partners_y = _mirror_partners(pos_x), _mirror_partners(pos_y)
+  mirror_x = partners_x is not None and _has(np.diag((-1.0, 1.0)))
+  mirror_y = partners_y is not None and _has(np.diag((1.0, -1.0)))
+  half_turn = (partners_x is not None and partners_y is not None and
+               not mirror_x and not mirror_y and _has(-np.eye(2)))
+  # A sample is computed unless its image precedes it.
+  columns = np.ones(len(pos_x), dtype=bool)
+  if mirror_x:
+    columns = (partners_x < 0) | (partners_x >= np.arange(len(pos_x)))
+  rows = np.ones(len(pos_y), dtype=bool)
+  if mirror_y or half_turn:
+    rows = (partners_y < 0) | (partners_y >= np.arange(len(pos_y)))
+  indices = np.empty((len(pos_y), len(pos_x)), dtype=np.int32)
+  indices[np.ix_(rows, columns)] = sample_indices(
+      lines, (pos_x[columns], pos_y[rows]), radius)
+  if mirror_x:
+    indices[np.ix_(rows, ~columns)] = indices[np.ix_(rows,
+                                                     partners_x[~columns])]
+  if mirror_y:
+    indices[~rows] = indices[partners_y[~rows]]
+  elif half_turn:
+    inside = partners_x >= 0
+    indices[np.ix_(~rows, inside)] = indices[np.ix_(partners_y[~rows],
+                                                    partners_x[inside])]
+    if not np.all(inside) and not np.all(rows):
+      indices[np.ix_(~rows, ~inside)] = sample_indices(
+          lines, (pos_x[~inside], pos_y[~rows]), radius)
+  return indices
+
+def zone_indices(lines, image_size, image_center, radius=np.inf,
+                 supersampling=1, operations=()):
+  """ Return int32 array (height, width) of zone numbers of pixels,
+  0 is for pixels which are out of the radius (where the lines
+  are not complete); pixel (x, y) is the point (x, y) - image_center;
+  the array is supersampling times larger if the pixels are sampled;
+  the operations of the point group of the lines spare symmetric pixels """
+
+  return symmetric_sample_indices(
+      lines, sample_positions(image_size, image_center, supersampling),
+      radius, operations)
+
+def zone_colors(indices, colors, zones_count, background):
+  """ Return uint8 RGBA array of pixels which are colored by zones,
+  zones over zones_count and unknown zones have background color """
+
+  palette = [background]
+  palette += [colors[zone % len(colors)] for zone in range(zones_count)]
+  palette.append(background)
+  palette = np.array(palette, dtype=np.uint8)
+  return palette[np.minimum(indices, zones_count + 1)]
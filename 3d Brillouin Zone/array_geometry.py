@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Module for vectorized geometric calculations on arrays of primitives."""
+
+import numpy as np
+
+from geometry import Line3D, Plane, Point3D, Vector3D
+
+ZERO_EPS = 1e-9 # Approximation of zero for determinants and denominators
+
+def _as_coords(values):
+  """Return float64 array of shape (N, 3) from an array-like object."""
+  return np.asarray(values, dtype=np.float64).reshape(-1, 3)
+
+def _normalized(vectors):
+  """Return vectors scaled so that length is 1 (zero vectors stay zero)."""
+  modules = np.linalg.norm(vectors, axis=1)
+  modules[modules == 0] = 1
+  return vectors / modules[:, np.newaxis]
+
+class PointArray(object):
+  """Array of points in three-dimensional space.
+
+     Keyword arguments:
+       coords -- array-like of shape (N, 3)
+  """
+
+  def __init__(self, coords):
+    self._coords = _as_coords(coords)
+
+  @staticmethod
+  def from_points(points):
+    """Return PointArray which contains coordinates of Point3D objects."""
+    return PointArray([tuple(map(float, point)) for point in points])
+
+  def to_points(self):
+    """Return list of Point3D objects."""
+    return [Point3D(*coords) for coords in self._coords.tolist()]
+
+  def __repr__(self):
+    return '<{0} object {{ size: {1} }}>'.format(self.__class__.__name__,
+                                                len(self))
+
+  def __len__(self):
+    return len(self._coords)
+
+  def __getitem__(self, index):
+    return PointArray(self._coords[index])
+
+  def __array__(self, dtype=None, copy=None):
+    return np.asarray(self._coords, dtype=dtype)
+
+  @property
+  def coords(self):
+    """Return array of shape (N, 3) with coordinates of the points."""
+    return self._coords
+
+  @property
+  def x(self):
+    """Return x coordinates of the points."""
+    return self._coords[:, 0]
+
+  @property
+  def y(self):
+    """Return y coordinates of the points."""
+    return self._coords[:, 1]
+
+  @property
+  def z(self):
+    """Return z coordinates of the points."""
+    return self._coords[:, 2]
+
+class PlaneArray(object):
+  """Array of planes by normal vectors and points [A*x+B*y+C*z+D=0].
+
+     Keyword arguments:
+       points -- array-like of shape (N, 3), points on the planes
+       normal_vectors -- array-like of shape (N, 3)
+  """
+
+  def __init__(self, points, normal_vectors):
+    self._points = _as_coords(points)
+    self._normal_vectors = _normalized(_as_coords(normal_vectors))
+    self._D = -np.sum(self._points * self._normal_vectors, axis=1)
+
+  @staticmethod
+  def from_planes(planes):
+    """Return PlaneArray which contains Plane objects."""
+    planes = list(planes)
+    return PlaneArray([(plane.x0, plane.y0, plane.z0) for plane in planes],
+                      [(plane.A, plane.B, plane.C) for plane in planes])
+
+  def to_planes(self):
+    """Return list of Plane objects."""
+    return [Plane(Point3D(point), Vector3D(normal_vector))
+            for point, normal_vector in zip(self._points.tolist(),
+                                            self._normal_vectors.tolist())]
+
+  def __repr__(self):
+    return '<{0} object {{ size: {1} }}>'.format(self.__class__.__name__,
+                                                len(self))
+
+  def __len__(self):
+    return len(self._points)
+
+  def __getitem__(self, index):
+    return PlaneArray(self._points[index], self._normal_vectors[index])
+
+  @property
+  def points(self):
+    """Return array of shape (N, 3) with points on the planes."""
+    return self._points
+
+  @property
+  def normal_vectors(self):
+    """Return array of shape (N, 3) with normalized normal vectors."""
+    return self._normal_vectors
+
+  @property
+  def A(self):
+    """Return the x coordinates of normal vectors."""
+    return self._normal_vectors[:, 0]
+
+  @property
+  def B(self):
+    """Return the y coordinates of normal vectors."""
+    return self._normal_vectors[:, 1]
+
+  @property
+  def C(self):
+    """Return the z coordinates of normal vectors."""
+    return self._normal_vectors[:, 2]
+
+  @property
+  def D(self):
+    """Return the D = -x0*A - y0*B - z0*C of the planes."""
+    return self._D
+
+class LineArray(object):
+  """Array of lines by points and directing vectors.
+
+     Keyword arguments:
+       points -- array-like of shape (N, 3), points on the lines
+       directing_vectors -- array-like of shape (N, 3)
+  """
+
+  def __init__(self, points, directing_vectors):
+    self._points = _as_coords(points)
+    self._directing_vectors = _normalized(_as_coords(directing_vectors))
+
+  @staticmethod
+  def from_lines(lines):
+    """Return LineArray which contains Line3D objects."""
+    lines = list(lines)
+    return LineArray([(line.x0, line.y0, line.z0) for line in lines],
+                     [(line.l, line.m, line.n) for line in lines])
+
+  def to_lines(self):
+    """Return list of Line3D objects."""
+    return [Line3D(Point3D(point), Vector3D(directing_vector))
+            for point, directing_vector in zip(
+                self._points.tolist(), self._directing_vectors.tolist())]
+
+  def __repr__(self):
+    return '<{0} object {{ size: {1} }}>'.format(self.__class__.__name__,
+                                                len(self))
+
+  def __len__(self):
+    return len(self._points)
+
+  def __getitem__(self, index):
+    return LineArray(self._points[index], self._directing_vectors[index])
+
+  @property
+  def points(self):
+    """Return array of shape (N, 3) with points on the lines."""
+    return self._points
+
+  @property
+  def directing_vectors(self):
+    """Return array of shape (N, 3) with normalized directing vectors."""
+    return self._directing_vectors
+
+class ArrayGeometryUtils(object):
+  """Batch versions of GeometryUtils for arrays of primitives.
+
+     Binary operations are applied element by element, so both arguments
+     must have the same length (use index arrays to build pairs).
+     Intersections return a tuple (result, mask) where mask marks
+     elements that have an intersection.
+  """
+
+  @staticmethod
+  def dot_product(first_vectors, second_vectors):
+    """Return dot products of two arrays of vectors."""
+    return np.sum(_as_coords(first_vectors) * _as_coords(second_vectors),
+                  axis=1)
+
+  @staticmethod
+  def cross_product(first_vectors, second_vectors):
+    """Return cross products of two arrays of vectors."""
+    return np.cross(_as_coords(first_vectors), _as_coords(second_vectors))
+
+  @staticmethod
+  def point_point_distance(first_points, second_points):
+    """Return distances between two arrays of points."""
+    return np.linalg.norm(_as_coords(second_points) -
+                          _as_coords(first_points), axis=1)
+
+  @staticmethod
+  def plane_plane_intersection(first_planes, second_planes):
+    """Return tuple(LineArray, mask) of intersections of two plane arrays."""
+    first_normals = first_planes.normal_vectors
+    second_normals = second_planes.normal_vectors
+    directing_vectors = np.cross(first_normals, second_normals)
+    squared_modules = np.sum(directing_vectors ** 2, axis=1)
+    mask = squared_modules > ZERO_EPS
+    squared_modules[~mask] = 1
+    # The point of the line which is the nearest to the origin.
+    first_d = -first_planes.D
+    second_d = -second_planes.D
+    normals_dot = np.sum(first_normals * second_normals, axis=1)
+    first_k = (first_d - second_d * normals_dot) / squared_modules
+    second_k = (second_d - first_d * normals_dot) / squared_modules
+    points = (first_normals * first_k[:, np.newaxis] +
+              second_normals * second_k[:, np.newaxis])
+    return (LineArray(points, directing_vectors), mask)
+
+  @staticmethod
+  def plane_line_intersection(planes, lines):
+    """Return tuple(PointArray, mask) of intersections of planes and lines."""
+    normals = planes.normal_vectors
+    directing_vectors = lines.directing_vectors
+    t_denominator = np.sum(normals * directing_vectors, axis=1)
+    mask = np.abs(t_denominator) > ZERO_EPS
+    t_denominator[~mask] = 1
+    t_numerator = np.sum((planes.points - lines.points) * normals, axis=1)
+    t = t_numerator / t_denominator
+    return (PointArray(lines.points + directing_vectors * t[:, np.newaxis]),
+            mask)
+
+  @staticmethod
+  def half_space_containment(planes, points, center, eps=ZERO_EPS):
+    """Return tuple(inside, active) of boolean arrays of shape (N, M) for
+       all N points and all M planes: inside[i, j] is True if the i-th
+       point is in the closed half-space of the j-th plane that contains
+       the center, active[i, j] is True if it lies on the plane (distances
+       are compared with eps).
+    """
+    normals = planes.normal_vectors
+    distances = _as_coords(points) @ normals.T + planes.D
+    # Distances are measured out of the center.
+    center_distances = _as_coords(center) @ normals.T + planes.D
+    distances *= np.where(center_distances > 0, -1.0, 1.0)
+    return (distances <= eps, np.abs(distances) <= eps)
+
+  @staticmethod
+  def plane_segment_intersection(planes, first_points, second_points,
+                                 eps=0.01):
+    """Return tuple(PointArray, mask) of intersections of planes and
+       segments which are defined by arrays of their end points.
+    """
+    first_points = _as_coords(first_points)
+    second_points = _as_coords(second_points)
+    lengths = np.linalg.norm(second_points - first_points, axis=1)
+    lines = LineArray(first_points, second_points - first_points)
+    intersections, mask = ArrayGeometryUtils.plane_line_intersection(planes,
+                                                                     lines)
+    distance_a = np.linalg.norm(intersections.coords - first_points, axis=1)
+    distance_b = np.linalg.norm(intersections.coords - second_points, axis=1)
+    mask &= lengths > 0
+    mask &= np.abs(lengths - distance_a - distance_b) <= eps * lengths
+    return (intersections, mask)
@@ -3,8 +3,6 @@
 
 """Base-centered reciprocal lattice."""
 
-from decimal import Decimal
-
 from geometry import Vector3D
 from reciprocal_lattice import ReciprocalLattice
 
@@ -12,16 +10,18 @@ from reciprocal_lattice import ReciprocalLattice
 class BaseCenteredReciprocalLattice(ReciprocalLattice):
   """Model of the base-centered reciprocal lattice."""
 
-  def __init__(self, a, size, center):
+  def __init__(self, a, size, center, c_to_a=1):
     self._a = a
+    self._c_to_a = c_to_a
     super().__init__(size, center)
 
   @property
   def primitive_vectors(self):
-    a = Decimal(self._a)
-    half_a = Decimal(self._a / 2.)
+    a = self._backend.number(self._a)
+    half_a = self._backend.number(self._a / 2.)
+    c = self._backend.number(self._c_to_a) * a
     return (
-        Vector3D(+half_a, +half_a, 0),
-        Vector3D(+half_a, -half_a, 0),
-        Vector3D(0, 0, a),
+        Vector3D(+half_a, +half_a, 0, self._backend),
+        Vector3D(+half_a, -half_a, 0, self._backend),
+        Vector3D(0, 0, c, self._backend),
     )
@@ -18,7 +18,7 @@ class BodyCenteredReciprocalLattice(ReciprocalLattice):
   def primitive_vectors(self):
     half_a = self._a / 2.0
     return (
-        Vector3D(-half_a, +half_a, +half_a),
-        Vector3D(+half_a, +half_a, +half_a),
-        Vector3D(-half_a, -half_a, +half_a),
+        Vector3D(-half_a, +half_a, +half_a, self._backend),
+        Vector3D(+half_a, +half_a, +half_a, self._backend),
+        Vector3D(-half_a, -half_a, +half_a, self._backend),
     )
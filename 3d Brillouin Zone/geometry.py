@@ -1,13 +1,152 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-"""Module for geometric calculations."""
-
+"""Module for geometric calculations.
+
+Coordinates are numbers of the current backend: float (default), Decimal
+with the configurable precision or exact Fraction for verification runs
+(square roots are rounded to FRACTION_SQRT_DIGITS digits). The backend is
+chosen by BRILLOUIN_NUMBERS or for a block of code by numeric_backend().
+Primitives keep the backend they are created with, results of operations
+on them have the same backend and primitives of different backends are
+not combined.
+"""
+
+import contextlib
+import decimal
 import math
+import os
 from decimal import Decimal
+from fractions import Fraction
 
 POINT_APROX_DIGITS = 4
 NORMAL_VECTOR = (2, 3, 4) # for angle calculation
+NUMBERS = os.environ.get("BRILLOUIN_NUMBERS",
+                         "float") # "float", "decimal" or "fraction"
+DECIMAL_PRECISION = int(os.environ.get("BRILLOUIN_DECIMAL_PRECISION", "28"))
+FLOAT_ZERO_EPS = 1e-12 # Approximation of zero for determinants of unit vectors
+FRACTION_SQRT_DIGITS = 40
+
+class NumberBackend(object):
+  """The number type of coordinates of the geometric primitives.
+
+     Keyword arguments:
+       name -- "float", "decimal" or "fraction"
+       number -- function which converts a number to the type
+       sqrt -- function which returns the square root of a number
+       zero_eps -- approximation of zero for determinants of unit vectors
+       precision -- count of significant digits of Decimal numbers
+  """
+
+  def __init__(self, name, number, sqrt, zero_eps, precision=None):
+    self._name = name
+    self._number = number
+    self._sqrt = sqrt
+    self._zero_eps = zero_eps
+    self._precision = precision
+
+  def __repr__(self):
+    return '<{0} object {{ name: {1} }}>'.format(self.__class__.__name__,
+                                                self._name)
+
+  def __reduce__(self):
+    # The functions of the backend are restored by its name.
+    return (get_backend, (self._name, self._precision))
+
+  @property
+  def name(self):
+    """Return the name of the backend."""
+    return self._name
+
+  @property
+  def zero_eps(self):
+    """Return the approximation of zero for determinants of unit vectors."""
+    return self._zero_eps
+
+  @property
+  def precision(self):
+    """Return count of significant digits of Decimal numbers or None."""
+    return self._precision
+
+  def number(self, value):
+    """Return the value converted to the number type."""
+    return self._number(value)
+
+  def sqrt(self, value):
+    """Return the square root of the number."""
+    return self._sqrt(value)
+
+def _decimal(value):
+  """Return Decimal of a number of any type."""
+  if isinstance(value, Decimal):
+    return value
+  if isinstance(value, Fraction):
+    return Decimal(value.numerator) / Decimal(value.denominator)
+  if isinstance(value, int):
+    return Decimal(value)
+  return Decimal(float(value))
+
+def _fraction_sqrt(value):
+  """Return Fraction which is the rounded square root of the fraction."""
+  with decimal.localcontext() as context:
+    context.prec = FRACTION_SQRT_DIGITS
+    return Fraction(_decimal(value).sqrt())
+
+def get_backend(name=None, precision=None):
+  """Return NumberBackend by the name (BRILLOUIN_NUMBERS by default),
+     precision is the count of digits of Decimal numbers."""
+  name = name or NUMBERS
+  if name == "float":
+    return NumberBackend(name, float, math.sqrt, FLOAT_ZERO_EPS)
+  if name == "decimal":
+    precision = precision or DECIMAL_PRECISION
+    return NumberBackend(name, lambda value: +_decimal(value),
+                         lambda value: value.sqrt(),
+                         Decimal(10) ** (2 - precision), precision)
+  if name == "fraction":
+    return NumberBackend(name, Fraction, _fraction_sqrt, 0)
+  raise ValueError("Unknown numbers: " + name)
+
+_backend = get_backend()
+if _backend.precision is not None:
+  decimal.getcontext().prec = _backend.precision
+
+def current_backend():
+  """Return NumberBackend of the coordinates of new primitives."""
+  return _backend
+
+@contextlib.contextmanager
+def numeric_backend(name, precision=None):
+  """Use the backend for the primitives which are created in the block."""
+  global _backend
+  previous = _backend
+  _backend = get_backend(name, precision)
+  try:
+    with decimal.localcontext() as context:
+      if _backend.precision is not None:
+        context.prec = _backend.precision
+      yield _backend
+  finally:
+    _backend = previous
+
+def number(value):
+  """Return the value converted to the number type of the backend."""
+  return _backend.number(value)
+
+def common_backend(*entities):
+  """Return NumberBackend of the primitives.
+
+     Raises ValueError if the primitives have different backends.
+  """
+  backends = {entity.backend.name: entity.backend for entity in entities}
+  if len(backends) > 1:
+    raise ValueError("Primitives of {0} numbers are combined"
+                     .format(" and ".join(sorted(backends))))
+  return next(iter(backends.values()))
+
+def sqrt(value):
+  """Return the square root of the number by the backend."""
+  return _backend.sqrt(value)
 
 class Segment3D(object):
   """The mathematical model of a line segmnet
@@ -54,86 +193,114 @@ class Segment3D(object):
     """Return the size of a line segment."""
     return self._length
 
-  def is_contain_point(self, point, eps=Decimal(0.01)):
+  def is_contain_point(self, point, eps=0.01):
     """Check that the segment contains a point."""
     distance_a = GeometryUtils.distance(point, self._first_point)
     distance_b = GeometryUtils.distance(point, self._second_point)
-    return abs(self.length - distance_a - distance_b) <= eps * self.length
+    return (abs(self.length - distance_a - distance_b) <=
+            self._first_point.backend.number(eps) * self.length)
+
+
+class _Immutable(object):
+  """Base of the geometric primitives whose attributes are set once."""
+
+  __slots__ = ()
+
+  def __setattr__(self, name, value):
+    raise AttributeError("{0} is immutable".format(self.__class__.__name__))
 
+  def __delattr__(self, name):
+    raise AttributeError("{0} is immutable".format(self.__class__.__name__))
 
-class Point3D(object):
+  def _set(self, name, value):
+    """Set the attribute in the constructor."""
+    object.__setattr__(self, name, value)
+
+class Point3D(_Immutable):
   """The mathematical model of a point in three-dimensional space.
 
     Keyword arguments:
       x -- x coordinate or tuple if y and z are None
       y -- y coordinate (default None)
       z -- z coordinate (default None)
+      backend -- NumberBackend of the coordinates (default the current one)
   """
 
-  def __init__(self, x, y=None, z=None):
+  __slots__ = ('_x', '_y', '_z', '_key', '_hash', '_backend')
+
+  def __init__(self, x, y=None, z=None, backend=None):
     if y is None and z is None:
-      self._x = x[0]
-      self._y = x[1]
-      self._z = x[2]
-    else:
-      self._x = x
-      self._y = y
-      self._z = z
-    if self._z is None:
-      self._z = 0
-    self._x = Decimal(self._x)
-    self._y = Decimal(self._y)
-    self._z = Decimal(self._z)
+      x, y, z = x[0], x[1], x[2]
+    if z is None:
+      z = 0
+    backend = backend or _backend
+    self._set('_backend', backend)
+    self._set('_x', backend.number(x))
+    self._set('_y', backend.number(y))
+    self._set('_z', backend.number(z))
+    # Points are equal if their rounded coordinates are equal.
+    self._set('_key', (round(self._x, POINT_APROX_DIGITS) + 0,
+                       round(self._y, POINT_APROX_DIGITS) + 0,
+                       round(self._z, POINT_APROX_DIGITS) + 0))
+    self._set('_hash', hash(self._key))
 
   def __eq__(self, other):
     if isinstance(self, other.__class__):
-      return (round(self.x, POINT_APROX_DIGITS) ==
-              round(self.x, POINT_APROX_DIGITS) and
-              round(self.y, POINT_APROX_DIGITS) ==
-              round(self.y, POINT_APROX_DIGITS) and
-              round(self.z, POINT_APROX_DIGITS) ==
-              round(self.z, POINT_APROX_DIGITS))
+      return self._key == other._key
     return False
 
   def __ne__(self, other):
     return not self.__eq__(other)
 
   def __hash__(self):
-    return hash((round(self._x, POINT_APROX_DIGITS) + Decimal(1e8),
-                 round(self._y, POINT_APROX_DIGITS) + Decimal(1e4),
-                 round(self._z, POINT_APROX_DIGITS)))
+    return self._hash
+
+  def __reduce__(self):
+    return (type(self), (self._x, self._y, self._z, self._backend))
 
   def __repr__(self):
     return ('<{0} object {{ x: {1}, y: {2}, z: {3} }}>'
             .format(self.__class__.__name__, self.x, self.y, self.z))
 
   def __add__(self, another_point):
-    another_point = tuple(another_point)
-    point = Point3D(self.x + another_point[0],
-                    self.y + another_point[1],
-                    self.z + another_point[2])
+    backend, another_point = self.__operand(another_point)
+    point = Point3D(self._x + another_point[0],
+                    self._y + another_point[1],
+                    self._z + another_point[2], backend)
     return point
 
   def __sub__(self, another_point):
-    another_point = tuple(another_point)
-    point = Point3D(self.x - another_point[0],
-                    self.y - another_point[1],
-                    self.z - another_point[2])
+    backend, another_point = self.__operand(another_point)
+    point = Point3D(self._x - another_point[0],
+                    self._y - another_point[1],
+                    self._z - another_point[2], backend)
     return point
 
   def __mul__(self, k):
-    k = Decimal(k)
-    return type(self)(self.x * k, self.y * k, self.z * k)
+    k = self._backend.number(k)
+    return type(self)(self._x * k, self._y * k, self._z * k, self._backend)
+
+  def __operand(self, another_point):
+    """Return tuple(backend, coordinates) of the point or of the tuple
+       whose coordinates are converted to the backend of this point."""
+    if isinstance(another_point, Point3D):
+      return (common_backend(self, another_point), tuple(another_point))
+    return (self._backend, tuple(map(self._backend.number, another_point)))
 
   def __iter__(self):
-    yield self.x
-    yield self.y
-    yield self.z
+    yield self._x
+    yield self._y
+    yield self._z
 
   @property
   def coords(self):
     """Return tuple that contains the coordinates of the point: x, y, z."""
-    return tuple(self.__iter__)
+    return (self._x, self._y, self._z)
+
+  @property
+  def backend(self):
+    """Return NumberBackend of the coordinates."""
+    return self._backend
 
   @property
   def x(self):
@@ -153,34 +320,50 @@ class Point3D(object):
 class Vector3D(Point3D):
   """The mathematical model of a vector in three-dimensional space."""
 
+  __slots__ = ()
+
   @staticmethod
   def by_points(first_point, second_point):
     """Return Vector3D which is defined by two points."""
-    point = second_point - first_point
-    point.__class__ = Vector3D
-    if point.module == 0:
+    vector = Vector3D(second_point.x - first_point.x,
+                      second_point.y - first_point.y,
+                      second_point.z - first_point.z,
+                      common_backend(first_point, second_point))
+    if vector.module == 0:
       raise TypeError("Two points must be different")
-    return point
+    return vector
 
   @property
   def normalized(self):
     """Return Vector3D which is scaled so that length is 1."""
     k = self.module
-    return Vector3D(self.x / k, self.y / k, self.z / k)
+    return Vector3D(self._x / k, self._y / k, self._z / k, self._backend)
 
   @property
   def module(self):
     """Return absolute value of the vector."""
-    return (self.x ** 2 + self.y ** 2 + self.z ** 2).sqrt()
+    return self._backend.sqrt(self._x ** 2 + self._y ** 2 + self._z ** 2)
 
-class Plane(object):
+class Plane(_Immutable):
   """The mathematical model of a plane
   by normal vector and point [A*x+B*y+C*y+D=0].
   """
 
+  __slots__ = ('_normal_vector', '_point', '_coefficients', '_key', '_hash',
+               '_backend')
+
   def __init__(self, point, normal_vector):
-    self._normal_vector = normal_vector.normalized
-    self._point = point
+    self._set('_backend', common_backend(point, normal_vector))
+    normal_vector = normal_vector.normalized
+    self._set('_normal_vector', normal_vector)
+    self._set('_point', point)
+    A, B, C = normal_vector.coords
+    D = -point.x * A - point.y * B - point.z * C
+    self._set('_coefficients', (A, B, C, D))
+    # Planes are equal if their rounded coefficients are equal.
+    self._set('_key', tuple(round(coefficient, POINT_APROX_DIGITS) + 0
+                            for coefficient in self._coefficients))
+    self._set('_hash', hash(self._key))
 
   def __repr__(self):
     return ('<{0} object {{ normal_vector: {1}, point: {2} }}>'
@@ -188,23 +371,45 @@ class Plane(object):
                     tuple(self._normal_vector),
                     tuple(self._point)))
 
+  def __eq__(self, other):
+    if isinstance(self, other.__class__):
+      return self._key == other._key
+    return False
+
+  def __ne__(self, other):
+    return not self.__eq__(other)
+
   def __hash__(self):
-    return hash(tuple(self._normal_vector) + tuple(self._point))
+    return self._hash
+
+  def __reduce__(self):
+    return (type(self), (self._point, self._normal_vector))
+
+  @property
+  def backend(self):
+    """Return NumberBackend of the coefficients."""
+    return self._backend
+
+  @property
+  def coefficients(self):
+    """Return tuple(A, B, C, D) of the plane equation, (A, B, C) is
+       the unit normal vector."""
+    return self._coefficients
 
   @property
   def A(self):
     """Return the x coordinate of normal vector."""
-    return self._normal_vector.x
+    return self._coefficients[0]
 
   @property
   def B(self):
     """Return the y coordinate of normal vector."""
-    return self._normal_vector.y
+    return self._coefficients[1]
 
   @property
   def C(self):
     """Return the z coordinate of normal vector."""
-    return self._normal_vector.z
+    return self._coefficients[2]
 
   @property
   def D(self):
@@ -212,7 +417,7 @@ class Plane(object):
        where x0, y0, z0 are coordinates of point on the plane;
        A, B, C are coordinates of normal vector.
     """
-    return -self.x0 * self.A - self.y0 * self.B - self.z0 * self.C
+    return self._coefficients[3]
 
   @property
   def x0(self):
@@ -229,15 +434,20 @@ class Plane(object):
     """Return z coordinate of point on the plane."""
     return self._point.z
 
-class Line3D(object):
+class Line3D(_Immutable):
   """The mathematical model of a line
      by point and directing vector
      in three-dimensional space.
   """
 
+  __slots__ = ('_directing_vector', '_point', '_coefficients', '_backend')
+
   def __init__(self, point, directing_vector):
-    self._directing_vector = directing_vector.normalized
-    self._point = point
+    self._set('_backend', common_backend(point, directing_vector))
+    directing_vector = directing_vector.normalized
+    self._set('_directing_vector', directing_vector)
+    self._set('_point', point)
+    self._set('_coefficients', directing_vector.coords + point.coords)
 
   def __repr__(self):
     return ('<{0} object {{ directing_vector: {1}, point: {2} }}>'
@@ -245,35 +455,49 @@ class Line3D(object):
                     tuple(self._directing_vector),
                     tuple(self._point)))
 
+  def __reduce__(self):
+    return (type(self), (self._point, self._directing_vector))
+
+  @property
+  def backend(self):
+    """Return NumberBackend of the coefficients."""
+    return self._backend
+
+  @property
+  def coefficients(self):
+    """Return tuple(l, m, n, x0, y0, z0), (l, m, n) is the unit directing
+       vector and (x0, y0, z0) is the point on the line."""
+    return self._coefficients
+
   @property
   def l(self):
     """The x coordinate of directing vector."""
-    return self._directing_vector.x
+    return self._coefficients[0]
 
   @property
   def m(self):
     """The y coordinate of directing vector."""
-    return self._directing_vector.y
+    return self._coefficients[1]
 
   @property
   def n(self):
     """The z coordinate of directing vector."""
-    return self._directing_vector.z
+    return self._coefficients[2]
 
   @property
   def x0(self):
     """The x coordinate of point on the line."""
-    return self._point.x
+    return self._coefficients[3]
 
   @property
   def y0(self):
     """The y coordinate of point on the line."""
-    return self._point.y
+    return self._coefficients[4]
 
   @property
   def z0(self):
     """The z coordinate of point on the line."""
-    return self._point.z
+    return self._coefficients[5]
 
 class GeometryUtils(object):
   """Utils for working with geometric primitives."""
@@ -300,18 +524,19 @@ class GeometryUtils(object):
     raise ValueError("It's not supported yet")
 
   @staticmethod
-  def __cramer_solve(mat):
+  def __cramer_solve(mat, zero_eps):
     """Solve a system of two equations by the Cramer method
 
        Keyword arguments:
          mat -- tuple(A, B, C, D, E, F)
          (A B | E)
          (C D | F)
+         zero_eps -- approximation of zero of the determinant
     """
     A, B, C, D, E, F = mat
     calculate_det = lambda A, B, C, D: A * D - C * B
     det = calculate_det(A, B, C, D)
-    if det == 0:
+    if abs(det) <= zero_eps:
       return None
     det0 = calculate_det(E, B, F, D)
     det1 = calculate_det(A, E, C, F)
@@ -320,32 +545,29 @@ class GeometryUtils(object):
   @staticmethod
   def plane_plane_intersection(first_plane, second_plane):
     """Return an intersection of two planes or None."""
-    l = (first_plane.B * second_plane.C -
-         first_plane.C * second_plane.B)
-    m = (first_plane.C * second_plane.A -
-         first_plane.A * second_plane.C)
-    n = (first_plane.A * second_plane.B -
-         first_plane.B * second_plane.A)
-    directing_vector = Vector3D(l, m, n)
-
-    roots0 = GeometryUtils.__cramer_solve((first_plane.B, first_plane.C,
-                                           second_plane.B, second_plane.C,
-                                           -first_plane.D, -second_plane.D))
-    roots1 = GeometryUtils.__cramer_solve((first_plane.A, first_plane.C,
-                                           second_plane.A, second_plane.C,
-                                           -first_plane.D, -second_plane.D))
-    roots2 = GeometryUtils.__cramer_solve((first_plane.A, first_plane.B,
-                                           second_plane.A, second_plane.B,
-                                           -first_plane.D, -second_plane.D))
+    backend = common_backend(first_plane, second_plane)
+    A1, B1, C1, D1 = first_plane.coefficients
+    A2, B2, C2, D2 = second_plane.coefficients
+    directing_vector = Vector3D(B1 * C2 - C1 * B2,
+                                C1 * A2 - A1 * C2,
+                                A1 * B2 - B1 * A2, backend)
+
+    roots0 = GeometryUtils.__cramer_solve((B1, C1, B2, C2, -D1, -D2),
+                                          backend.zero_eps)
     if roots0 is not None:
-      point = Point3D(0, roots0[0], roots0[1])
-    elif roots1 is not None:
-      point = Point3D(roots1[0], 0, roots1[1])
-    elif roots2 is not None:
-      point = Point3D(roots2[0], roots2[1], 0)
-    else:
-      return None
-    return Line3D(point, directing_vector)
+      return Line3D(Point3D(0, roots0[0], roots0[1], backend),
+                    directing_vector)
+    roots1 = GeometryUtils.__cramer_solve((A1, C1, A2, C2, -D1, -D2),
+                                          backend.zero_eps)
+    if roots1 is not None:
+      return Line3D(Point3D(roots1[0], 0, roots1[1], backend),
+                    directing_vector)
+    roots2 = GeometryUtils.__cramer_solve((A1, B1, A2, B2, -D1, -D2),
+                                          backend.zero_eps)
+    if roots2 is not None:
+      return Line3D(Point3D(roots2[0], roots2[1], 0, backend),
+                    directing_vector)
+    return None
 
   @staticmethod
   def plane_segment_intersection(plane, segment):
@@ -358,17 +580,14 @@ class GeometryUtils(object):
   @staticmethod
   def plane_line_intersection(plane, line):
     """Return an intersection of plane and line or None."""
-    t_denominator = plane.A * line.l + plane.B * line.m + plane.C * line.n
-    if t_denominator == 0:
+    backend = common_backend(plane, line)
+    A, B, C, D = plane.coefficients
+    l, m, n, x0, y0, z0 = line.coefficients
+    t_denominator = A * l + B * m + C * n
+    if abs(t_denominator) <= backend.zero_eps:
       return None
-    dx0 = plane.x0 - line.x0
-    dy0 = plane.y0 - line.y0
-    dz0 = plane.z0 - line.z0
-    t_numerator = dx0 * plane.A + dy0 * plane.B + dz0 * plane.C
-    t = t_numerator / t_denominator
-    return Point3D(line.l * t + line.x0,
-                   line.m * t + line.y0,
-                   line.n * t + line.z0)
+    t = -(A * x0 + B * y0 + C * z0 + D) / t_denominator
+    return Point3D(l * t + x0, m * t + y0, n * t + z0, backend)
 
   @staticmethod
   def distance(first_entity, second_entity):
@@ -381,7 +600,7 @@ class GeometryUtils(object):
   def point_point_distance(first_point, second_point):
     """Return an distance between two points."""
     delta = second_point - first_point
-    return (delta.x ** 2 + delta.y ** 2 + delta.z ** 2).sqrt()
+    return delta.backend.sqrt(delta.x ** 2 + delta.y ** 2 + delta.z ** 2)
 
   @staticmethod
   def angle_between(first_entity, second_entity):
@@ -394,6 +613,7 @@ class GeometryUtils(object):
   @staticmethod
   def dot_product(first_vector, second_vector):
     """Return dot product of two vectors."""
+    common_backend(first_vector, second_vector)
     return (first_vector.x * second_vector.x +
             first_vector.y * second_vector.y +
             first_vector.z * second_vector.z)
@@ -404,12 +624,12 @@ class GeometryUtils(object):
     x = (first_vector.y * second_vector.z - first_vector.z * second_vector.y)
     y = (first_vector.z * second_vector.x - first_vector.x * second_vector.z)
     z = (first_vector.x * second_vector.y - first_vector.y * second_vector.x)
-    return Vector3D(x, y, z)
+    return Vector3D(x, y, z, common_backend(first_vector, second_vector))
 
   @staticmethod
   def vector_vector_angle(first_vector, second_vector):
     """Return an distance between two (vectors)."""
-    normal = Vector3D(NORMAL_VECTOR)
+    normal = Vector3D(NORMAL_VECTOR, backend=first_vector.backend)
     dot_product = GeometryUtils.dot_product(first_vector, second_vector)
     cross_product = GeometryUtils.cross_product(first_vector, second_vector)
     mixed_product = GeometryUtils.dot_product(normal, cross_product)
@@ -3,26 +3,30 @@
 
 """Hexagonal close packed reciprocal lattice."""
 
-from decimal import Decimal
+import math
 
 from geometry import Vector3D
 from reciprocal_lattice import ReciprocalLattice
 
 
+IDEAL_C_TO_A = math.sqrt(8 / 3.) # c/a of close packed spheres
+
 class HexagonalClosePackedReciprocalLattice(ReciprocalLattice):
   """Model of the hexagonal close packed reciprocal lattice."""
 
-  def __init__(self, a, size, center):
+  def __init__(self, a, size, center, c_to_a=IDEAL_C_TO_A):
     self._a = a
+    self._c_to_a = c_to_a
     super().__init__(size, center)
 
   @property
   def primitive_vectors(self):
-    a = Decimal(self._a)
-    half_a = Decimal(self._a / 2.)
-    c = Decimal(8 / 3.).sqrt() * a
+    a = self._backend.number(self._a)
+    half_a = self._backend.number(self._a / 2.)
+    c = self._backend.number(self._c_to_a) * a
+    height = half_a * self._backend.sqrt(self._backend.number(3))
     return (
-        Vector3D(a, 0, 0),
-        Vector3D(half_a, half_a * Decimal(3).sqrt(), 0),
-        Vector3D(0, 0, c)
+        Vector3D(a, 0, 0, self._backend),
+        Vector3D(half_a, height, 0, self._backend),
+        Vector3D(0, 0, c, self._backend)
     )
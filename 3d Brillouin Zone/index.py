@@ -3,106 +3,198 @@
 
 """Start application point."""
 
+import argparse
 import itertools
 import os
 import sys
 
 import matplotlib
 import matplotlib.pyplot as plt
+import numpy as np
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 
+# The geometry cache is shared by both drawers, it is next to their
+# directories.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import array_geometry
+import geometry
+import lattice_symmetry
+import reciprocal_lattice
+import zone_polyhedron
+import zone_shell
+from array_geometry import ArrayGeometryUtils, PlaneArray, PointArray
 from base_centered_reciprocal_lattice import BaseCenteredReciprocalLattice
 from body_centered_reciprocal_lattice import BodyCenteredReciprocalLattice
 from face_centered_reciprocal_lattice import FaceCenteredReciprocalLattice
-from geometry import GeometryUtils, Plane, Point3D, Segment3D, Vector3D
+from geometry import POINT_APROX_DIGITS, Point3D
+from geometry_cache import (MemoryCache, cache_key, default_cache,
+                            source_version)
 from hexagonal_close_packed_reciprocal_lattice import \
     HexagonalClosePackedReciprocalLattice
+from lattice_symmetry import (orbit_representatives, permutations,
+                              point_group)
+from mesh_export import MESH_FORMATS, write_mesh
+from mesh_raster import render_mesh
 from primitive_reciprocal_lattice import PrimitiveReciprocalLattice
+from zone_polyhedron import (first_brillouin_zone, indexed_polyhedron,
+                             relevant_planes)
+from zone_shell import lattice_brillouin_zone
 
 WIDTH = 0.05 # lattice period
-LATTICE_SIZE = 3 # count of atoms in one direction
+LATTICE_SIZE = int(os.environ.get("BRILLOUIN_LATTICE_SIZE",
+                                  "3")) # count of atoms in one direction
 MIN_ZONES_COUNT = 2 # consider minimum N zones
 CENTER = Point3D(0, 0, 0)
+BATCH_SIZE = 1 << 16 # count of pairs which are processed at once
+VERTEX_EPS = 10 ** (1 - POINT_APROX_DIGITS) # vertices of faces are shared
 IMAGE_FILE_NAME = os.environ.get("BRILLOUIN_OUTPUT", "brillouin_zone_3d.png")
+IMAGE_SIZE = tuple(map(int, os.environ.get("BRILLOUIN_IMAGE_SIZE",
+                                           "600x530").split("x"))) # px
+FIGURE_DPI = 100
+ENGINE = os.environ.get("BRILLOUIN_ENGINE", "clip") # "clip" or "planes"
+RENDERER = os.environ.get("BRILLOUIN_RENDERER",
+                          "matplotlib") # "matplotlib" or "raster"
+OUTER_FACE_COLOR = (0.5, 0.5, 1) # faces between the zones N and N + 1
+INNER_FACE_COLOR = (1, 0.6, 0.4) # faces between the zones N - 1 and N
+CACHE = default_cache() # None unless BRILLOUIN_CACHE is set
+MEMORY_CACHE = MemoryCache() # zones of unit volume of this process
 
 def __get_bragg_planes(zone_points):
-  """Return the Bragg planes."""
-  for points in zone_points:
-    middle_points = map(lambda point: point * 0.5, points)
-    for middle_point in middle_points:
-      yield Plane(middle_point, Vector3D(tuple(middle_point)))
+  """Return PlaneArray of the Bragg planes."""
+  points = PointArray.from_points(itertools.chain.from_iterable(zone_points))
+  middle_points = points.coords * 0.5
+  return PlaneArray(middle_points, middle_points)
+
+def __get_pairs(first_count, second_count):
+  """Return generator of index arrays of all pairs in batches."""
+  step = max(1, BATCH_SIZE // max(1, second_count))
+  for start in range(0, first_count, step):
+    first_indices = np.arange(start, min(start + step, first_count))
+    yield (np.repeat(first_indices, second_count),
+           np.tile(np.arange(second_count), len(first_indices)))
 
 def get_intersections(planes):
-  """Return lines that are intersections of the Bragg planes."""
-  first_it = iter(planes)
-  try:
-    while True:
-      first_plane = next(first_it)
-      first_it, second_it = itertools.tee(first_it)
-      for second_plane in  second_it:
-        intersection = GeometryUtils.intersection(first_plane, second_plane)
-        if intersection is not None:
-          yield intersection
-  except StopIteration:
-    pass
-
-def __get_intersection_points(intersection_lines, bragg_planes):
-  """Return all intersections of lines and planes."""
-  for line in intersection_lines:
-    for plane in bragg_planes:
-      intersection = GeometryUtils.intersection(line, plane)
-      if intersection is None:
-        continue
-      yield (intersection, plane)
+  """Return LineArray of intersections of the Bragg planes."""
+  first_indices, second_indices = np.triu_indices(len(planes), 1)
+  lines, mask = ArrayGeometryUtils.plane_plane_intersection(
+      planes[first_indices], planes[second_indices])
+  return lines[mask]
+
+def __get_intersection_points(intersection_lines, bragg_planes,
+                              plane_indices=None):
+  """Return tuple(PointArray, plane indices) of unique intersections
+     of lines and planes (all planes or the planes of plane_indices)."""
+  if plane_indices is None:
+    plane_indices = np.arange(len(bragg_planes))
+  keys = []
+  for line_indices, pair_indices in __get_pairs(len(intersection_lines),
+                                                len(plane_indices)):
+    plane_indices_batch = plane_indices[pair_indices]
+    points, mask = ArrayGeometryUtils.plane_line_intersection(
+        bragg_planes[plane_indices_batch], intersection_lines[line_indices])
+    keys.append(np.column_stack((
+        np.round(points.coords[mask], POINT_APROX_DIGITS) + 0.0,
+        plane_indices_batch[mask])))
+  keys = np.unique(np.concatenate(keys or [np.empty((0, 4))]), axis=0)
+  return (PointArray(keys[:, :3]), keys[:, 3].astype(int))
 
 def __get_zone_points(start_point, intersection_points, bragg_planes):
-  """Return points of area that is limited by the Bragg planes."""
-  zone_points_by_plane = {}
-  for point, point_in_plane in intersection_points:
-    segment = Segment3D(start_point, point)
-    is_intersected = False
-    for plane in bragg_planes:
-      intersection = GeometryUtils.intersection(plane, segment)
-      if (intersection is None or
-          GeometryUtils.points_are_equal(intersection, segment.first_point) or
-          GeometryUtils.points_are_equal(intersection, segment.second_point)):
-        continue
-      is_intersected = True
-      break
-    if not is_intersected:
-      if point_in_plane in zone_points_by_plane:
-        zone_points_by_plane[point_in_plane].add(point)
-      else:
-        zone_points_by_plane[point_in_plane] = set([point])
-  return zone_points_by_plane
-
-def __find_average_center(points, interations=3):
-  """Return average center of all points"""
-  new_points = []
-  for _ in range(interations):
-    first_it = iter(points)
-    try:
-      while True:
-        first_point = next(first_it)
-        first_it, second_it = itertools.tee(first_it)
-        for second_point in second_it:
-          new_points.append(Segment3D(first_point, second_point).center)
-    except StopIteration:
-      points = new_points
-      new_points = []
-  return points[0]
-
-def __sort_vertices(points):
-  """Return vertices that are sorted by average center of all points."""
-  points = list(set(points))
-  if len(points) < 3:
-    return None
-  start_point = __find_average_center(points)
-  start_vector = Vector3D.by_points(start_point, points[0])
-  return sorted(points, key=lambda point:
-                GeometryUtils.angle_between(
-                    start_vector,
-                    Vector3D.by_points(start_point, point)))
+  """Return dict of arrays of shape (K, 3) with points of area that is
+     limited by the Bragg planes by indices of the planes which contain
+     the points."""
+  points, point_planes = intersection_points
+  # Points are rounded, so they are compared up to the rounding.
+  inside, active = ArrayGeometryUtils.half_space_containment(
+      bragg_planes, points, tuple(start_point), 10 ** -POINT_APROX_DIGITS)
+  is_zone_point = np.all(inside, axis=1)
+  is_zone_point &= active[np.arange(len(points)), point_planes]
+  # Intersection points are unique for every plane.
+  zone_points, zone_point_planes = (points.coords[is_zone_point],
+                                    point_planes[is_zone_point])
+  order = np.argsort(zone_point_planes, kind='stable')
+  plane_indices, starts = np.unique(zone_point_planes[order],
+                                    return_index=True)
+  return dict(zip(plane_indices.tolist(),
+                  np.split(zone_points[order], starts[1:])))
+
+def __get_zone_by_planes(lattice, bragg_planes):
+  """Return Polyhedron of the first zone by intersections of the Bragg
+     planes, face_planes index the Bragg planes."""
+  # Planes out of the ball around the zone do not touch it.
+  relevant = relevant_planes(bragg_planes, CENTER)
+  print("{0} of {1} Bragg planes are pruned".format(
+      len(bragg_planes) - len(relevant), len(bragg_planes)))
+  bragg_planes = bragg_planes[relevant]
+  operations = point_group([tuple(map(float, vector)) for vector
+                            in lattice.reciprocal_primitive_vectors])
+  center = np.array(tuple(map(float, CENTER)))
+  table = permutations(bragg_planes.points - center, operations)
+  # Faces are found on one plane of every orbit of the point group.
+  representatives = orbit_representatives(table)
+  print("Point group of {0} operations, {1} of {2} Bragg planes "
+        "are considered".format(len(operations), len(representatives),
+                                len(bragg_planes)))
+  intersection_lines = get_intersections(bragg_planes)
+  print("Intersection lines are calculated")
+
+  intersection_points = __get_intersection_points(
+      intersection_lines, bragg_planes, representatives)
+  print("Intersection points are calculated")
+
+  zone_points = __get_zone_points(CENTER, intersection_points, bragg_planes)
+  print("Zone points are calculated")
+
+  faces = {}
+  for plane_index, vertices in zone_points.items():
+    if len(vertices) < 3:
+      continue
+    # The other faces of the orbit are images of the face.
+    for operation, image_index in zip(operations, table[:, plane_index]):
+      if image_index not in faces:
+        faces[image_index] = (vertices - center) @ operation.T + center
+  face_planes = sorted(faces)
+  return indexed_polyhedron([faces[plane_index] for plane_index in face_planes],
+                            bragg_planes.normal_vectors[face_planes],
+                            relevant[face_planes], VERTEX_EPS)
+
+def __get_zone_by_clipping(bragg_planes):
+  """Return ConvexPolyhedron of the first zone by clipping with the Bragg
+     half-spaces."""
+  zone = first_brillouin_zone(bragg_planes, CENTER)
+  print("Zone polyhedron is calculated")
+  return zone
+
+def get_zone_polyhedron(lattice, zones_count, engine=None,
+                        bragg_planes=None):
+  """Return Polyhedron of the first zone, the indexed mesh of shared
+     vertices and faces whose loops are ordered by the outer normals.
+
+     Keyword arguments:
+       lattice -- reciprocal lattice
+       zones_count -- count of the nearest shells that define Bragg planes
+       engine -- "clip" (half-space clipping) or "planes" (intersections of
+                 the Bragg planes), default is BRILLOUIN_ENGINE
+       bragg_planes -- PlaneArray of the Bragg planes of the zones_count
+                       shells if the caller has them, the shells are not
+                       enumerated again then
+  """
+  engine = engine or ENGINE
+  if engine not in ("clip", "planes"):
+    raise ValueError("Unknown engine: " + engine)
+  if bragg_planes is None:
+    bragg_planes = __get_bragg_planes(itertools.islice(lattice.shells(), 1,
+                                                       zones_count + 1))
+  if engine == "clip":
+    return __get_zone_by_clipping(bragg_planes)
+  return __get_zone_by_planes(lattice, bragg_planes)
+
+def get_zone_faces(lattice, zones_count, engine=None):
+  """Return list of faces (lists of vertex coordinates) of the first zone,
+     the arguments are the ones of get_zone_polyhedron."""
+  zone = get_zone_polyhedron(lattice, zones_count, engine)
+  return [[tuple(vertex) for vertex in zone.vertices[face].tolist()]
+          for face in zone.faces]
 
 def get_reciprocal_lattice_by_number(lattice_number):
   """Return tuple(reciprocal lattice, zones-count) by the lattice number
@@ -150,40 +242,120 @@ def is_interactive_backend():
   return matplotlib.get_backend().lower() not in ("agg", "pdf", "ps", "svg",
                                                   "cairo", "template")
 
-def render(lattice, zones_count):
-  """Construct the first Brillouin zone of the lattice and draw it."""
-  zone_points = list(lattice.points())[1:zones_count+1]
-  print("Crystal is generated.")
+def compute_zone(lattice, zones_count, zone_number=1):
+  """Return dict of arrays of the zone_number-th Brillouin zone:
+     atoms (M, 3) -- lattice points whose Bragg planes are considered,
+     planes (P, 6) -- points and normal vectors of the Bragg planes,
+     vertices (V, 3), faces -- vertex indices of all faces one by one,
+     face_offsets (F + 1,) -- start of every face in faces,
+     face_outer (F,) -- True for faces between the zones N and N + 1.
+  """
+  center = np.array(tuple(map(float, CENTER)))
+  if zone_number == 1:
+    zone_points = list(itertools.islice(lattice.shells(), 1,
+                                        zones_count + 1))
+    print("Crystal is generated.")
+    planes = __get_bragg_planes(zone_points)
+    atoms = PointArray.from_points(
+        itertools.chain.from_iterable(zone_points)).coords
+    # The zone is bounded by the planes of the same shells.
+    zone = get_zone_polyhedron(lattice, zones_count, bragg_planes=planes)
+    vertices = zone.vertices
+    face_indices = np.concatenate(zone.faces)
+    face_offsets = np.cumsum([0] + [len(face) for face in zone.faces])
+    face_outer = np.ones(len(zone.faces), dtype=bool)
+  else:
+    shell = lattice_brillouin_zone(lattice, zone_number)
+    print("Zone {0} is calculated".format(zone_number))
+    # The points whose Bragg planes bound the zone.
+    planes = shell.planes[np.unique(shell.face_planes)]
+    atoms = planes.points * 2 - center
+    vertices = shell.vertices
+    face_indices = np.concatenate(shell.faces)
+    face_offsets = np.cumsum([0] + [len(face) for face in shell.faces])
+    face_outer = shell.face_outer
+  return {"atoms": atoms,
+          "planes": np.hstack((planes.points, planes.normal_vectors)),
+          "vertices": vertices,
+          "faces": face_indices,
+          "face_offsets": face_offsets,
+          "face_outer": face_outer}
+
+def scaled_zone(zone, factor):
+  """Return dict of arrays of compute_zone which is scaled around CENTER."""
+  center = np.array(tuple(map(float, CENTER)))
+  zone = dict(zone)
+  zone["atoms"] = center + (zone["atoms"] - center) * factor
+  zone["vertices"] = center + (zone["vertices"] - center) * factor
+  zone["planes"] = np.hstack((center + (zone["planes"][:, :3] - center) *
+                              factor, zone["planes"][:, 3:] * factor))
+  return zone
 
-  # Draw atoms in the reciprocal space
-  fig = plt.figure(figsize=(6, 5.3))
-  ax = fig.add_subplot(111, projection='3d')
-  ax.scatter(float(CENTER.x), float(CENTER.y), float(CENTER.z), c='b', marker='o')
-  for nearest_points in zone_points:
-    for point in nearest_points:
-      ax.scatter(float(point.x), float(point.y), float(point.z), c='b', marker='o')
+def get_zone(lattice, zones_count, zone_number=1, cache=None):
+  """Return dict of arrays of compute_zone from the cache if it is given
+     (CACHE by default), the lattice is not used on a cache hit.
 
-  bragg_planes = list(__get_bragg_planes(zone_points))
-  intersection_lines = list(get_intersections(bragg_planes))
-  print("Intersection lines are calculated")
+     The reciprocal lattice of the period s*a is the one of the period a
+     scaled by 1/s, so zones are cached for the cell of unit volume and
+     all periods of the same cell shape share an entry. The recent zones
+     are kept in MEMORY_CACHE too, the cache is only asked on its misses.
+  """
+  cache = CACHE if cache is None else cache
+  vectors = np.array([tuple(map(float, vector))
+                      for vector in lattice.primitive_vectors])
+  scale = abs(np.linalg.det(vectors)) ** (1 / 3.)
+  params = dict(lattice=type(lattice).__name__,
+                vectors=np.round(vectors / scale, 12),
+                size=lattice.size, center=list(map(float, CENTER)),
+                zones_count=zones_count, zone_number=zone_number,
+                engine=ENGINE if zone_number == 1 else "shell")
 
-  intersection_points = list(__get_intersection_points(intersection_lines,
-                                                       bragg_planes))
-  print("Intersection points are calculated")
+  def compute():
+    if not cache:
+      return scaled_zone(compute_zone(lattice, zones_count, zone_number),
+                         scale)
+    sources = [__file__] + [module.__file__ for module in (
+        array_geometry, geometry, lattice_symmetry, reciprocal_lattice,
+        zone_polyhedron, zone_shell, sys.modules[type(lattice).__module__])]
+    return cache.get(cache_key(version=source_version(*sources), **params),
+                     lambda: scaled_zone(compute_zone(lattice, zones_count,
+                                                      zone_number), scale))
 
-  zone_points = __get_zone_points(CENTER, intersection_points, bragg_planes)
-  print("Zone points are calculated")
+  zone = MEMORY_CACHE.get(cache_key(**params), compute)
+  return scaled_zone(zone, 1 / scale)
 
-  # Draw polygons of the first zone
-  for points in zone_points.values():
-    points = __sort_vertices(points)
-    if points is None:
-      continue
-    verts = [(float(point.x), float(point.y), float(point.z)) for point in points]
-    col = Poly3DCollection([verts], linewidths=1, alpha=0.8)
-    col.set_facecolor([0.5, 0.5, 1])
-    col.set_edgecolor('k')
-    ax.add_collection3d(col)
+def face_colors(zone):
+  """Return array (F, 3) of RGB colors of the faces of the zone."""
+  return np.where(zone["face_outer"][:, np.newaxis], OUTER_FACE_COLOR,
+                  INNER_FACE_COLOR)
+
+def render(lattice, zones_count, zone_number=1):
+  """Construct the zone_number-th Brillouin zone of the lattice and draw it."""
+  zone = get_zone(lattice, zones_count, zone_number)
+  center = np.array(tuple(map(float, CENTER)))
+  atoms = np.vstack((center, zone["atoms"]))
+  if RENDERER == "raster":
+    image = render_mesh(zone["vertices"], zone["faces"], zone["face_offsets"],
+                        face_colors(zone), IMAGE_SIZE, atoms)
+    image.save(IMAGE_FILE_NAME)
+    print("Figure is saved to " + IMAGE_FILE_NAME)
+    return
+  faces = np.split(zone["faces"], zone["face_offsets"][1:-1])
+
+  # Draw atoms in the reciprocal space
+  fig = plt.figure(figsize=(IMAGE_SIZE[0] / FIGURE_DPI,
+                            IMAGE_SIZE[1] / FIGURE_DPI), dpi=FIGURE_DPI)
+  ax = fig.add_subplot(111, projection='3d')
+  ax.scatter(atoms[:, 0], atoms[:, 1], atoms[:, 2], c='b', marker='o')
+
+  # Draw all faces of the zone by one collection
+  first_zone = zone_number == 1
+  col = Poly3DCollection([zone["vertices"][face] for face in faces],
+                         linewidths=1 if first_zone else 0.5,
+                         alpha=0.8 if first_zone else 0.5)
+  col.set_facecolor(face_colors(zone))
+  col.set_edgecolor('k')
+  ax.add_collection3d(col)
 
   # Show plot
   str_dimension = '{0}*a'.format(1.0 / WIDTH)
@@ -197,22 +369,58 @@ def render(lattice, zones_count):
     print("Figure is saved to " + IMAGE_FILE_NAME)
   plt.close(fig)
 
+def export(lattice, zones_count, zone_number, file_names, colored=False):
+  """Construct the zone_number-th Brillouin zone of the lattice and write
+     it to the mesh files, faces are colored as in the figure if colored."""
+  zone = get_zone(lattice, zones_count, zone_number)
+  colors = face_colors(zone) if colored else None
+  for file_name in file_names:
+    write_mesh(file_name, zone["vertices"], zone["faces"],
+               zone["face_offsets"], colors)
+    print("Mesh is saved to " + file_name)
+
 def main(argv=None):
   """Run the drawer: non-interactive if a lattice number is given as an
      argument, otherwise prompt for lattice numbers in a loop."""
-  argv = sys.argv[1:] if argv is None else argv
-  if argv:
-    result = get_reciprocal_lattice_by_number(argv[0])
+  parser = argparse.ArgumentParser(
+      description="Draw a Brillouin zone of a reciprocal lattice.")
+  parser.add_argument("lattice", nargs="?",
+                      help="lattice number 1..5, prompt if it is omitted")
+  parser.add_argument("--zone", type=int, default=1,
+                      help="number of the zone to draw (default 1)")
+  parser.add_argument("--export", action="append", default=[],
+                      metavar="FILE",
+                      help="write the zone to the mesh file ({0}) instead "
+                           "of the figure, may be repeated"
+                      .format(", ".join(MESH_FORMATS)))
+  parser.add_argument("--colored", action="store_true",
+                      help="write the colors of the faces to the mesh files")
+  args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+  if args.zone < 1:
+    parser.error("zone number must be positive")
+  for file_name in args.export:
+    if os.path.splitext(file_name)[1].lower() not in MESH_FORMATS:
+      parser.error("unknown mesh format: " + file_name)
+
+  def draw(lattice, zones_count):
+    """Export or render the zone of the lattice."""
+    if args.export:
+      export(lattice, zones_count, args.zone, args.export, args.colored)
+    else:
+      render(lattice, zones_count, args.zone)
+
+  if args.lattice is not None:
+    result = get_reciprocal_lattice_by_number(args.lattice)
     if result is None or result[0] is None:
-      print("Usage: index.py [lattice-number 1..5]")
+      print("Usage: index.py [lattice-number 1..5] [--zone N] [--export FILE]")
       return 2
-    render(*result)
+    draw(*result)
     return 0
   while True:
     lattice, zones_count = __get_reciprocal_lattice()
     if lattice is None:
       return 0
-    render(lattice, zones_count)
+    draw(lattice, zones_count)
 
 if __name__ == '__main__':
   sys.exit(main())
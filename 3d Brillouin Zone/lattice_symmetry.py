@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Point groups of lattices and orbits of vectors under them.
+
+An orthogonal map of a lattice onto itself sends the vectors b1, b2, b3 of
+a reduced basis to lattice vectors of the same lengths and the same angles,
+so the point group is searched among such triples. The point group of a
+lattice and of its reciprocal lattice is the same.
+"""
+
+import itertools
+
+import numpy as np
+
+from reciprocal_lattice import reduced_basis
+
+SYMMETRY_EPS = 1e-6 # Relative approximation of lengths and coordinates
+
+def point_group(basis, eps=SYMMETRY_EPS):
+  """Return array of shape (K, 3, 3) with orthogonal matrices which map
+     the lattice of the rows of the basis onto itself (x -> R @ x),
+     the identity is the first one.
+
+     Raises ValueError if the rows of the basis are linearly dependent.
+  """
+  basis = np.asarray(basis, dtype=np.float64).reshape(3, 3)
+  if abs(np.linalg.det(basis)) <= eps * np.max(np.abs(basis)) ** 3:
+    raise ValueError("Basis vectors are linearly dependent")
+  reduced = reduced_basis(basis)
+  lengths = np.linalg.norm(reduced, axis=1)
+  bounds = np.ceil(lengths.max() *
+                   np.linalg.norm(np.linalg.inv(reduced), axis=0)).astype(int)
+  steps = np.stack(np.meshgrid(*(np.arange(-bound, bound + 1)
+                                 for bound in bounds), indexing='ij'),
+                   axis=-1).reshape(-1, 3)
+  vectors = steps @ reduced
+  norms = np.linalg.norm(vectors, axis=1)
+  tolerance = eps * lengths.max()
+  candidates = [vectors[np.abs(norms - length) <= tolerance]
+                for length in lengths]
+  gram = reduced @ reduced.T
+  inverse = np.linalg.inv(reduced.T)
+  operations = []
+  for first, second in itertools.product(candidates[0], candidates[1]):
+    if abs(first @ second - gram[0, 1]) > tolerance * lengths.max():
+      continue
+    for third in candidates[2]:
+      if (abs(first @ third - gram[0, 2]) > tolerance * lengths.max() or
+          abs(second @ third - gram[1, 2]) > tolerance * lengths.max()):
+        continue
+      operations.append(np.column_stack((first, second, third)) @ inverse)
+  operations.sort(key=lambda operation: np.abs(operation - np.eye(3)).sum())
+  return np.array(operations)
+
+def permutations(vectors, operations, eps=SYMMETRY_EPS):
+  """Return integer array of shape (K, N), the k-th operation maps
+     the n-th vector to the vector of the index [k, n].
+
+     Raises ValueError if the set of vectors is not symmetric.
+  """
+  vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, 3)
+  tolerance = eps * max(np.max(np.abs(vectors), initial=0), 1)
+  images = np.einsum('kij,nj->kni', operations, vectors)
+  table = np.empty(images.shape[:2], dtype=int)
+  for k, image in enumerate(images):
+    distances = np.linalg.norm(image[:, np.newaxis] - vectors, axis=2)
+    table[k] = np.argmin(distances, axis=1)
+    if np.any(distances[np.arange(len(vectors)), table[k]] > tolerance):
+      raise ValueError("Vectors are not symmetric under the point group")
+  return table
+
+def orbit_representatives(table):
+  """Return indices of the first vectors of every orbit
+     by the table of permutations."""
+  return np.flatnonzero(np.min(table, axis=0) == np.arange(table.shape[1]))
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Export of zone polyhedra to mesh files: binary STL and PLY, OBJ, glTF.
+
+Meshes are given by arrays: vertices (V, 3), faces -- vertex indices of
+all faces one by one, face_offsets (F + 1,) -- start of every face in faces
+(the arrays of compute_zone). Files are written from float32/uint32 buffers
+of the whole mesh. Faces are convex and ordered counterclockwise when they
+are seen from the outside, so they are triangulated by fans.
+"""
+
+import base64
+import json
+import os
+
+import numpy as np
+
+MESH_FORMATS = (".stl", ".ply", ".obj", ".gltf", ".glb")
+STL_HEADER = b"Brillouin zone"
+
+def triangles(faces, face_offsets):
+  """Return tuple(uint32 array (T, 3) of vertex indices of triangles,
+     indices of the faces of the triangles) of the fans of the faces."""
+  faces = np.asarray(faces, dtype=np.uint32)
+  face_offsets = np.asarray(face_offsets, dtype=np.int64)
+  counts = np.maximum(np.diff(face_offsets) - 2, 0)
+  triangle_faces = np.repeat(np.arange(len(counts)), counts)
+  starts = np.repeat(face_offsets[:-1], counts)
+  steps = np.arange(len(starts)) - np.repeat(np.cumsum(counts) - counts,
+                                             counts)
+  return (np.column_stack((faces[starts], faces[starts + steps + 1],
+                           faces[starts + steps + 2])), triangle_faces)
+
+def _byte_colors(colors):
+  """Return uint8 array (N, 3) of RGB colors with components 0..1."""
+  return np.round(np.clip(np.asarray(colors, dtype=np.float64).reshape(-1, 3),
+                          0, 1) * 255).astype(np.uint8)
+
+def write_stl(file_name, vertices, faces, face_offsets, face_colors=None):
+  """Write the mesh to the binary STL file, face colors are stored in
+     the attributes of triangles (15-bit RGB with the valid bit 15)."""
+  vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+  indices, triangle_faces = triangles(faces, face_offsets)
+  corners = vertices[indices]
+  normals = np.cross(corners[:, 1] - corners[:, 0],
+                     corners[:, 2] - corners[:, 0])
+  modules = np.linalg.norm(normals, axis=1)
+  modules[modules == 0] = 1
+  records = np.zeros(len(indices), dtype=np.dtype([
+      ('normal', '<f4', 3), ('vertices', '<f4', (3, 3)),
+      ('attribute', '<u2')]))
+  records['normal'] = normals / modules[:, np.newaxis]
+  records['vertices'] = corners
+  if face_colors is not None:
+    colors = (_byte_colors(face_colors)[triangle_faces] >> 3).astype(np.uint16)
+    records['attribute'] = (0x8000 | colors[:, 0] << 10 | colors[:, 1] << 5 |
+                            colors[:, 2])
+  with open(file_name, "wb") as stl_file:
+    stl_file.write(STL_HEADER.ljust(80, b" "))
+    stl_file.write(np.uint32(len(records)).tobytes())
+    records.tofile(stl_file)
+
+def write_ply(file_name, vertices, faces, face_offsets, face_colors=None):
+  """Write the mesh to the binary little-endian PLY file with polygonal
+     faces and optional RGB face colors."""
+  vertices = np.asarray(vertices, dtype='<f4').reshape(-1, 3)
+  faces = np.asarray(faces, dtype='<u4')
+  face_offsets = np.asarray(face_offsets, dtype=np.int64)
+  sizes = np.diff(face_offsets)
+  # Every face record is the count, the indices and the color.
+  color_size = 0 if face_colors is None else 3
+  record_sizes = 1 + 4 * sizes + color_size
+  record_starts = np.cumsum(record_sizes) - record_sizes
+  data = np.zeros(int(record_sizes.sum()), dtype=np.uint8)
+  data[record_starts] = sizes
+  index_starts = (np.repeat(record_starts + 1, sizes) + 4 *
+                  (np.arange(len(faces)) - np.repeat(face_offsets[:-1],
+                                                     sizes)))
+  data[index_starts[:, np.newaxis] + np.arange(4)] = \
+      faces.view(np.uint8).reshape(-1, 4)
+  header = ["ply", "format binary_little_endian 1.0",
+            "comment Brillouin zone",
+            "element vertex {0}".format(len(vertices)),
+            "property float x", "property float y", "property float z",
+            "element face {0}".format(len(sizes)),
+            "property list uchar uint vertex_indices"]
+  if face_colors is not None:
+    colors = _byte_colors(face_colors)
+    data[(record_starts + record_sizes - 3)[:, np.newaxis] +
+         np.arange(3)] = colors
+    header += ["property uchar red", "property uchar green",
+               "property uchar blue"]
+  header.append("end_header\n")
+  with open(file_name, "wb") as ply_file:
+    ply_file.write("\n".join(header).encode("ascii"))
+    vertices.tofile(ply_file)
+    data.tofile(ply_file)
+
+def write_obj(file_name, vertices, faces, face_offsets, face_colors=None):
+  """Write the mesh to the OBJ file, face colors are written as materials
+     of the MTL file with the same name."""
+  vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+  faces = np.asarray(faces, dtype=np.int64)
+  face_offsets = np.asarray(face_offsets, dtype=np.int64)
+  sizes = np.diff(face_offsets)
+  materials = np.zeros(len(sizes), dtype=int)
+  colors = None
+  if face_colors is not None:
+    colors, materials = np.unique(_byte_colors(face_colors), axis=0,
+                                  return_inverse=True)
+    materials = materials.reshape(-1)
+  material_file_name = os.path.splitext(file_name)[0] + ".mtl"
+  with open(file_name, "w") as obj_file:
+    obj_file.write("# Brillouin zone\n")
+    if colors is not None:
+      obj_file.write("mtllib {0}\n".format(
+          os.path.basename(material_file_name)))
+    np.savetxt(obj_file, vertices, fmt="v %.9g %.9g %.9g")
+    # Faces of the same material and size are written at once.
+    for material, size in sorted(set(zip(materials.tolist(),
+                                         sizes.tolist()))):
+      if colors is not None:
+        obj_file.write("usemtl zone_color_{0}\n".format(material))
+      starts = face_offsets[:-1][(materials == material) & (sizes == size)]
+      np.savetxt(obj_file, faces[starts[:, np.newaxis] + np.arange(size)] + 1,
+                 fmt="f" + " %d" * size)
+  if colors is not None:
+    with open(material_file_name, "w") as material_file:
+      for material, color in enumerate(colors / 255.):
+        material_file.write("newmtl zone_color_{0}\n"
+                            "Kd {1:.4f} {2:.4f} {3:.4f}\n".format(material,
+                                                                  *color))
+
+def _gltf(vertices, faces, face_offsets, face_colors):
+  """Return tuple(glTF dict, binary buffer) of the mesh, faces of every
+     color are a primitive with its own material."""
+  vertices = np.asarray(vertices, dtype='<f4').reshape(-1, 3)
+  indices, triangle_faces = triangles(faces, face_offsets)
+  if face_colors is None:
+    colors = np.array([[1.0, 1.0, 1.0]])
+    materials = np.zeros(len(indices), dtype=int)
+  else:
+    colors, face_materials = np.unique(_byte_colors(face_colors), axis=0,
+                                       return_inverse=True)
+    colors = colors / 255.
+    materials = face_materials.reshape(-1)[triangle_faces]
+  order = np.argsort(materials, kind='stable')
+  indices = indices[order].astype('<u4')
+  counts = np.bincount(materials, minlength=len(colors))
+  binary = vertices.tobytes() + indices.tobytes()
+  accessors = [{"bufferView": 0, "componentType": 5126,
+                "count": len(vertices), "type": "VEC3",
+                "min": vertices.min(axis=0).tolist() if len(vertices) else
+                       [0, 0, 0],
+                "max": vertices.max(axis=0).tolist() if len(vertices) else
+                       [0, 0, 0]}]
+  primitives = []
+  offset = 0
+  for material, count in enumerate(counts.tolist()):
+    if not count:
+      continue
+    accessors.append({"bufferView": 1, "byteOffset": offset * 12,
+                      "componentType": 5125, "count": count * 3,
+                      "type": "SCALAR"})
+    primitives.append({"attributes": {"POSITION": 0},
+                       "indices": len(accessors) - 1, "material": material})
+    offset += count
+  gltf = {
+      "asset": {"version": "2.0", "generator": "Brillouin zone"},
+      "scene": 0, "scenes": [{"nodes": [0]}], "nodes": [{"mesh": 0}],
+      "meshes": [{"name": "Brillouin zone", "primitives": primitives}],
+      "materials": [{"pbrMetallicRoughness": {
+          "baseColorFactor": color.tolist() + [1.0],
+          "metallicFactor": 0.0}, "doubleSided": True}
+                    for color in colors],
+      "accessors": accessors,
+      "bufferViews": [{"buffer": 0, "byteOffset": 0,
+                       "byteLength": vertices.nbytes, "target": 34962},
+                      {"buffer": 0, "byteOffset": vertices.nbytes,
+                       "byteLength": indices.nbytes, "target": 34963}],
+      "buffers": [{"byteLength": len(binary)}]}
+  return (gltf, binary)
+
+def write_gltf(file_name, vertices, faces, face_offsets, face_colors=None):
+  """Write the mesh to the glTF 2.0 file: binary .glb or .gltf with
+     the embedded buffer."""
+  gltf, binary = _gltf(vertices, faces, face_offsets, face_colors)
+  if file_name.lower().endswith(".glb"):
+    content = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    content += b" " * (-len(content) % 4)
+    binary += b"\0" * (-len(binary) % 4)
+    with open(file_name, "wb") as gltf_file:
+      gltf_file.write(np.array([0x46546C67, 2, 28 + len(content) + len(binary),
+                                len(content), 0x4E4F534A],
+                               dtype='<u4').tobytes())
+      gltf_file.write(content)
+      gltf_file.write(np.array([len(binary), 0x004E4942],
+                               dtype='<u4').tobytes())
+      gltf_file.write(binary)
+    return
+  gltf["buffers"][0]["uri"] = ("data:application/octet-stream;base64," +
+                               base64.b64encode(binary).decode("ascii"))
+  with open(file_name, "w") as gltf_file:
+    json.dump(gltf, gltf_file)
+
+def write_mesh(file_name, vertices, faces, face_offsets, face_colors=None):
+  """Write the mesh to the file whose format is defined by the extension
+     (.stl, .ply, .obj, .gltf or .glb).
+
+     Keyword arguments:
+       file_name -- name of the file
+       vertices -- array of shape (V, 3)
+       faces -- vertex indices of all faces one by one
+       face_offsets -- array (F + 1,) with the start of every face in faces
+       face_colors -- array (F, 3) of RGB colors 0..1 or None
+  """
+  extension = os.path.splitext(file_name)[1].lower()
+  writers = {".stl": write_stl, ".ply": write_ply, ".obj": write_obj,
+             ".gltf": write_gltf, ".glb": write_gltf}
+  if extension not in writers:
+    raise ValueError("Unknown mesh format: " + file_name)
+  writers[extension](file_name, vertices, faces, face_offsets, face_colors)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Software rasterizer of zone meshes to Pillow images without matplotlib.
+
+Meshes are the arrays of compute_zone: vertices (V, 3), faces -- vertex
+indices of all faces one by one, face_offsets (F + 1,). Faces are split into
+fans of triangles which are filled with the flat shading by a z-buffer, then
+the edges of the faces and the points are drawn over them if they are not
+hidden. The view is orthographic, the angles are the ones of matplotlib.
+"""
+
+import numpy as np
+from PIL import Image
+
+from mesh_export import triangles
+
+ELEVATION = 30 # degrees, the default view of matplotlib
+AZIMUTH = -60 # degrees
+MARGIN = 0.08 # part of the image size around the mesh
+LIGHT = (0.3, -0.4, 1) # direction to the light in the view coordinates
+AMBIENT = 0.45 # part of the color in the shadow
+EDGE_COLOR = (0, 0, 0)
+POINT_COLOR = (0, 0, 255)
+POINT_RADIUS = 2 # px
+DEPTH_BIAS = 1e-3 # part of the depth of the mesh, edges on faces are visible
+
+def view_axes(elevation=ELEVATION, azimuth=AZIMUTH):
+  """Return array (3, 3) of the rows: right, up and the direction to
+     the viewer."""
+  elevation, azimuth = np.radians(elevation), np.radians(azimuth)
+  eye = np.array((np.cos(elevation) * np.cos(azimuth),
+                  np.cos(elevation) * np.sin(azimuth), np.sin(elevation)))
+  right = np.array((-np.sin(azimuth), np.cos(azimuth), 0.0))
+  return np.array((right, np.cross(eye, right), eye))
+
+def _draw_triangles(image, depth, corners, colors):
+  """Fill the triangles (T, 3, 3) of pixel coordinates x, y and depth
+     with the colors (T, 3) where they are nearer than the depth buffer."""
+  height, width = depth.shape
+  corners = np.asarray(corners, dtype=np.float64).reshape(-1, 3, 3)
+  x, y, z = corners.transpose(2, 0, 1)
+  # The weight of a corner is the part of the area of the triangle of
+  # the pixel and the next two corners.
+  x1, y1 = np.roll(x, -1, axis=1), np.roll(y, -1, axis=1)
+  x2, y2 = np.roll(x, -2, axis=1), np.roll(y, -2, axis=1)
+  areas = (x1[:, 0] - x[:, 0]) * (y2[:, 0] - y[:, 0]) - \
+          (x2[:, 0] - x[:, 0]) * (y1[:, 0] - y[:, 0])
+  boxes = np.column_stack((
+      np.maximum(np.floor(x.min(axis=1)), 0),
+      np.maximum(np.floor(y.min(axis=1)), 0),
+      np.minimum(np.ceil(x.max(axis=1)), width - 1),
+      np.minimum(np.ceil(y.max(axis=1)), height - 1))).astype(np.int64)
+  drawn = np.flatnonzero((np.abs(areas) >= 1e-12) &
+                         (boxes[:, 0] <= boxes[:, 2]) &
+                         (boxes[:, 1] <= boxes[:, 3]))
+  # Barycentric coordinates are affine functions c + a x + b y of the
+  # pixels, so are the depths; they are (T, 4) arrays of the coefficients.
+  areas[np.abs(areas) < 1e-12] = 1
+  constant, along_x, along_y = ((x1 * y2 - x2 * y1, y1 - y2, x2 - x1) /
+                                areas[:, np.newaxis])
+  constant, along_x, along_y = (
+      np.column_stack((weights, (weights * z).sum(axis=1)))
+      for weights in (constant, along_x, along_y))
+  bounds = boxes.tolist()
+  for index in drawn.tolist():
+    left, top, right, bottom = bounds[index]
+    # The coefficients at the centers of the columns and the rows.
+    row = constant[index, :, np.newaxis] + along_x[index, :, np.newaxis] * \
+          (np.arange(left, right + 1) + 0.5)
+    column = along_y[index, :, np.newaxis] * (np.arange(top, bottom + 1) + 0.5)
+    values = column[:, :, np.newaxis] + row[:, np.newaxis]
+    region = depth[top:bottom + 1, left:right + 1]
+    mask = ((values[0] >= 0) & (values[1] >= 0) & (values[2] >= 0) &
+            (values[3] > region))
+    region[mask] = values[3][mask]
+    image[top:bottom + 1, left:right + 1][mask] = colors[index]
+
+def _draw_samples(image, depth, samples, color, bias):
+  """Draw the samples (N, 3) of pixel coordinates x, y and depth which
+     are not behind the depth buffer."""
+  height, width = depth.shape
+  xs = np.floor(samples[:, 0]).astype(int)
+  ys = np.floor(samples[:, 1]).astype(int)
+  inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+  xs, ys, zs = xs[inside], ys[inside], samples[inside, 2]
+  visible = zs >= depth[ys, xs] - bias
+  image[ys[visible], xs[visible]] = color
+
+def render_mesh(vertices, faces, face_offsets, face_colors=None,
+                image_size=(600, 530), points=None, elevation=ELEVATION,
+                azimuth=AZIMUTH, background=(255, 255, 255), supersampling=1):
+  """Return RGB Pillow image of the mesh.
+
+     Keyword arguments:
+       vertices, faces, face_offsets -- arrays of the mesh
+       face_colors -- array (F, 3) of RGB colors 0..1 (default light blue)
+       image_size -- tuple(width, height) in pixels
+       points -- array (N, 3) of points (atoms) which are drawn as dots
+       elevation, azimuth -- the view angles in degrees
+       background -- RGB color 0..255 of the background
+       supersampling -- the mesh is drawn k times larger and reduced
+  """
+  vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+  faces = np.asarray(faces, dtype=np.int64)
+  face_offsets = np.asarray(face_offsets, dtype=np.int64)
+  points = (np.empty((0, 3)) if points is None else
+            np.asarray(points, dtype=np.float64).reshape(-1, 3))
+  width, height = (size * supersampling for size in image_size)
+  axes = view_axes(elevation, azimuth)
+  # Screen coordinates: x to the right, y down and depth to the viewer.
+  view = np.vstack((vertices, points)) @ axes.T
+  low, high = view.min(axis=0), view.max(axis=0)
+  scale = (1 - 2 * MARGIN) * min(width / max(high[0] - low[0], 1e-12),
+                                 height / max(high[1] - low[1], 1e-12))
+  middle = (low + high) / 2
+  screen = np.column_stack((width / 2 + (view[:, 0] - middle[0]) * scale,
+                            height / 2 - (view[:, 1] - middle[1]) * scale,
+                            (view[:, 2] - middle[2]) * scale))
+  image = np.empty((height, width, 3), dtype=np.uint8)
+  image[:] = background
+  depth = np.full((height, width), -np.inf)
+
+  # Faces are shaded by the angle between their normals and the light.
+  indices, triangle_faces = triangles(faces, face_offsets)
+  corners = screen[indices.astype(np.int64)]
+  normals = np.cross(view[indices[:, 1]] - view[indices[:, 0]],
+                     view[indices[:, 2]] - view[indices[:, 0]])
+  modules = np.linalg.norm(normals, axis=1)
+  modules[modules == 0] = 1
+  light = np.asarray(LIGHT, dtype=np.float64) / np.linalg.norm(LIGHT)
+  shades = AMBIENT + (1 - AMBIENT) * np.abs(normals @ light) / modules
+  if face_colors is None:
+    face_colors = np.tile((0.5, 0.5, 1), (len(face_offsets) - 1, 1))
+  colors = np.asarray(face_colors, dtype=np.float64).reshape(-1, 3)
+  colors = np.round(255 * np.clip(colors[triangle_faces] *
+                                  shades[:, np.newaxis], 0, 1))
+  _draw_triangles(image, depth, corners, colors.astype(np.uint8))
+
+  bias = DEPTH_BIAS * max(high[2] - low[2], 1e-12) * scale
+  # Edges of the faces are sampled at every pixel.
+  following = np.arange(len(faces)) + 1
+  following[face_offsets[1:] - 1] = face_offsets[:-1]
+  edges = np.unique(np.sort(np.column_stack((faces, faces[following])),
+                            axis=1), axis=0)
+  starts, ends = screen[edges[:, 0]], screen[edges[:, 1]]
+  counts = np.ceil(np.max(np.abs(ends[:, :2] - starts[:, :2]),
+                          axis=1)).astype(int) + 1
+  steps = (np.arange(counts.sum()) -
+           np.repeat(np.cumsum(counts) - counts, counts))
+  t = (steps / np.maximum(np.repeat(counts, counts) - 1, 1))[:, np.newaxis]
+  samples = (np.repeat(starts, counts, axis=0) * (1 - t) +
+             np.repeat(ends, counts, axis=0) * t)
+  _draw_samples(image, depth, samples, EDGE_COLOR, bias)
+
+  if len(points):
+    radius = POINT_RADIUS * supersampling
+    offsets = np.array([(x, y, 0) for x in range(-radius, radius + 1)
+                        for y in range(-radius, radius + 1)
+                        if x * x + y * y <= radius * radius])
+    dots = (screen[len(vertices):, np.newaxis] + offsets).reshape(-1, 3)
+    _draw_samples(image, depth, dots, POINT_COLOR, bias)
+
+  result = Image.fromarray(image)
+  if supersampling > 1:
+    result = result.resize(image_size, Image.BOX)
+  return result
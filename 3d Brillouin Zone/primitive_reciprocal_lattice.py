@@ -18,7 +18,7 @@ class PrimitiveReciprocalLattice(ReciprocalLattice):
   def primitive_vectors(self):
     half_a = self._a / 2.0
     return (
-        Vector3D(half_a, 0, 0),
-        Vector3D(0, half_a, 0),
-        Vector3D(0, 0, half_a)
+        Vector3D(half_a, 0, 0, self._backend),
+        Vector3D(0, half_a, 0, self._backend),
+        Vector3D(0, 0, half_a, self._backend)
     )
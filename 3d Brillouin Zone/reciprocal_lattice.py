@@ -4,36 +4,212 @@
 """Reciprocal lattice."""
 
 import abc
+import itertools
 import math
-from decimal import Decimal
+from fractions import Fraction
 
-from geometry import GeometryUtils
+import numpy as np
 
-DISTANCE_EPS = 0.01 # Approximation in the distance between atoms
+from array_geometry import PlaneArray, PointArray
+from geometry import GeometryUtils, Point3D, current_backend
+
+SHELL_RTOL = 1e-9 # Relative approximation of squared distances in a shell
+METRIC_DENOMINATOR = 1 << 12 # the largest denominator of a rational metric
+RADIUS_GROWTH = 1.5 # the ball of enumerated shells grows by this factor
+LLL_DELTA = 0.75 # Lovasz condition factor of the basis reduction
+
+def _gram_schmidt(basis):
+  """Return orthogonal vectors of the Gram-Schmidt process (not normalized)."""
+  orthogonal = np.array(basis, dtype=np.float64)
+  for i in range(len(orthogonal)):
+    for j in range(i):
+      orthogonal[i] -= (basis[i] @ orthogonal[j] /
+                        (orthogonal[j] @ orthogonal[j]) * orthogonal[j])
+  return orthogonal
+
+def reduced_basis(basis):
+  """Return LLL-reduced rows of the basis, they span the same lattice."""
+  basis = np.array(basis, dtype=np.float64)
+  k = 1
+  while k < len(basis):
+    for j in range(k - 1, -1, -1):
+      orthogonal = _gram_schmidt(basis)
+      mu = basis[k] @ orthogonal[j] / (orthogonal[j] @ orthogonal[j])
+      if abs(mu) > 0.5:
+        basis[k] -= round(mu) * basis[j]
+    orthogonal = _gram_schmidt(basis)
+    mu = basis[k] @ orthogonal[k - 1] / (orthogonal[k - 1] @ orthogonal[k - 1])
+    if (orthogonal[k] @ orthogonal[k] >=
+        (LLL_DELTA - mu ** 2) * (orthogonal[k - 1] @ orthogonal[k - 1])):
+      k += 1
+    else:
+      basis[[k - 1, k]] = basis[[k, k - 1]]
+      k = max(k - 1, 1)
+  return basis
+
+def commensurate_metric(metric):
+  """Return tuple(matrix, scale), metric = scale * matrix.
+
+     The matrix is integer if the entries of the metric tensor are rational
+     multiples of each other (cubic and rational cells), so squared lengths
+     n^T*G*n of integer vectors n are exact; otherwise it is the float
+     metric tensor with the scale 1.
+  """
+  metric = np.asarray(metric, dtype=np.float64)
+  unit = np.max(np.abs(metric))
+  fractions = [Fraction(value).limit_denominator(METRIC_DENOMINATOR)
+               for value in (metric / unit).flat]
+  if any(abs(float(fraction) - value) > SHELL_RTOL
+         for fraction, value in zip(fractions, (metric / unit).flat)):
+    return (metric, 1.0)
+  denominator = math.lcm(*(fraction.denominator for fraction in fractions))
+  matrix = np.array([fraction.numerator * (denominator // fraction.denominator)
+                     for fraction in fractions],
+                    dtype=np.int64).reshape(metric.shape)
+  return (matrix, unit / denominator)
+
+def shell_starts(keys, tolerance):
+  """Return indices of the sorted keys where shells start, keys of a shell
+     differ less than the tolerance."""
+  if not len(keys):
+    return np.empty(0, dtype=int)
+  return np.flatnonzero(np.diff(keys, prepend=keys[0] - 2 * tolerance - 1) >
+                        tolerance)
+
+def _key_tolerance(keys):
+  """Return tolerance of exact integer (0) or float keys."""
+  if np.issubdtype(keys.dtype, np.integer):
+    return 0
+  return SHELL_RTOL * np.max(np.abs(keys), initial=0)
 
 class ReciprocalLattice(object):
   """Model of reciprocal lattice."""
 
   def __init__(self, size, center):
     self._center = center
+    # Vectors and points are created with the backend of the constructor.
+    self._backend = current_backend()
+    self.__calculate(size)
+
+  def resize(self, size):
+    """Enumerate the points of the lattice again with the new size."""
     self.__calculate(size)
 
   def __calculate(self, size):
-    points = set()
-    new_points = [(self._center, 0)]
-    while new_points:
-      point, i = new_points.pop()
-      if i > size:
-        continue
-      points.add(point)
-      for vec in self.reciprocal_primitive_vectors:
-        new_points.append((point + vec, i + 1))
-        new_points.append((point - vec, i + 1))
-    self._points = list(points)
+    """Enumerate all points n1*b1+n2*b2+n3*b3 with |n1|+|n2|+|n3| <= size,
+       i.e. the points that are reachable in at most size steps along
+       the reciprocal primitive vectors."""
+    basis = np.array([tuple(map(float, vector))
+                      for vector in self.reciprocal_primitive_vectors])
+    steps = np.arange(-size - 1, size + 2)
+    indices = np.stack(np.meshgrid(steps, steps, steps, indexing='ij'),
+                       axis=-1).reshape(-1, 3)
+    steps_count = np.sum(np.abs(indices), axis=1)
+    # All points that are nearer than the radius are enumerated.
+    self._radius = np.min(np.linalg.norm(
+        indices[steps_count == size + 1] @ basis, axis=1))
+    self._size = size
+    self._basis = basis
+    self._indices = indices[steps_count <= size]
+    self._coords = (np.array(tuple(map(float, self._center))) +
+                    self._indices @ basis)
+    self._points = [Point3D(coords, backend=self._backend)
+                    for coords in self._coords.tolist()]
 
   def points(self):
-    """Return generator of nearest points out the center in the crystal."""
-    return ReciprocalLattice.nearly_points(self._points, self._center)
+    """Return generator of nearest points out the center in the crystal.
+
+       Shells are grouped by the squared lengths n^T*G*n of the integer
+       vectors n with the metric tensor G, the farthest shell is not
+       yielded because it may be incomplete.
+    """
+    matrix, _ = commensurate_metric(self.metric_tensor)
+    keys = np.einsum('ni,ij,nj->n', self._indices, matrix, self._indices)
+    order = np.argsort(keys, kind='stable')
+    starts = shell_starts(keys[order], _key_tolerance(keys))
+    for start, end in zip(starts[:-1], starts[1:]):
+      yield {self._points[index] for index in order[start:end].tolist()}
+
+  def shells(self):
+    """Return generator of sets of points with the same distance to the
+       center in increasing order, the first set is the center.
+
+       Points are enumerated in a growing ball: a lattice vector n*B
+       in the ball of radius R has |n_i| <= R * |column i of B^-1|,
+       the bound is tight for the reduced basis. A shell is yielded only
+       when the ball contains it completely.
+    """
+    basis = reduced_basis([tuple(map(float, vector))
+                            for vector in self.reciprocal_primitive_vectors])
+    matrix, scale = commensurate_metric(basis @ basis.T)
+    inverse_norms = np.linalg.norm(np.linalg.inv(basis), axis=0)
+    center = np.array(tuple(map(float, self._center)))
+    radius = np.min(np.linalg.norm(basis, axis=1))
+    next_key = 0
+    while True:
+      radius *= RADIUS_GROWTH
+      bounds = np.floor(radius * inverse_norms).astype(int)
+      indices = np.stack(np.meshgrid(*(np.arange(-bound, bound + 1)
+                                       for bound in bounds),
+                                     indexing='ij'), axis=-1).reshape(-1, 3)
+      keys = np.einsum('ni,ij,nj->n', indices, matrix, indices)
+      # Keys of the points of a complete shell are less than the limit.
+      limit = radius ** 2 / scale * (1 - SHELL_RTOL)
+      inside = (keys >= next_key) & (keys <= limit)
+      indices = indices[inside]
+      keys = keys[inside]
+      order = np.argsort(keys, kind='stable')
+      keys = keys[order]
+      tolerance = _key_tolerance(keys)
+      starts = shell_starts(keys, tolerance)
+      ends = np.append(starts[1:], len(keys))
+      # All points whose keys are less than next_key are yielded.
+      next_key = limit
+      for start, end in zip(starts, ends):
+        if keys[start] + tolerance >= limit:
+          next_key = keys[start]
+          break
+        yield {Point3D(coords, backend=self._backend) for coords in
+               (center + indices[order[start:end]] @ basis).tolist()}
+
+  @property
+  def backend(self):
+    """Return NumberBackend of the vectors and the points of the lattice."""
+    return self._backend
+
+  @property
+  def size(self):
+    """Return the count of steps along the primitive vectors
+       in which all points of the lattice are enumerated."""
+    return self._size
+
+  @property
+  def center(self):
+    """Return the center of the lattice."""
+    return self._center
+
+  @property
+  def radius(self):
+    """Return the radius of the ball around the center which contains
+       all points of the lattice that are enumerated."""
+    return self._radius
+
+  def bragg_planes(self, zones_count=None):
+    """Return PlaneArray of the Bragg planes which bisect the vectors from
+       the center to the points of the nearest zones_count shells
+       (they are enumerated by shells() and do not depend on the size)
+       or to all points that are nearer than radius if zones_count is None.
+    """
+    center = np.array(tuple(map(float, self._center)))
+    if zones_count is None:
+      distances = np.linalg.norm(self._coords - center, axis=1)
+      points = self._coords[(distances > 0) &
+                            (distances < self._radius * (1 - SHELL_RTOL))]
+    else:
+      shells = itertools.islice(self.shells(), 1, zones_count + 1)
+      points = PointArray.from_points(
+          itertools.chain.from_iterable(shells)).coords
+    return PlaneArray((points + center) * 0.5, points - center)
 
   @abc.abstractmethod
   def primitive_vectors(self):
@@ -46,24 +222,27 @@ class ReciprocalLattice(object):
     a = self.primitive_vectors[0]
     b = self.primitive_vectors[1]
     c = self.primitive_vectors[2]
-    factor = (Decimal(2 * math.pi) /
+    factor = (self._backend.number(2 * math.pi) /
               GeometryUtils.dot_product(a, GeometryUtils.cross_product(b, c)))
     return (GeometryUtils.cross_product(b, c) * factor,
             GeometryUtils.cross_product(c, a) * factor,
             GeometryUtils.cross_product(a, b) * factor,)
 
+  @property
+  def metric_tensor(self):
+    """Return the metric tensor G = B*B^T of the reciprocal primitive
+       vectors (rows of B), |n*B|^2 = n^T*G*n."""
+    return self._basis @ self._basis.T
+
   @staticmethod
   def nearly_points(points, center):
-    """Return generator of the nearest points."""
-    points = [(GeometryUtils.distance(center, point), point) for point in points]
-    points.sort(key=lambda v: v[0])
-    distance = None
-    if points:
-      distance = points[0][0]
-    yield_points = []
-    for (distance_to_center, point) in points: # first is center
-      if abs(distance_to_center - distance) > DISTANCE_EPS:
-        distance = distance_to_center
-        yield set(yield_points)
-        yield_points = []
-      yield_points.append(point)
+    """Return generator of the nearest points, the farthest set is not
+       yielded."""
+    points = list(points)
+    vectors = (PointArray.from_points(points).coords -
+               np.array(tuple(map(float, center))))
+    keys = np.sum(vectors ** 2, axis=1)
+    order = np.argsort(keys, kind='stable')
+    starts = shell_starts(keys[order], _key_tolerance(keys))
+    for start, end in zip(starts[:-1], starts[1:]):
+      yield {points[index] for index in order[start:end].tolist()}
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Polyhedra of Brillouin zones; the first zone is clipped by half-spaces."""
+
+import numpy as np
+
+from reciprocal_lattice import reduced_basis
+
+CLIP_EPS = 1e-9 # Relative approximation of the distance to a clipping plane
+BOX_FACTOR = 4 # Half-size of the bounding box in the largest plane distances
+
+def _sort_around(points, normal):
+  """Return indices of the points in the plane which are sorted
+     counterclockwise around their center when seen from the normal."""
+  center = points.mean(axis=0)
+  axis = np.eye(3)[np.argmin(np.abs(normal))]
+  first_axis = np.cross(normal, axis)
+  first_axis /= np.linalg.norm(first_axis)
+  second_axis = np.cross(normal, first_axis)
+  deltas = points - center
+  return np.argsort(np.arctan2(deltas @ second_axis, deltas @ first_axis))
+
+class Polyhedron(object):
+  """The model of a polyhedral surface by shared vertices and faces.
+
+     Keyword arguments:
+       vertices -- array of shape (V, 3)
+       faces -- list of arrays of vertex indices; every face is ordered
+                counterclockwise when it is seen from the outside
+       face_planes -- indices of the planes that contain the faces
+  """
+
+  def __init__(self, vertices, faces, face_planes):
+    self._vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    self._faces = [np.asarray(face, dtype=int) for face in faces]
+    self._face_planes = np.asarray(face_planes, dtype=int)
+
+  def __repr__(self):
+    return ('<{0} object {{ vertices: {1}, faces: {2} }}>'
+            .format(self.__class__.__name__, len(self._vertices),
+                    len(self._faces)))
+
+  @property
+  def vertices(self):
+    """Return array of shape (V, 3) with coordinates of the vertices."""
+    return self._vertices
+
+  @property
+  def faces(self):
+    """Return list of arrays of vertex indices of the faces."""
+    return self._faces
+
+  @property
+  def face_planes(self):
+    """Return array of plane indices of the faces."""
+    return self._face_planes
+
+  @property
+  def edges(self):
+    """Return array of shape (E, 2) with sorted vertex indices of edges."""
+    if not self._faces:
+      return np.empty((0, 2), dtype=int)
+    edges = np.concatenate([np.column_stack((face, np.roll(face, -1)))
+                            for face in self._faces])
+    return np.unique(np.sort(edges, axis=1), axis=0)
+
+  @property
+  def half_edges(self):
+    """Return integer array of shape (H, 4) of the half-edges of the faces
+       one by one: (origin vertex, face, next half-edge of the face,
+       twin half-edge of the neighbour face or -1 on the boundary).
+    """
+    if not self._faces:
+      return np.empty((0, 4), dtype=int)
+    sizes = np.array([len(face) for face in self._faces])
+    origins = np.concatenate(self._faces)
+    faces = np.repeat(np.arange(len(self._faces)), sizes)
+    starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    indices = np.arange(len(origins))
+    following = starts + (indices - starts + 1) % np.repeat(sizes, sizes)
+    # The twin of the half-edge (a, b) is the half-edge (b, a).
+    count = len(self._vertices)
+    keys = origins * count + origins[following]
+    order = np.argsort(keys, kind='stable')
+    twin_keys = origins[following] * count + origins
+    positions = np.minimum(np.searchsorted(keys[order], twin_keys),
+                           len(keys) - 1)
+    twins = np.where(keys[order][positions] == twin_keys, order[positions], -1)
+    return np.column_stack((origins, faces, following, twins))
+
+  @property
+  def volume(self):
+    """Return the volume which is enclosed by the surface."""
+    volume = 0.0
+    for face in self._faces:
+      first = self._vertices[face[0]]
+      second = self._vertices[face[1:-1]]
+      third = self._vertices[face[2:]]
+      volume += np.sum(np.cross(second, third) @ first)
+    return volume / 6.0
+
+def _merged_points(points, eps):
+  """Return tuple(unique points, indices of the unique points of all
+     points), points that are nearer than eps by every coordinate merge.
+
+     A point is compared with the points in the neighbour cells of the grid
+     of the step eps only.
+  """
+  cells = np.floor(points / eps).astype(np.int64)
+  steps = [(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1)
+           for z in (-1, 0, 1)]
+  unique_by_cell = {}
+  unique = []
+  indices = np.empty(len(points), dtype=int)
+  for point_index, (point, cell) in enumerate(zip(points, cells.tolist())):
+    for step in steps:
+      neighbour = unique_by_cell.get((cell[0] + step[0], cell[1] + step[1],
+                                      cell[2] + step[2]))
+      if (neighbour is not None and
+          np.all(np.abs(points[unique[neighbour]] - point) <= eps)):
+        indices[point_index] = neighbour
+        break
+    else:
+      indices[point_index] = len(unique)
+      unique_by_cell.setdefault(tuple(cell), len(unique))
+      unique.append(point_index)
+  return (points[unique], indices)
+
+def indexed_polyhedron(faces, normals, face_planes, eps):
+  """Return Polyhedron of faces which are given by their vertex
+     coordinates in any order; vertices that are nearer than eps are
+     shared and every face is ordered counterclockwise when it is seen
+     from its normal.
+
+     Keyword arguments:
+       faces -- list of arrays of shape (K, 3) with vertices of the faces
+       normals -- array of shape (F, 3) with outer normals of the faces
+       face_planes -- indices of the planes that contain the faces
+       eps -- approximation of coordinates of the same vertex
+  """
+  if not faces:
+    return Polyhedron(np.empty((0, 3)), [], [])
+  points = np.concatenate([np.asarray(face, dtype=np.float64).reshape(-1, 3)
+                           for face in faces])
+  vertices, indices = _merged_points(points, eps)
+  loops = []
+  for face, normal in zip(np.split(indices, np.cumsum(
+      [len(face) for face in faces])[:-1]), np.asarray(normals)):
+    face = np.unique(face)
+    loops.append(face[_sort_around(vertices[face], normal)])
+  return Polyhedron(vertices, loops, face_planes)
+
+class ConvexPolyhedron(Polyhedron):
+  """The model of a convex polyhedron by shared vertices and faces,
+     face_planes is -1 for faces of the bounding box.
+  """
+
+  @staticmethod
+  def box(center, half_size):
+    """Return ConvexPolyhedron of the cube."""
+    signs = np.array([(x, y, z) for x in (-1, 1) for y in (-1, 1)
+                      for z in (-1, 1)], dtype=np.float64)
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), # -x, +x
+             (0, 4, 5, 1), (2, 3, 7, 6), # -y, +y
+             (0, 2, 6, 4), (1, 5, 7, 3)] # -z, +z
+    return ConvexPolyhedron(np.asarray(center, dtype=np.float64) +
+                            signs * half_size, faces, [-1] * len(faces))
+
+  def clip(self, point, normal, plane_index, eps):
+    """Return ConvexPolyhedron which is the part of the polyhedron
+       in the half-space (x - point) * normal <= 0.
+    """
+    distances = (self._vertices - point) @ normal
+    if np.all(distances <= eps):
+      return self
+    inside = distances <= eps
+    indices = np.cumsum(inside) - 1
+    vertices = list(self._vertices[inside])
+    cap = set(indices[inside & (distances >= -eps)].tolist())
+    crossings = {}
+    faces = []
+    face_planes = []
+    for face, face_plane in zip(self._faces, self._face_planes):
+      loop = []
+      for first, second in zip(face, np.roll(face, -1)):
+        if inside[first]:
+          loop.append(indices[first])
+        if ((distances[first] < -eps and distances[second] > eps) or
+            (distances[first] > eps and distances[second] < -eps)):
+          key = (min(first, second), max(first, second))
+          if key not in crossings:
+            t = distances[first] / (distances[first] - distances[second])
+            crossings[key] = len(vertices)
+            vertices.append(self._vertices[first] +
+                            (self._vertices[second] -
+                             self._vertices[first]) * t)
+          loop.append(crossings[key])
+      if len(loop) >= 3:
+        faces.append(loop)
+        face_planes.append(face_plane)
+    cap = sorted(cap | set(crossings.values()))
+    vertices = np.array(vertices)
+    if len(cap) >= 3:
+      cap = np.array(cap)
+      faces.append(cap[_sort_around(vertices[cap], normal)])
+      face_planes.append(plane_index)
+    return ConvexPolyhedron(vertices, faces, face_planes)._compacted()
+
+  def _compacted(self):
+    """Return the polyhedron without vertices that are out of faces."""
+    used = np.zeros(len(self._vertices), dtype=bool)
+    for face in self._faces:
+      used[face] = True
+    indices = np.cumsum(used) - 1
+    return ConvexPolyhedron(self._vertices[used],
+                            [indices[face] for face in self._faces],
+                            self._face_planes)
+
+def _clip_by_distance(planes, center):
+  """Return tuple(ConvexPolyhedron, offsets of the planes, eps) of the box
+     which is clipped by the Bragg half-spaces in order of distance while
+     they can reach the polyhedron."""
+  center = np.asarray(tuple(map(float, center)))
+  offsets = np.sum((planes.points - center) * planes.normal_vectors, axis=1)
+  if not len(planes) or np.any(offsets <= 0):
+    raise ValueError("Bragg planes must surround the center")
+  eps = CLIP_EPS * offsets.max()
+  polyhedron = ConvexPolyhedron.box(center, BOX_FACTOR * offsets.max())
+  radius = np.inf
+  for plane_index in np.argsort(offsets, kind='stable'):
+    # Planes are sorted by distance, the rest of them is out of the zone.
+    if offsets[plane_index] > radius + eps:
+      break
+    polyhedron = polyhedron.clip(planes.points[plane_index],
+                                 planes.normal_vectors[plane_index],
+                                 plane_index, eps)
+    if not np.any(polyhedron.face_planes < 0):
+      radius = np.max(np.linalg.norm(polyhedron.vertices - center, axis=1))
+  if np.any(polyhedron.face_planes < 0):
+    raise ValueError("Bragg planes do not bound the zone, "
+                     "more zones must be considered")
+  return (polyhedron, offsets, eps)
+
+def first_brillouin_zone(planes, center=(0, 0, 0)):
+  """Return ConvexPolyhedron of the points that are nearer to the center
+     than to any other lattice point (|k| <= |k - G|).
+
+     Keyword arguments:
+       planes -- PlaneArray of the Bragg planes with normals that
+                 are directed out of the center
+       center -- the center of the lattice
+  """
+  return _clip_by_distance(planes, center)[0]
+
+def zone_radius_bound(basis):
+  """Return the radius of a ball around the center which contains the first
+     zone of the lattice of the rows of the basis (or of a sublattice).
+
+     The nearest plane algorithm finds a lattice point not farther than
+     sqrt(sum |b*_i|^2)/2 from any point, b*_i are the Gram-Schmidt vectors
+     of the basis; the bound is small for the reduced basis.
+  """
+  reduced = reduced_basis(np.asarray(basis, dtype=np.float64).reshape(3, 3))
+  lengths = np.diag(np.linalg.qr(reduced.T)[1])
+  return 0.5 * np.sqrt(np.sum(lengths ** 2))
+
+def _independent_vectors(vectors, eps):
+  """Return array of shape (3, 3) with the shortest vectors which are
+     linearly independent or None if the vectors are coplanar."""
+  independent = []
+  for vector in vectors[np.argsort(np.linalg.norm(vectors, axis=1),
+                                   kind='stable')]:
+    rows = np.array(independent + [vector])
+    if np.linalg.matrix_rank(rows, eps * np.linalg.norm(vector)) == len(rows):
+      independent.append(vector)
+      if len(independent) == 3:
+        return np.array(independent)
+  return None
+
+def relevant_planes(planes, center=(0, 0, 0)):
+  """Return sorted indices of the Bragg planes which are not farther from
+     the center than zone_radius_bound of three shortest independent
+     lattice vectors, the other planes can not touch the first zone.
+     Planes at the same distance are kept together, so the set is
+     symmetric as the lattice.
+
+     Keyword arguments:
+       planes -- PlaneArray of the Bragg planes with normals that
+                 are directed out of the center
+       center -- the center of the lattice
+  """
+  center = np.asarray(tuple(map(float, center)))
+  offsets = np.sum((planes.points - center) * planes.normal_vectors, axis=1)
+  if not len(planes) or np.any(offsets <= 0):
+    raise ValueError("Bragg planes must surround the center")
+  eps = CLIP_EPS * offsets.max()
+  # The vectors to the lattice points are twice the vectors to the planes.
+  basis = _independent_vectors(2 * (planes.points - center), CLIP_EPS)
+  if basis is None:
+    raise ValueError("Bragg planes do not bound the zone, "
+                     "more zones must be considered")
+  return np.flatnonzero(offsets <= zone_radius_bound(basis) + eps)
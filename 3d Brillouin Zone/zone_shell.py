@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Higher-order Brillouin zones in three-dimensional space.
+
+A point k belongs to the n-th zone when exactly n - 1 Bragg planes separate
+it from the center. A part of the Bragg plane i is a boundary between the
+zones m + 1 and m + 2, where m is the count of other Bragg planes that
+separate it from the center. So every plane is cut by the lines of the
+other planes into convex cells and the cells with m = n - 2 (inner side)
+and m = n - 1 (outer side) are the faces of the n-th zone.
+"""
+
+import copy
+
+import numpy as np
+
+from zone_polyhedron import Polyhedron
+
+SHELL_EPS = 1e-9 # Relative approximation of the distance to a line
+DOMAIN_SIDES = 32 # count of sides of the polygon that bounds every plane
+VOLUME_EPS = 1e-6 # Relative approximation of the volume of a zone
+MAX_LATTICE_SIZE = 16 # the lattice is not enlarged over this size
+
+def _plane_axes(normal):
+  """Return two unit vectors (u, v) in the plane, u x v = normal."""
+  axis = np.eye(3)[np.argmin(np.abs(normal))]
+  first_axis = np.cross(normal, axis)
+  first_axis /= np.linalg.norm(first_axis)
+  return (first_axis, np.cross(normal, first_axis))
+
+def _split(cell, distances, eps):
+  """Return tuple(near part, far part) of a convex polygon that is crossed
+     by a line, distances are signed distances of vertices to the line."""
+  near = []
+  far = []
+  for k, (point, distance) in enumerate(zip(cell, distances)):
+    next_k = (k + 1) % len(cell)
+    if distance <= eps:
+      near.append(point)
+    if distance >= -eps:
+      far.append(point)
+    next_distance = distances[next_k]
+    if ((distance < -eps and next_distance > eps) or
+        (distance > eps and next_distance < -eps)):
+      t = distance / (distance - next_distance)
+      crossing = point + (cell[next_k] - point) * t
+      near.append(crossing)
+      far.append(crossing)
+  return (np.array(near), np.array(far))
+
+def _plane_cells(lines, counts_offset, max_count, domain, eps):
+  """Return list of tuple(cell, count) for the arrangement of lines
+     in the domain polygon where count is the number of lines
+     that have the cell on the far side (a*x + b*y > c).
+
+     Cells with count that is greater than max_count are dropped.
+  """
+  cells = [domain]
+  counts = [counts_offset]
+  for line in lines:
+    if not cells:
+      break
+    sizes = [len(cell) for cell in cells]
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    distances = np.concatenate(cells) @ line[:2] - line[2]
+    minimums = np.minimum.reduceat(distances, starts)
+    maximums = np.maximum.reduceat(distances, starts)
+    new_cells = []
+    new_counts = []
+    for cell, count, start, minimum, maximum in zip(cells, counts, starts,
+                                                     minimums, maximums):
+      if maximum <= eps:
+        new_cells.append(cell)
+        new_counts.append(count)
+      elif minimum >= -eps:
+        if count < max_count:
+          new_cells.append(cell)
+          new_counts.append(count + 1)
+      else:
+        near, far = _split(cell, distances[start:start + len(cell)], eps)
+        new_cells.append(near)
+        new_counts.append(count)
+        if count < max_count:
+          new_cells.append(far)
+          new_counts.append(count + 1)
+    cells = new_cells
+    counts = new_counts
+  return list(zip(cells, counts))
+
+class ZoneShell(Polyhedron):
+  """The model of the closed surface of a higher-order Brillouin zone,
+     face_outer marks faces of the outer boundary of the zone, face_planes
+     are indices of the Bragg planes (PlaneArray planes).
+  """
+
+  def __init__(self, vertices, faces, face_planes, face_outer, planes=None):
+    super().__init__(vertices, faces, face_planes)
+    self._face_outer = np.asarray(face_outer, dtype=bool)
+    self._planes = planes
+
+  @property
+  def face_outer(self):
+    """Return boolean array: True for faces of the outer boundary."""
+    return self._face_outer
+
+  @property
+  def planes(self):
+    """Return PlaneArray of the Bragg planes which face_planes index."""
+    return self._planes
+
+def brillouin_zone(planes, zone_number, radius, center=(0, 0, 0)):
+  """Return ZoneShell of the zone_number-th Brillouin zone.
+
+     Keyword arguments:
+       planes -- PlaneArray of all Bragg planes that are nearer than
+                 the radius to the center, normals are directed out of it
+       zone_number -- number of the zone, 1 is the first zone
+       radius -- the zone is computed in the ball of this radius
+       center -- the center of the lattice
+  """
+  if zone_number < 1:
+    raise ValueError("Zone number must be positive")
+  center = np.asarray(tuple(map(float, center)))
+  normals = planes.normal_vectors
+  offsets = np.sum((planes.points - center) * normals, axis=1)
+  eps = SHELL_EPS * radius
+  angles = np.arange(DOMAIN_SIDES) * 2 * np.pi / DOMAIN_SIDES
+  unit_domain = np.column_stack((np.cos(angles), np.sin(angles)))
+  angles += np.pi / DOMAIN_SIDES
+  domain_normals = np.column_stack((np.cos(angles), np.sin(angles)))
+  support = np.cos(np.pi / DOMAIN_SIDES)
+  order = np.argsort(offsets, kind='stable')
+  vertices = []
+  vertices_count = 0
+  faces = []
+  face_planes = []
+  face_outer = []
+  for plane_index in order:
+    offset = offsets[plane_index]
+    if offset >= radius:
+      continue
+    normal = normals[plane_index]
+    first_axis, second_axis = _plane_axes(normal)
+    domain_radius = np.sqrt(radius ** 2 - offset ** 2)
+    # Line a*x + b*y = c of the plane j in coordinates of the plane i.
+    others = order[order != plane_index]
+    lines = np.column_stack((normals[others] @ first_axis,
+                             normals[others] @ second_axis,
+                             offsets[others] - offset *
+                             (normals[others] @ normal)))
+    modules = np.linalg.norm(lines[:, :2], axis=1)
+    crossing = np.abs(lines[:, 2]) < modules * domain_radius
+    # The whole domain is on the far side of the other lines.
+    counts_offset = np.count_nonzero(~crossing & (lines[:, 2] < 0))
+    if counts_offset > zone_number - 1:
+      continue
+    cells = _plane_cells(lines[crossing] / modules[crossing, np.newaxis],
+                         counts_offset, zone_number - 1,
+                         unit_domain * domain_radius, eps)
+    for cell, count in cells:
+      if count < zone_number - 2:
+        continue
+      if np.any(np.max(cell @ domain_normals.T, axis=1) >=
+                support * domain_radius - eps):
+        raise ValueError("The zone {0} is out of the ball of radius {1}, "
+                         "more Bragg planes are needed"
+                         .format(zone_number, radius))
+      is_outer = count == zone_number - 1
+      if not is_outer:
+        cell = cell[::-1]
+      faces.append(np.arange(len(cell)) + vertices_count)
+      vertices_count += len(cell)
+      vertices.append(center + offset * normal +
+                      np.outer(cell[:, 0], first_axis) +
+                      np.outer(cell[:, 1], second_axis))
+      face_planes.append(plane_index)
+      face_outer.append(is_outer)
+  if not faces:
+    raise ValueError("The zone {0} is out of the ball of radius {1}, "
+                     "more Bragg planes are needed"
+                     .format(zone_number, radius))
+  vertices = np.concatenate(vertices)
+  # Merge the same vertices of the neighbouring faces.
+  keys = np.round((vertices - center) / (eps * 1e3)).astype(np.int64)
+  _, unique, inverse = np.unique(keys, axis=0, return_index=True,
+                                 return_inverse=True)
+  inverse = inverse.reshape(-1)
+  return ZoneShell(vertices[unique], [inverse[face] for face in faces],
+                   face_planes, face_outer, planes)
+
+def lattice_brillouin_zone(lattice, zone_number):
+  """Return ZoneShell of the zone_number-th Brillouin zone of the reciprocal
+     lattice. The lattice is enlarged until its Bragg planes bound the zone
+     that has the volume of the primitive cell, the lattice of the caller
+     is not changed (copies are enlarged).
+  """
+  basis = [tuple(map(float, vector))
+           for vector in lattice.reciprocal_primitive_vectors]
+  cell_volume = abs(np.linalg.det(basis))
+  while True:
+    try:
+      zone = brillouin_zone(lattice.bragg_planes(), zone_number,
+                            lattice.radius / 2, lattice.center)
+      if abs(zone.volume - cell_volume) <= VOLUME_EPS * cell_volume:
+        return zone
+    except ValueError:
+      if lattice.size >= MAX_LATTICE_SIZE:
+        raise
+    if lattice.size >= MAX_LATTICE_SIZE:
+      raise ValueError("The zone {0} is not bounded by the lattice of size {1}"
+                       .format(zone_number, lattice.size))
+    lattice = copy.copy(lattice)
+    lattice.resize(lattice.size + 1)
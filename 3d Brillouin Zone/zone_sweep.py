@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""First Brillouin zones of a family of lattices, e.g. a sweep over c/a.
+
+The zone of the reciprocal basis s*B is the zone of B scaled by s, so zones
+are computed for bases of unit cell volume and scaled on output. The faces
+of a zone lie on the Bragg planes of integer vectors n (G = n*B) and every
+vertex is the intersection of three of them. While the cell is deformed
+slightly the same planes bound the zone, so only the vertices are solved
+again; the zone is clipped from scratch when the combinatorics changes.
+"""
+
+import itertools
+
+import numpy as np
+
+from array_geometry import PlaneArray
+from reciprocal_lattice import reduced_basis
+from zone_polyhedron import ConvexPolyhedron, first_brillouin_zone
+
+SWEEP_EPS = 1e-9 # Relative approximation of the plane equations
+VOLUME_EPS = 1e-7 # Relative approximation of the zone volume
+
+def unit_basis(basis):
+  """Return tuple(basis of unit cell volume, scale) of the rows of
+     the basis, basis = scale * unit basis."""
+  basis = np.asarray(basis, dtype=np.float64).reshape(3, 3)
+  scale = abs(np.linalg.det(basis)) ** (1 / 3.)
+  return (basis / scale, scale)
+
+def candidate_indices(basis):
+  """Return array of shape (N, 3) with integer vectors n, the Bragg planes
+     of the vectors n*B bound the first zone of the basis B (rows).
+
+     The zone lies in the parallelepiped |x*b| <= |b|^2/2 of the vectors b
+     of the reduced basis, so a plane can bound it only if |G| is less than
+     twice the distance to the farthest corner of the parallelepiped.
+  """
+  basis = np.asarray(basis, dtype=np.float64).reshape(3, 3)
+  reduced = reduced_basis(basis)
+  signs = np.array(list(itertools.product((-1, 1), repeat=3)),
+                   dtype=np.float64)
+  corners = np.linalg.solve(reduced, (signs * 0.5 *
+                                      np.sum(reduced ** 2, axis=1)).T).T
+  radius = 2 * np.max(np.linalg.norm(corners, axis=1)) * (1 + SWEEP_EPS)
+  bounds = np.floor(radius * np.linalg.norm(np.linalg.inv(reduced),
+                                            axis=0)).astype(int)
+  steps = np.stack(np.meshgrid(*(np.arange(-bound, bound + 1)
+                                 for bound in bounds), indexing='ij'),
+                   axis=-1).reshape(-1, 3)
+  distances = np.linalg.norm(steps @ reduced, axis=1)
+  steps = steps[(distances > 0) & (distances <= radius)]
+  # Indices in the reduced basis are converted to the given one.
+  return np.rint(steps @ reduced @ np.linalg.inv(basis)).astype(int)
+
+def _vertex_planes(polyhedron, normals):
+  """Return array of shape (V, 3) with three faces of every vertex
+     whose normals are linearly independent."""
+  vertex_faces = [[] for _ in range(len(polyhedron.vertices))]
+  for face_index, face in enumerate(polyhedron.faces):
+    for vertex in face:
+      vertex_faces[vertex].append(face_index)
+  triples = []
+  for faces in vertex_faces:
+    first, second = faces[0], faces[1]
+    third = max(faces[2:], key=lambda face: abs(np.linalg.det(
+        normals[[first, second, face]])))
+    triples.append((first, second, third))
+  return np.array(triples, dtype=int)
+
+class ZoneSweep(object):
+  """First Brillouin zones of a sequence of reciprocal bases, the Bragg
+     planes and the faces of the previous zone are reused while they fit.
+
+     Keyword arguments:
+       center -- the center of the zones
+  """
+
+  def __init__(self, center=(0, 0, 0)):
+    self._center = np.asarray(tuple(map(float, center)))
+    self._face_indices = None
+    self._faces = None
+    self._vertex_planes = None
+    self._computations = 0
+    self._updates = 0
+
+  def __repr__(self):
+    return ('<{0} object {{ computations: {1}, updates: {2} }}>'
+            .format(self.__class__.__name__, self._computations,
+                    self._updates))
+
+  @property
+  def computations(self):
+    """Return the count of zones which are clipped from scratch."""
+    return self._computations
+
+  @property
+  def updates(self):
+    """Return the count of zones whose vertices are solved again."""
+    return self._updates
+
+  @property
+  def face_indices(self):
+    """Return array of shape (F, 3) with integer vectors n of the Bragg
+       planes of the faces of the last zone, face_planes index it."""
+    return self._face_indices
+
+  def zone(self, basis):
+    """Return ConvexPolyhedron of the first Brillouin zone of
+       the reciprocal primitive vectors (rows of the basis)."""
+    basis, scale = unit_basis(basis)
+    vertices = None
+    if self._faces is not None:
+      vertices = self.__update(basis)
+    if vertices is None:
+      vertices = self.__compute(basis)
+      self._computations += 1
+    else:
+      self._updates += 1
+    return ConvexPolyhedron(self._center + vertices * scale, self._faces,
+                            np.arange(len(self._faces)))
+
+  def __compute(self, basis):
+    """Clip the zone of the unit basis and remember its combinatorics,
+       return its vertices."""
+    indices = candidate_indices(basis)
+    vectors = indices @ basis
+    polyhedron = first_brillouin_zone(PlaneArray(vectors * 0.5, vectors))
+    self._face_indices = indices[polyhedron.face_planes]
+    self._faces = polyhedron.faces
+    self._vertex_planes = _vertex_planes(
+        polyhedron, vectors[polyhedron.face_planes])
+    return polyhedron.vertices
+
+  def __update(self, basis):
+    """Return vertices of the zone of the unit basis with the faces of
+       the previous zone or None if the faces do not fit."""
+    vectors = self._face_indices @ basis
+    offsets = 0.5 * np.sum(vectors ** 2, axis=1)
+    try:
+      vertices = np.linalg.solve(vectors[self._vertex_planes],
+                                 offsets[self._vertex_planes][..., np.newaxis])
+    except np.linalg.LinAlgError: # the planes of a vertex became dependent
+      return None
+    vertices = vertices[..., 0]
+    eps = SWEEP_EPS * offsets.max()
+    # Every face is planar...
+    face_sizes = [len(face) for face in self._faces]
+    face_vertices = vertices[np.concatenate(self._faces)]
+    face_planes = np.repeat(np.arange(len(self._faces)), face_sizes)
+    residuals = (np.sum(face_vertices * vectors[face_planes], axis=1) -
+                 offsets[face_planes])
+    if np.any(np.abs(residuals) > eps):
+      return None
+    # ...no other Bragg plane cuts the zone...
+    candidates = candidate_indices(basis) @ basis
+    limits = 0.5 * np.sum(candidates ** 2, axis=1)
+    if np.any(vertices @ candidates.T > limits + eps):
+      return None
+    # ...and it is the whole zone, whose volume is the volume of the cell.
+    polyhedron = ConvexPolyhedron(vertices, self._faces,
+                                  np.arange(len(self._faces)))
+    if abs(polyhedron.volume - 1) > VOLUME_EPS:
+      return None
+    return vertices
+
+def sweep_c_to_a(lattice_class, ratios, a=1, center=(0, 0, 0)):
+  """Return generator of tuples (ratio, ConvexPolyhedron) with the first
+     Brillouin zones of the lattices lattice_class(a, 0, center, ratio).
+
+     Keyword arguments:
+       lattice_class -- the class of the lattice with c_to_a argument
+       ratios -- iterable of c/a ratios
+       a -- the lattice period
+       center -- the center of the lattice
+  """
+  sweep = ZoneSweep(center)
+  for ratio in ratios:
+    lattice = lattice_class(a, 0, center, c_to_a=ratio)
+    basis = [tuple(map(float, vector))
+             for vector in lattice.reciprocal_primitive_vectors]
+    yield (ratio, sweep.zone(basis))
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Render a manifest of figures of both drawers in parallel processes.
+
+The manifest is a TOML or JSON file with a list of jobs:
+
+  workers = 4                 # optional, count of processes
+  summary = "summary.json"    # optional, per-job wall time and outputs
+
+  [[jobs]]
+  drawer = "3d"               # "2d" or "3d"
+  lattice = "face-centered"   # 2D: primitive, hex or parallelogram
+  size = 3                    # lattice size (2D: crystal range)
+  zones = 3                   # 3D: zone number, 2D: count of zones
+  image_size = [600, 530]     # optional, pixels
+  engine = "clip"             # optional, BRILLOUIN_ENGINE
+  renderer = "raster"         # optional, 3D: BRILLOUIN_RENDERER
+  supersampling = 3           # optional, 2D: BRILLOUIN_SUPERSAMPLING
+  tile_size = 2048            # optional, 2D: BRILLOUIN_TILE_SIZE
+  output = "out/fcc_3.png"    # relative to the manifest; 3D meshes are
+                              # exported to .stl, .ply, .obj, .gltf, .glb
+  colored = true              # optional, 3D: colors of faces of meshes
+
+Jobs that differ only in the output file name (not in its extension) are
+rendered once and copied, except colored OBJ meshes.
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import sys
+import time
+
+try:
+  import tomllib
+except ImportError: # Python < 3.11
+  tomllib = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DRAWERS = {"2d": "2d Brillouin Zone", "3d": "3d Brillouin Zone"}
+LATTICES_2D = ("primitive", "hex", "parallelogram")
+LATTICES_3D = {"body-centered": "1",
+               "face-centered": "2",
+               "primitive": "3",
+               "hexagonal-close-packed": "4",
+               "base-centered": "5"}
+MESH_FORMATS_3D = (".stl", ".ply", ".obj", ".gltf", ".glb")
+
+def load_manifest(file_name):
+  """Return dict of the manifest file (.toml or .json)."""
+  with open(file_name, "rb") as manifest_file:
+    if file_name.endswith(".toml"):
+      if tomllib is None:
+        raise ValueError("TOML manifests need Python 3.11, use JSON")
+      return tomllib.load(manifest_file)
+    return json.load(manifest_file)
+
+def _is_count(value, minimum):
+  """Return True if the value is an integer not less than the minimum."""
+  return (isinstance(value, int) and not isinstance(value, bool) and
+          value >= minimum)
+
+def check_job(job):
+  """Raise ValueError if the job has a value that the drawer rejects."""
+  for name, minimum in (("zones", 1), ("size", 1), ("supersampling", 1),
+                        ("tile_size", 0)):
+    if name in job and not _is_count(job[name], minimum):
+      raise ValueError("{0} must be an integer not less than {1}: {2}"
+                       .format(name, minimum, job[name]))
+  if "image_size" in job and not (
+      isinstance(job["image_size"], (list, tuple)) and
+      len(job["image_size"]) == 2 and
+      all(_is_count(value, 1) for value in job["image_size"])):
+    raise ValueError("image_size must be two positive integers: {0}"
+                     .format(job["image_size"]))
+
+def job_environment(job):
+  """Return tuple(drawer, environment variables, arguments) of the job,
+     raise ValueError if the job is invalid."""
+  drawer = job.get("drawer")
+  if drawer not in DRAWERS:
+    raise ValueError("Unknown drawer: {0}".format(drawer))
+  check_job(job)
+  environment = {"BRILLOUIN_OUTPUT": job["output"],
+                 "BRILLOUIN_NO_SHOW": "1",
+                 "MPLBACKEND": "Agg"}
+  if "image_size" in job:
+    environment["BRILLOUIN_IMAGE_SIZE"] = "{0}x{1}".format(*job["image_size"])
+  if "engine" in job:
+    environment["BRILLOUIN_ENGINE"] = job["engine"]
+  if "renderer" in job:
+    environment["BRILLOUIN_RENDERER"] = job["renderer"]
+  if "supersampling" in job:
+    environment["BRILLOUIN_SUPERSAMPLING"] = str(job["supersampling"])
+  if "tile_size" in job:
+    environment["BRILLOUIN_TILE_SIZE"] = str(job["tile_size"])
+  arguments = []
+  if drawer == "2d":
+    lattice = job.get("lattice", "primitive")
+    if lattice not in LATTICES_2D:
+      raise ValueError("Unknown lattice: {0}".format(lattice))
+    environment["BRILLOUIN_CRYSTAL"] = lattice
+    if "size" in job:
+      environment["BRILLOUIN_CRYSTAL_RANGE"] = str(job["size"])
+    if "zones" in job:
+      environment["BRILLOUIN_ZONES"] = str(job["zones"])
+  else:
+    lattice = str(job.get("lattice", "primitive"))
+    lattice = LATTICES_3D.get(lattice, lattice)
+    if lattice not in LATTICES_3D.values():
+      raise ValueError("Unknown lattice: {0}".format(job.get("lattice")))
+    if "size" in job:
+      environment["BRILLOUIN_LATTICE_SIZE"] = str(job["size"])
+    arguments = [lattice, "--zone", str(job.get("zones", 1))]
+    if os.path.splitext(job["output"])[1].lower() in MESH_FORMATS_3D:
+      arguments += ["--export", job["output"]]
+      if job.get("colored"):
+        arguments.append("--colored")
+  return (drawer, environment, arguments)
+
+def geometry_key(job):
+  """Return key of the job without the output file name: equal keys are
+     the same figures in the same file format; colored OBJ files name
+     their MTL file, so they are not shared."""
+  key = {name: value for name, value in job.items() if name != "output"}
+  key["format"] = os.path.splitext(job["output"])[1].lower()
+  if key["format"] == ".obj" and job.get("colored"):
+    key["output"] = job["output"]
+  return json.dumps(key, sort_keys=True)
+
+def run_job(job):
+  """Render the job in this process and return its summary."""
+  start = time.perf_counter()
+  drawer, environment, arguments = job_environment(job)
+  directory = os.path.join(ROOT, DRAWERS[drawer])
+  if directory not in sys.path:
+    sys.path.insert(0, directory)
+  output_directory = os.path.dirname(job["output"])
+  if output_directory:
+    os.makedirs(output_directory, exist_ok=True)
+  saved_environment = dict(os.environ)
+  os.environ.update(environment)
+  log = io.StringIO()
+  try:
+    # Drawers read their configuration on import, so the module
+    # is executed again for every job.
+    spec = importlib.util.spec_from_file_location(
+        "index_" + drawer, os.path.join(directory, "index.py"))
+    module = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+      spec.loader.exec_module(module)
+      status = module.main(arguments) if drawer == "3d" else module.main()
+  except SystemExit as error: # argparse errors must not stop the batch
+    status = 0
+    if error.code:
+      lines = log.getvalue().strip().splitlines() or [""]
+      status = "error: exit {0}: {1}".format(error.code, lines[-1])
+  finally:
+    os.environ.clear()
+    os.environ.update(saved_environment)
+  return {"output": job["output"],
+          "status": status,
+          "seconds": time.perf_counter() - start}
+
+def run_manifest(manifest, base_directory=".", workers=None):
+  """Return list of job summaries in the order of the manifest jobs."""
+  jobs = [dict(job, output=os.path.join(base_directory, job["output"]))
+          for job in manifest.get("jobs", [])]
+  groups = {}
+  for index, job in enumerate(jobs):
+    groups.setdefault(geometry_key(job), []).append(index)
+  workers = workers or manifest.get("workers") or os.cpu_count()
+  summaries = [None] * len(jobs)
+  with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+    futures = {pool.submit(run_job, jobs[indices[0]]): indices
+               for indices in groups.values()}
+    for future in concurrent.futures.as_completed(futures):
+      first, *copies = futures[future]
+      try:
+        summary = future.result()
+      except Exception as error: # the rest of the jobs must be rendered
+        summary = {"output": jobs[first]["output"],
+                   "status": "error: {0}".format(error), "seconds": 0.0}
+      summaries[first] = summary
+      for index in copies:
+        summaries[index] = {"output": jobs[index]["output"],
+                            "status": summary["status"], "seconds": 0.0,
+                            "copied_from": summary["output"]}
+        if summary["status"] == 0:
+          output_directory = os.path.dirname(jobs[index]["output"])
+          if output_directory:
+            os.makedirs(output_directory, exist_ok=True)
+          shutil.copyfile(summary["output"], jobs[index]["output"])
+  return summaries
+
+def main(argv=None):
+  """Run the batch renderer, return 0 if all jobs are rendered."""
+  parser = argparse.ArgumentParser(
+      description="Render figures of a TOML or JSON manifest in parallel.")
+  parser.add_argument("manifest", help="path of the manifest")
+  parser.add_argument("--workers", type=int,
+                      help="count of processes (default: count of CPUs)")
+  parser.add_argument("--summary", help="path of the JSON summary")
+  args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+  manifest = load_manifest(args.manifest)
+  base_directory = os.path.dirname(os.path.abspath(args.manifest))
+  start = time.perf_counter()
+  summaries = run_manifest(manifest, base_directory, args.workers)
+  for summary in summaries:
+    print("{0:8.2f}s  {1}  {2}".format(summary["seconds"], summary["status"],
+                                      summary["output"]))
+  print("{0} jobs in {1:.2f}s".format(len(summaries),
+                                      time.perf_counter() - start))
+  summary_file_name = args.summary
+  if not summary_file_name and manifest.get("summary"):
+    summary_file_name = os.path.join(base_directory, manifest["summary"])
+  if summary_file_name:
+    with open(summary_file_name, "w") as summary_file:
+      json.dump({"jobs": summaries}, summary_file, indent=2)
+  return 0 if all(summary["status"] == 0 for summary in summaries) else 1
+
+if __name__ == '__main__':
+  sys.exit(main())
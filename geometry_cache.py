@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Persistent content-addressed cache of computed zone geometry.
+
+Every entry is a compressed NPZ file which is named by the SHA-256 hash of
+the parameters of the computation and of the source code that computes it.
+The least recently used entries are removed when the cache is too large.
+Both drawers share this module; the cache is used only if BRILLOUIN_CACHE
+names its directory, e.g. ~/.cache/brillouin_zones. MemoryCache keeps the
+recent entries of one process in front of it and is always used.
+"""
+
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+CACHE_SIZE = int(os.environ.get("BRILLOUIN_CACHE_SIZE", 64 << 20)) # bytes
+CACHE_EXTENSION = ".npz"
+MEMORY_CACHE_ENTRIES = 16 # entries which are kept in memory
+
+def source_version(*file_names):
+  """Return hash of the contents of the source files."""
+  digest = hashlib.sha256()
+  for file_name in file_names:
+    with open(file_name, "rb") as source_file:
+      digest.update(source_file.read())
+  return digest.hexdigest()
+
+def cache_key(**params):
+  """Return hex key of the parameters (numbers, strings and their lists)."""
+  def _plain(value):
+    if isinstance(value, np.ndarray):
+      return value.tolist()
+    return float(value)
+  return hashlib.sha256(json.dumps(params, sort_keys=True,
+                                   default=_plain).encode()).hexdigest()
+
+class GeometryCache(object):
+  """Directory of NPZ files with size-bounded LRU eviction.
+
+     Keyword arguments:
+       directory -- path of the cache directory, it is created on save
+       max_size -- the total size of files in bytes after eviction
+  """
+
+  def __init__(self, directory, max_size=CACHE_SIZE):
+    self._directory = directory
+    self._max_size = max_size
+
+  def __repr__(self):
+    return ('<{0} object {{ directory: {1} }}>'
+            .format(self.__class__.__name__, self._directory))
+
+  @property
+  def directory(self):
+    """Return path of the cache directory."""
+    return self._directory
+
+  def _path(self, key):
+    """Return path of the file of the entry."""
+    return os.path.join(self._directory, key + CACHE_EXTENSION)
+
+  def load(self, key):
+    """Return dict of arrays of the entry or None if it is not cached."""
+    path = self._path(key)
+    try:
+      with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files}
+      # The modification time is the time of the last use.
+      os.utime(path)
+    except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+      return None
+    return arrays
+
+  def save(self, key, arrays):
+    """Write the entry atomically and evict the least recently used ones."""
+    os.makedirs(self._directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(suffix=".tmp",
+                                             dir=self._directory)
+    try:
+      with os.fdopen(descriptor, "wb") as temp_file:
+        np.savez_compressed(temp_file, **arrays)
+      os.replace(temp_path, self._path(key))
+    except BaseException:
+      os.unlink(temp_path)
+      raise
+    self.evict(keep=key)
+
+  def evict(self, keep=None):
+    """Remove the least recently used entries over the size limit."""
+    entries = []
+    for entry in os.scandir(self._directory):
+      if entry.name.endswith(CACHE_EXTENSION):
+        stat = entry.stat()
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+    entries.sort()
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+      if total_size <= self._max_size:
+        break
+      if keep is not None and path == self._path(keep):
+        continue
+      try:
+        os.unlink(path)
+      except FileNotFoundError:
+        pass
+      total_size -= size
+
+  def get(self, key, compute):
+    """Return cached arrays of the key or compute (dict of arrays),
+       save and return them."""
+    arrays = self.load(key)
+    if arrays is None:
+      arrays = compute()
+      self.save(key, arrays)
+    return arrays
+
+class MemoryCache(object):
+  """In-process LRU cache of dicts of arrays, the arrays are read-only
+     because every get of the key returns the same ones.
+
+     Keyword arguments:
+       max_entries -- count of the entries which are kept
+  """
+
+  def __init__(self, max_entries=MEMORY_CACHE_ENTRIES):
+    self._max_entries = max_entries
+    self._entries = collections.OrderedDict()
+
+  def __repr__(self):
+    return ('<{0} object {{ entries: {1} }}>'
+            .format(self.__class__.__name__, len(self._entries)))
+
+  def __len__(self):
+    return len(self._entries)
+
+  def get(self, key, compute):
+    """Return kept arrays of the key or compute (dict of arrays), keep
+       and return them."""
+    if key in self._entries:
+      self._entries.move_to_end(key)
+      return self._entries[key]
+    arrays = dict(compute())
+    for array in arrays.values():
+      array.setflags(write=False)
+    self._entries[key] = arrays
+    while len(self._entries) > self._max_entries:
+      self._entries.popitem(last=False)
+    return arrays
+
+def default_cache():
+  """Return GeometryCache of BRILLOUIN_CACHE or None if it is not set."""
+  directory = os.environ.get("BRILLOUIN_CACHE")
+  if not directory:
+    return None
+  return GeometryCache(directory, CACHE_SIZE)
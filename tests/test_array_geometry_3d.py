@@ -0,0 +1,90 @@
+"""Tests for the vectorized 3D geometry kernels."""
+
+import numpy as np
+
+from array_geometry import ArrayGeometryUtils, LineArray, PlaneArray, PointArray
+from geometry import GeometryUtils, Line3D, Plane, Point3D, Vector3D
+
+
+def test_point_array_round_trip():
+  points = [Point3D(1, 2, 3), Point3D(-1, 0, 0.5)]
+  array = PointArray.from_points(points)
+  assert len(array) == 2
+  assert np.array_equal(array.x, [1, -1])
+  assert array.to_points() == points
+  assert np.array_equal(np.asarray(array[1:]), [[-1, 0, 0.5]])
+
+
+def test_plane_array_coefficients():
+  planes = PlaneArray([(0, 0, 2), (1, 0, 0)], [(0, 0, 5), (2, 0, 0)])
+  assert np.allclose(planes.normal_vectors, [(0, 0, 1), (1, 0, 0)])
+  assert np.allclose(planes.D, [-2, -1])
+  plane = planes.to_planes()[0]
+  assert (plane.C, plane.D) == (1, -2)
+
+
+def test_dot_cross_and_distance():
+  first = np.array([(1, 0, 0), (1, 2, 3)], dtype=float)
+  second = np.array([(0, 1, 0), (4, 5, 6)], dtype=float)
+  assert np.array_equal(ArrayGeometryUtils.dot_product(first, second), [0, 32])
+  assert np.array_equal(ArrayGeometryUtils.cross_product(first, second)[0],
+                        [0, 0, 1])
+  assert np.allclose(ArrayGeometryUtils.point_point_distance(
+      [(0, 0, 0)], [(3, 4, 0)]), [5])
+
+
+def test_plane_plane_intersection_mask():
+  first = PlaneArray([(0, 0, 0), (0, 0, 0)], [(1, 0, 0), (0, 0, 1)])
+  second = PlaneArray([(0, 0, 0), (0, 0, 1)], [(0, 1, 0), (0, 0, 1)])
+  lines, mask = ArrayGeometryUtils.plane_plane_intersection(first, second)
+  assert mask.tolist() == [True, False]
+  assert np.allclose(np.abs(lines.directing_vectors[0]), [0, 0, 1])
+  assert np.allclose(lines.points[0], [0, 0, 0])
+
+
+def test_plane_plane_intersection_matches_scalar():
+  first = Plane(Point3D(1, 0, 0), Vector3D(1, 1, 0))
+  second = Plane(Point3D(0, 0, 2), Vector3D(0, 1, 1))
+  lines, mask = ArrayGeometryUtils.plane_plane_intersection(
+      PlaneArray.from_planes([first]), PlaneArray.from_planes([second]))
+  assert mask[0]
+  line = GeometryUtils.intersection(first, second)
+  # Both lines lie in both planes and have the same direction.
+  assert np.allclose(np.abs(lines.directing_vectors[0]),
+                     np.abs([float(line.l), float(line.m), float(line.n)]))
+  for plane in (first, second):
+    normal = np.array([float(plane.A), float(plane.B), float(plane.C)])
+    assert np.isclose(lines.points[0] @ normal, -float(plane.D))
+
+
+def test_plane_line_intersection():
+  planes = PlaneArray([(0, 0, 1), (0, 0, 1)], [(0, 0, 1), (0, 0, 1)])
+  lines = LineArray.from_lines([Line3D(Point3D(0, 0, 0), Vector3D(0, 0, 1)),
+                                Line3D(Point3D(0, 0, 0), Vector3D(1, 0, 0))])
+  points, mask = ArrayGeometryUtils.plane_line_intersection(planes, lines)
+  assert mask.tolist() == [True, False]
+  assert np.allclose(points.coords[0], [0, 0, 1])
+
+
+def test_plane_segment_intersection():
+  planes = PlaneArray([(0, 0, 1)] * 2, [(0, 0, 1)] * 2)
+  points, mask = ArrayGeometryUtils.plane_segment_intersection(
+      planes, [(0, 0, 0), (0, 0, 0)], [(0, 0, 2), (0, 0, 0.5)])
+  assert mask.tolist() == [True, False]
+  assert np.allclose(points.coords[0], [0, 0, 1])
+
+
+def test_half_space_containment():
+  # The cube |x|, |y|, |z| <= 1, the last plane is directed to the center.
+  planes = PlaneArray([(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0),
+                       (0, 0, 1), (0, 0, -1)],
+                      [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0),
+                       (0, 0, 1), (0, 0, 1)])
+  points = [(0, 0, 0), (1, 1, 1), (1, 0.5, 0), (2, 0, 0)]
+  inside, active = ArrayGeometryUtils.half_space_containment(
+      planes, points, (0, 0, 0))
+  assert inside.shape == active.shape == (4, 6)
+  assert np.all(inside, axis=1).tolist() == [True, True, True, False]
+  assert np.flatnonzero(active[1]).tolist() == [0, 2, 4]
+  assert np.flatnonzero(active[2]).tolist() == [0]
+  assert not np.any(active[0])
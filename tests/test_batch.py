@@ -0,0 +1,128 @@
+"""Tests for the manifest-driven batch renderer."""
+
+import json
+
+import pytest
+
+import batch
+
+
+def test_job_environment_of_3d_lattice():
+  drawer, environment, arguments = batch.job_environment(
+      {"drawer": "3d", "lattice": "face-centered", "zones": 3, "size": 4,
+       "image_size": [300, 200], "renderer": "raster", "output": "fcc.png"})
+  assert drawer == "3d"
+  assert arguments == ["2", "--zone", "3"]
+  assert environment["BRILLOUIN_LATTICE_SIZE"] == "4"
+  assert environment["BRILLOUIN_IMAGE_SIZE"] == "300x200"
+  assert environment["BRILLOUIN_OUTPUT"] == "fcc.png"
+  assert environment["BRILLOUIN_RENDERER"] == "raster"
+
+
+def test_job_environment_of_3d_mesh():
+  _, _, arguments = batch.job_environment(
+      {"drawer": "3d", "lattice": "primitive", "output": "cube.glb",
+       "colored": True})
+  assert arguments == ["3", "--zone", "1", "--export", "cube.glb",
+                       "--colored"]
+
+
+def test_job_environment_of_2d_crystal():
+  drawer, environment, arguments = batch.job_environment(
+      {"drawer": "2d", "lattice": "hex", "zones": 5, "supersampling": 3,
+       "tile_size": 256, "output": "hex.png"})
+  assert (drawer, arguments) == ("2d", [])
+  assert environment["BRILLOUIN_CRYSTAL"] == "hex"
+  assert environment["BRILLOUIN_ZONES"] == "5"
+  assert environment["BRILLOUIN_SUPERSAMPLING"] == "3"
+  assert environment["BRILLOUIN_TILE_SIZE"] == "256"
+
+
+@pytest.mark.parametrize("job", [
+    {"drawer": "4d", "output": "x.png"},
+    {"drawer": "3d", "lattice": "diamond", "output": "x.png"},
+    {"drawer": "2d", "lattice": "diamond", "output": "x.png"},
+    {"drawer": "3d", "zones": 0, "output": "x.png"},
+    {"drawer": "2d", "size": "3", "output": "x.png"},
+    {"drawer": "2d", "image_size": [100], "output": "x.png"},
+])
+def test_invalid_jobs_are_rejected(job):
+  with pytest.raises(ValueError):
+    batch.job_environment(job)
+
+
+def test_same_figures_are_rendered_once(tmp_path, monkeypatch):
+  monkeypatch.setenv("BRILLOUIN_CACHE", "")
+  job = {"drawer": "2d", "zones": 2, "image_size": [120, 120]}
+  manifest = {"jobs": [dict(job, output="out/first.png"),
+                       dict(job, output="out/second.png"),
+                       {"drawer": "3d", "lattice": "primitive",
+                        "image_size": [200, 200], "output": "cube.png"}],
+              "summary": "summary.json"}
+  manifest_path = tmp_path / "manifest.json"
+  manifest_path.write_text(json.dumps(manifest))
+  assert batch.main([str(manifest_path), "--workers", "2"]) == 0
+  summary = json.loads((tmp_path / "summary.json").read_text())["jobs"]
+  assert [job["status"] for job in summary] == [0, 0, 0]
+  assert summary[1]["copied_from"] == summary[0]["output"]
+  assert (tmp_path / "out" / "first.png").read_bytes() == \
+      (tmp_path / "out" / "second.png").read_bytes()
+  assert (tmp_path / "cube.png").stat().st_size > 0
+
+
+def test_same_figures_of_other_formats_are_rendered_again(tmp_path):
+  job = {"drawer": "2d", "zones": 2, "image_size": [120, 120]}
+  manifest = {"jobs": [dict(job, output="zones.png"),
+                       dict(job, output="zones.svg"),
+                       dict(job, output="copy.PNG")]}
+  summary = batch.run_manifest(manifest, str(tmp_path), workers=1)
+  assert [job["status"] for job in summary] == [0, 0, 0]
+  assert "copied_from" not in summary[1]
+  assert summary[2]["copied_from"] == summary[0]["output"]
+  assert (tmp_path / "zones.png").read_bytes().startswith(b"\x89PNG")
+  assert (tmp_path / "copy.PNG").read_bytes().startswith(b"\x89PNG")
+  assert (tmp_path / "zones.svg").read_bytes().startswith(b"<svg")
+
+
+def test_meshes_and_image_of_same_zone(tmp_path):
+  job = {"drawer": "3d", "lattice": "primitive", "image_size": [100, 100],
+         "renderer": "raster", "colored": True}
+  outputs = ["cube.png", "cube.stl", "copy.stl", "cube.ply", "cube.obj",
+             "other.obj", "cube.gltf", "cube.glb"]
+  manifest = {"jobs": [dict(job, output=output) for output in outputs]}
+  summary = batch.run_manifest(manifest, str(tmp_path), workers=2)
+  assert [job["status"] for job in summary] == [0] * len(outputs)
+  assert [output for output, job in zip(outputs, summary)
+          if "copied_from" in job] == ["copy.stl"]
+  files = {output: (tmp_path / output).read_bytes() for output in outputs}
+  assert files["cube.png"].startswith(b"\x89PNG")
+  # Binary STL: the header of 80 bytes, the count and 50 bytes per triangle.
+  count = int.from_bytes(files["cube.stl"][80:84], "little")
+  assert count == 12
+  assert len(files["cube.stl"]) == 84 + 50 * count
+  assert files["copy.stl"] == files["cube.stl"]
+  assert files["cube.ply"].startswith(b"ply\nformat binary_little_endian")
+  for name in ("cube", "other"):
+    assert files[name + ".obj"].startswith(
+        b"# Brillouin zone\nmtllib " + name.encode() + b".mtl\n")
+    assert (tmp_path / (name + ".mtl")).read_bytes().startswith(b"newmtl")
+  assert json.loads(files["cube.gltf"])["asset"]["version"] == "2.0"
+  assert files["cube.glb"][:8] == b"glTF\x02\x00\x00\x00"
+
+
+def test_exit_of_drawer_is_failed_job(tmp_path, monkeypatch):
+  monkeypatch.setattr(batch, "check_job", lambda job: None)
+  summary = batch.run_job({"drawer": "3d", "zones": 0,
+                           "output": str(tmp_path / "x.png")})
+  assert summary["status"].startswith("error: exit 2: ")
+  assert summary["status"].endswith("zone number must be positive")
+
+
+def test_invalid_job_does_not_stop_batch(tmp_path):
+  manifest = {"jobs": [{"drawer": "3d", "zones": 0, "output": "bad.png"},
+                       {"drawer": "3d", "lattice": "primitive",
+                        "image_size": [100, 100], "renderer": "raster",
+                        "output": "cube.png"}]}
+  summary = batch.run_manifest(manifest, str(tmp_path), workers=1)
+  assert summary[0]["status"].startswith("error: zones must be")
+  assert summary[1]["status"] == 0
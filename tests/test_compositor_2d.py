@@ -0,0 +1,143 @@
+"""Tests for the array composition of 2D zone images."""
+
+import numpy as np
+import pytest
+
+from compositor import (downsample, draw_disks, draw_lines, polygon_labels,
+                        rgba)
+from test_geometry_cache import load_index_2d
+from zone_polygons import CIRCLE_SIDES
+from zone_raster import sample_positions, zone_indices
+
+WHITE = (255, 255, 255, 255)
+BLACK = (0, 0, 0, 255)
+
+
+def blank(positions):
+  pixels = np.empty((len(positions[1]), len(positions[0]), 4), dtype=np.uint8)
+  pixels[:] = WHITE
+  return pixels
+
+
+def test_rgba():
+  assert rgba("black") == BLACK
+  assert rgba((1, 2, 3)) == (1, 2, 3, 255)
+  assert rgba((1, 2, 3, 4)) == (1, 2, 3, 4)
+
+
+def test_sample_positions():
+  pos_x, pos_y = sample_positions((4, 2), (1, 0))
+  assert pos_x.tolist() == [-1, 0, 1, 2]
+  assert pos_y.tolist() == [0, 1]
+  pos_x, pos_y = sample_positions((4, 2), (1, 0), 3)
+  assert (len(pos_x), len(pos_y)) == (12, 6)
+  # Samples of every pixel are around its point.
+  assert np.allclose(pos_x.reshape(4, 3).mean(axis=1), [-1, 0, 1, 2])
+  assert np.allclose(pos_y.reshape(2, 3).mean(axis=1), [0, 1])
+
+
+def test_supersampled_zone_indices():
+  lines = np.array([[1, 0, 2.1]])
+  indices = zone_indices(lines, (8, 1), (0, 0), supersampling=2)
+  assert indices.shape == (2, 16)
+  # The line x = 2.1 splits the samples of the pixel 2.
+  assert indices[0].tolist() == [1] * 5 + [2] * 11
+
+
+def test_draw_lines():
+  positions = sample_positions((9, 9), (4, 4))
+  pixels = blank(positions)
+  draw_lines(pixels, positions, [[0, 1, 0], [2, 2, 0]], "black")
+  black = np.all(pixels == BLACK, axis=2)
+  assert black[4].all()
+  assert all(black[row, 8 - row] for row in range(9))
+  assert np.count_nonzero(black) == 17
+  # Lines are equally wide in every direction.
+  pixels = blank(positions)
+  draw_lines(pixels, positions, [[1, 0, 1], [0, 3, -6]], BLACK, width=3)
+  black = np.all(pixels == BLACK, axis=2)
+  assert black[:, 4:7].all() and black[1:4].all()
+  assert np.count_nonzero(black) == 3 * 9 * 2 - 9
+
+
+def test_draw_disks():
+  positions = sample_positions((20, 10), (5, 5))
+  pixels = blank(positions)
+  draw_disks(pixels, positions, [[0, 0], [10, 0], [100, 100]], 2, BLACK)
+  black = np.all(pixels == BLACK, axis=2)
+  assert np.count_nonzero(black) == 2 * 13
+  assert black[5, 5] and black[5, 15] and black[3, 15] and not black[3, 16]
+  # The disk at the border is clipped.
+  pixels = blank(positions)
+  draw_disks(pixels, positions, [[-5, -5]], 2, BLACK)
+  assert np.count_nonzero(np.all(pixels == BLACK, axis=2)) == 6
+
+
+def test_polygon_labels():
+  positions = sample_positions((10, 10), (0, 0))
+  labels = polygon_labels([(1, [[2, 2], [7, 2], [7, 7], [2, 7]]),
+                           (3, [[0, 0], [1, 0], [1, 1], [0, 1]])], positions)
+  assert labels.dtype == np.int32
+  assert labels[4, 4] == 1 and labels[0, 0] == 3 and labels[9, 9] == 0
+  # Edges are half-open, so the samples cover the area of the polygon.
+  assert np.count_nonzero(labels == 1) == 25
+  positions = sample_positions((10, 10), (0, 0), 4)
+  labels = polygon_labels([(1, [[2, 2], [7, 2], [7, 7], [2, 7]])], positions)
+  assert np.count_nonzero(labels == 1) == 25 * 16
+  # Concave polygons are filled by the even-odd rule.
+  positions = sample_positions((6, 6), (0, 0))
+  labels = polygon_labels([(2, [[0, 0], [6, 0], [6, 6], [4, 6], [4, 2],
+                                [2, 2], [2, 6], [0, 6]])], positions)
+  assert np.count_nonzero(labels) == 36 - 8
+  assert labels[3:, 2:4].max() == 0
+
+
+def test_shared_side_covers_samples_once():
+  # The side from a to b passes through centers of samples on y = 3 x - 1,
+  # its crossings are rounded differently if they are computed from b.
+  middle, direction = np.array((0.5, 0.5)), np.array((1, 3))
+  a, b = middle - 2.9 * direction, middle + 6.67 * direction
+  c, d = a + (5.1, -3.3), b + (-4.7, 2.9)
+  positions = sample_positions((20, 40), (10, 20))
+  first = polygon_labels([(1, [a, c, b])], positions) > 0
+  second = polygon_labels([(1, [b, d, a])], positions) > 0
+  whole = polygon_labels([(1, [a, c, b, d])], positions) > 0
+  assert not np.any(first & second)
+  assert np.array_equal(first | second, whole)
+
+
+@pytest.mark.parametrize("name", ["primitive", "parallelogram", "hex"])
+def test_polygons_match_raster_of_mirror_symmetric_crystal(name):
+  index = load_index_2d()
+  crystal = index.CRYSTALS[name](index.WIDTH, index.CRYSTAL_RANGE,
+                                 index.CENTER)
+  lines = index.complete_bragg_lines(crystal)
+  polygons = index.get_zone_polygons(lines, crystal.radius)
+  positions = sample_positions(index.IMAGE_SIZE, index.IMAGE_CENTER)
+  labels = polygon_labels(polygons, positions)
+  expected = zone_indices(lines, index.IMAGE_SIZE, index.IMAGE_CENTER,
+                          0.5 * crystal.radius)
+  # Samples on Bragg lines and out of the circle polygon are ambiguous.
+  pos_x, pos_y = np.meshgrid(*positions)
+  normals = lines / np.hypot(lines[:, 0], lines[:, 1])[:, np.newaxis]
+  near_lines = np.zeros(pos_x.shape, dtype=bool)
+  for normal_x, normal_y, offset in normals:
+    near_lines |= np.abs(normal_x * pos_x + normal_y * pos_y - offset) < 1
+  inscribed = 0.5 * crystal.radius * np.cos(np.pi / CIRCLE_SIDES) - 1
+  inside = ((expected > 0) & (expected <= max(zone for zone, _ in polygons))
+            & ~near_lines & (np.hypot(pos_x, pos_y) < inscribed))
+  # The mirror line x = 0 is inside the zones of every crystal.
+  assert np.any(inside & (pos_x == 0))
+  assert not np.any(inside & (labels == 0))
+  assert np.array_equal(labels[inside], expected[inside])
+
+
+def test_downsample():
+  pixels = np.zeros((4, 6, 4), dtype=np.uint8)
+  pixels[:2, :3] = 255
+  pixels[0, 0] = 0
+  assert downsample(pixels, 1) is pixels
+  reduced = downsample(pixels, 2)
+  assert reduced.shape == (2, 3, 4) and reduced.dtype == np.uint8
+  assert reduced[0, :, 0].tolist() == [191, 128, 0]
+  assert reduced[1].max() == 0
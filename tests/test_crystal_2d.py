@@ -1,5 +1,7 @@
 """Tests for the 2D crystal models."""
 
+import itertools
+
 from sympy.geometry import Point
 
 from hex_crystal import HexCrystal
@@ -54,3 +56,37 @@ def test_shells_are_sorted_by_distance():
     assert len(shell_distances) == 1  # all points of a shell are equidistant
     distances.append(shell_distances.pop())
   assert distances == sorted(distances)
+
+
+def test_crystal_points_are_float_array():
+  crystal = PrimitiveCrystal(2, 30, CENTER)
+  assert crystal._points.shape == (61 * 61, 2)
+  assert crystal.radius == 62
+  shells = crystal.points()
+  next(shells)
+  assert next(shells) == {Point(2, 0), Point(-2, 0), Point(0, 2), Point(0, -2)}
+
+
+def test_nearly_points_of_sympy_points():
+  points = [Point(0, 3), Point(1, 0), Point(0, 0), Point(0, -1),
+            Point(5, 5)]
+  shells = list(PrimitiveCrystal.nearly_points(points, CENTER))
+  # The farthest group is not yielded: it may be incomplete.
+  assert shells == [{Point(0, 0)}, {Point(1, 0), Point(0, -1)},
+                    {Point(0, 3)}]
+
+
+def test_shells_do_not_depend_on_size():
+  small = HexCrystal(20, 1, CENTER)
+  large = HexCrystal(20, 8, CENTER)
+  shells = list(itertools.islice(small.shells(), 30))
+  assert shells == list(itertools.islice(large.points(), 30))
+
+
+def test_shells_of_unit_period_are_not_merged():
+  # Distances sqrt(100) and sqrt(101) differ by 0.05 only.
+  shells = list(itertools.islice(PrimitiveCrystal(1, 1, CENTER).shells(), 50))
+  distances = [{point.x ** 2 + point.y ** 2 for point in shell}
+               for shell in shells]
+  assert all(len(shell_distances) == 1 for shell_distances in distances)
+  assert {100} in distances and {101} in distances
@@ -0,0 +1,52 @@
+"""Tests for the point groups of 2D crystals."""
+
+import numpy as np
+
+from crystal_symmetry import fundamental_wedge, point_group, symmetric_polygons
+from zone_polygons import circle_polygon, clip_polygon
+
+
+def square_vectors(size=3):
+  steps = np.arange(-size, size + 1)
+  vectors = np.stack(np.meshgrid(steps, steps), axis=-1).reshape(-1, 2)
+  return vectors[np.linalg.norm(vectors, axis=1) <= size].astype(np.float64)
+
+
+def test_square_crystal_has_eight_operations():
+  operations = point_group(square_vectors())
+  assert len(operations) == 8
+  assert np.allclose(operations[0], np.eye(2))
+
+
+def test_rectangular_crystal_has_four_operations():
+  operations = point_group(square_vectors() * (1, 2))
+  assert len(operations) == 4
+
+
+def test_empty_set_has_only_identity():
+  for vectors in (np.empty((0, 2)), np.zeros((1, 2))):
+    operations = point_group(vectors)
+    assert len(operations) == 1
+    assert np.allclose(operations[0], np.eye(2))
+
+
+def test_collinear_vectors_have_mirrors():
+  operations = point_group([(-2, -2), (-1, -1), (1, 1), (2, 2)])
+  assert len(operations) == 4
+  # Only the identity and the mirror in the line keep every vector.
+  assert len(point_group([(1, 1), (2, 2)])) == 2
+
+
+def test_wedge_images_cover_the_circle():
+  operations = point_group(square_vectors())
+  wedge = circle_polygon(1.0, sides=64)
+  for line in fundamental_wedge(operations):
+    wedge = clip_polygon(wedge, line)
+  images = symmetric_polygons([(1, wedge)], operations)
+  areas = []
+  for _, polygon in images:
+    x, y = polygon[:, 0], polygon[:, 1]
+    # Counterclockwise polygons have positive area.
+    areas.append(0.5 * np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+  assert np.all(np.array(areas) > 0)
+  assert np.isclose(sum(areas), 32 * np.sin(2 * np.pi / 64))
@@ -1,9 +1,14 @@
 """Tests for the 3D geometry primitives."""
 
 import math
+import pickle
 from decimal import Decimal
+from fractions import Fraction
 
-from geometry import GeometryUtils, Line3D, Plane, Point3D, Segment3D, Vector3D
+import pytest
+
+from geometry import (GeometryUtils, Line3D, Plane, Point3D, Segment3D,
+                      Vector3D, current_backend, numeric_backend)
 
 
 def test_point_arithmetic():
@@ -19,6 +24,49 @@ def test_point_equality_and_hash():
   assert Point3D(1, 2, 3) == Point3D(1, 2, 3)
   assert hash(Point3D(1, 2, 3)) == hash(Point3D(1, 2, 3))
   assert Point3D(1, 2, 3) != (1, 2, 3)
+  assert Point3D(1, 2, 3) != Point3D(1, 2, 4)
+  assert Point3D(1, 2, 3) == Point3D(1.00001, 2, 3)
+  assert len({Point3D(0, 0, 0), Point3D(-0.0, 0, 0), Point3D(1, 0, 0)}) == 2
+
+
+def test_plane_equality_and_hash():
+  plane = Plane(Point3D(0, 0, 1), Vector3D(0, 0, 1))
+  # The same plane by another point and a longer normal vector.
+  same = Plane(Point3D(1, 2, 1), Vector3D(0, 0, 2))
+  assert plane == same and hash(plane) == hash(same)
+  assert plane != Plane(Point3D(0, 0, 1), Vector3D(0, 0, -1))
+  assert plane != Plane(Point3D(0, 0, 2), Vector3D(0, 0, 1))
+  assert plane != Point3D(0, 0, 1)
+  assert len({plane, same, Plane(Point3D(0, 0, 0), Vector3D(1, 0, 0))}) == 2
+
+
+def test_primitives_are_immutable():
+  point = Point3D(1, 2, 3)
+  plane = Plane(point, Vector3D(0, 0, 1))
+  line = Line3D(point, Vector3D(0, 0, 1))
+  for entity in (point, plane, line):
+    assert not hasattr(entity, "__dict__")
+    with pytest.raises(AttributeError):
+      entity._point = point
+  assert pickle.loads(pickle.dumps(point)) == point
+  assert pickle.loads(pickle.dumps(plane)) == plane
+
+
+def test_vector_by_points():
+  first, second = Point3D(1, 1, 1), Point3D(1, 4, 5)
+  vector = Vector3D.by_points(first, second)
+  assert type(vector) is Vector3D and vector.module == 5
+  assert type(second - first) is Point3D
+  with pytest.raises(TypeError):
+    Vector3D.by_points(first, first)
+
+
+def test_plane_and_line_coefficients():
+  plane = Plane(Point3D(0, 0, 2), Vector3D(0, 0, 3))
+  assert plane.coefficients == (0, 0, 1, -2)
+  assert (plane.A, plane.B, plane.C, plane.D) == plane.coefficients
+  line = Line3D(Point3D(1, 2, 3), Vector3D(2, 0, 0))
+  assert line.coefficients == (1, 0, 0, 1, 2, 3)
 
 
 def test_distance():
@@ -37,7 +85,7 @@ def test_dot_and_cross_product():
 def test_vector_module_and_normalized():
   vector = Vector3D(3, 4, 0)
   assert vector.module == 5
-  assert abs(vector.normalized.module - 1) < Decimal("1e-9")
+  assert abs(vector.normalized.module - 1) < 1e-9
 
 
 def test_angle_between_orthogonal_vectors():
@@ -90,3 +138,80 @@ def test_points_are_equal():
                                         Point3D(0.001, 0.001, 0.001))
   assert not GeometryUtils.points_are_equal(Point3D(0, 0, 0),
                                             Point3D(1, 0, 0))
+
+
+def test_default_backend_is_float():
+  assert current_backend().name == "float"
+  assert all(isinstance(coord, float) for coord in Point3D(1, 2, 3))
+
+
+@pytest.mark.parametrize("name, number_type", [("float", float),
+                                               ("decimal", Decimal),
+                                               ("fraction", Fraction)])
+def test_backends_intersect_planes(name, number_type):
+  with numeric_backend(name) as backend:
+    assert backend.name == name
+    planes = [Plane(Point3D(1, 0, 0), Vector3D(1, 1, 0)),
+              Plane(Point3D(0, 2, 0), Vector3D(0, 1, 1)),
+              Plane(Point3D(0, 0, 3), Vector3D(1, 0, 1))]
+    line = GeometryUtils.intersection(planes[0], planes[1])
+    point = GeometryUtils.intersection(planes[2], line)
+  assert all(isinstance(coord, number_type) for coord in point)
+  assert all(math.isclose(float(coord), value, abs_tol=1e-12)
+             for coord, value in zip(point, (1, 0, 2)))
+  assert current_backend().name == "float"
+
+
+def test_fraction_backend_is_exact():
+  with numeric_backend("fraction"):
+    point = Point3D(0.1, 0.2, 0) + Point3D(0.2, 0.1, 0)
+    assert point.x == point.y
+    assert Vector3D(3, 4, 0).module == 5
+
+
+def test_decimal_backend_precision():
+  with numeric_backend("decimal", precision=50):
+    assert len(str(Vector3D(2, 0, 0).module.sqrt())) == 51
+
+
+def test_primitives_keep_their_backend():
+  with numeric_backend("fraction"):
+    point = Point3D(1, 2, 3)
+  moved = point + (0.5, 0, 0)
+  assert point.backend.name == moved.backend.name == "fraction"
+  assert isinstance(moved.x, Fraction)
+  assert isinstance((point * 0.5).x, Fraction)
+
+
+@pytest.mark.parametrize("name, number_type", [("decimal", Decimal),
+                                               ("fraction", Fraction)])
+def test_pickled_primitives_keep_their_backend(name, number_type):
+  with numeric_backend(name):
+    point = Point3D(1, 2, 3)
+    entities = (point, Vector3D(0, 0, 2), Plane(point, Vector3D(0, 0, 1)),
+                Line3D(point, Vector3D(1, 0, 0)))
+  for entity in entities:
+    restored = pickle.loads(pickle.dumps(entity))
+    assert restored.backend.name == name
+    assert all(isinstance(number, number_type) for number in (
+        restored.coords if isinstance(restored, Point3D)
+        else restored.coefficients))
+  assert pickle.loads(pickle.dumps(point)) + point == point * 2
+
+
+def test_backends_are_not_mixed():
+  with numeric_backend("decimal"):
+    point = Point3D(1, 2, 3)
+    plane = Plane(point, Vector3D(0, 0, 1))
+  with pytest.raises(ValueError):
+    point + Point3D(1, 1, 1)
+  with pytest.raises(ValueError):
+    Plane(point, Vector3D(0, 0, 1))
+  with pytest.raises(ValueError):
+    GeometryUtils.intersection(plane, Plane(Point3D(0, 0, 0),
+                                            Vector3D(1, 0, 0)))
+
+
+def test_unknown_backend():
+  with pytest.raises(ValueError):
+    numeric_backend("complex").__enter__()
@@ -0,0 +1,152 @@
+"""Tests for the persistent cache of computed zone geometry."""
+
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from geometry_cache import (GeometryCache, MemoryCache, cache_key,
+                            default_cache)
+from primitive_crystal import PrimitiveCrystal
+from test_zone_polyhedron_3d import load_index_3d
+
+
+def load_index_2d():
+  path = os.path.join(ROOT, "2d Brillouin Zone", "index.py")
+  spec = importlib.util.spec_from_file_location("index_2d", path)
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return module
+
+
+def test_cache_key_depends_on_parameters():
+  key = cache_key(lattice="fcc", size=3, vectors=[[0.5, 0.5, 0]])
+  assert key == cache_key(size=3, vectors=[[0.5, 0.5, 0]], lattice="fcc")
+  assert key != cache_key(lattice="fcc", size=4, vectors=[[0.5, 0.5, 0]])
+
+
+def test_cache_is_used_only_if_its_directory_is_set(monkeypatch, tmp_path):
+  monkeypatch.delenv("BRILLOUIN_CACHE", raising=False)
+  assert default_cache() is None
+  monkeypatch.setenv("BRILLOUIN_CACHE", "")
+  assert default_cache() is None
+  monkeypatch.setenv("BRILLOUIN_CACHE", str(tmp_path))
+  assert default_cache().directory == str(tmp_path)
+
+
+def test_cache_computes_once(tmp_path):
+  cache = GeometryCache(str(tmp_path))
+  calls = []
+
+  def compute():
+    calls.append(1)
+    return {"vertices": np.arange(6.0).reshape(2, 3)}
+
+  first = cache.get("entry", compute)
+  second = cache.get("entry", compute)
+  assert len(calls) == 1
+  assert np.array_equal(first["vertices"], second["vertices"])
+
+
+def test_broken_entry_is_computed_again(tmp_path):
+  cache = GeometryCache(str(tmp_path))
+  (tmp_path / "entry.npz").write_bytes(b"broken")
+  assert cache.load("entry") is None
+  arrays = cache.get("entry", lambda: {"faces": np.arange(3)})
+  assert cache.load("entry")["faces"].tolist() == arrays["faces"].tolist()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+  cache = GeometryCache(str(tmp_path), max_size=1)
+  for time, key in enumerate(("first", "second")):
+    cache.save(key, {"data": np.arange(100)})
+    os.utime(tmp_path / (key + ".npz"), (time, time))
+  cache.save("third", {"data": np.arange(100)})
+  # The limit is too small for two entries, only the new one is kept.
+  assert sorted(os.listdir(tmp_path)) == ["third.npz"]
+
+
+def test_memory_cache_keeps_recent_entries():
+  cache = MemoryCache(max_entries=2)
+  calls = []
+
+  def compute():
+    calls.append(1)
+    return {"data": np.arange(3)}
+
+  first = cache.get("first", compute)
+  cache.get("second", compute)
+  assert cache.get("first", compute) is first
+  cache.get("third", compute)
+  # The second entry is the least recently used one.
+  assert len(cache) == 2 and len(calls) == 3
+  cache.get("second", compute)
+  assert len(calls) == 4
+  with pytest.raises(ValueError):
+    first["data"][0] = 1
+
+
+def test_zone_of_another_period_is_scaled_in_memory(monkeypatch):
+  index = load_index_3d()
+  monkeypatch.setattr(index, "CACHE", None)
+  calls = []
+  compute_zone = index.compute_zone
+  monkeypatch.setattr(index, "compute_zone",
+                      lambda *args: calls.append(1) or compute_zone(*args))
+  lattice, zones_count = index.get_reciprocal_lattice_by_number("2")
+  computed = index.get_zone(lattice, zones_count)
+  double = index.FaceCenteredReciprocalLattice(2 * index.WIDTH, lattice.size,
+                                               index.CENTER)
+  scaled = index.get_zone(double, zones_count)
+  assert len(calls) == 1
+  for name in ("atoms", "vertices", "planes"):
+    assert np.allclose(scaled[name], computed[name] / 2)
+  index.get_zone(lattice, zones_count, 2)
+  assert len(calls) == 2
+
+
+def test_zone_is_loaded_from_cache(tmp_path):
+  index = load_index_3d()
+  cache = GeometryCache(str(tmp_path))
+  lattice, zones_count = index.get_reciprocal_lattice_by_number("2")
+  computed = index.get_zone(lattice, zones_count, 1, cache)
+  assert len(os.listdir(tmp_path)) == 1
+  cached = index.get_zone(lattice, zones_count, 1, cache)
+  for name, array in computed.items():
+    assert np.array_equal(array, cached[name])
+  # The truncated octahedron of the face-centered lattice.
+  assert len(computed["face_offsets"]) - 1 == 14
+
+
+def test_zone_of_another_period_is_scaled_from_cache(tmp_path):
+  index = load_index_3d()
+  cache = GeometryCache(str(tmp_path))
+  lattice, zones_count = index.get_reciprocal_lattice_by_number("2")
+  computed = index.get_zone(lattice, zones_count, 1, cache)
+  double = index.FaceCenteredReciprocalLattice(2 * index.WIDTH, lattice.size,
+                                               index.CENTER)
+  scaled = index.get_zone(double, zones_count, 1, cache)
+  # The period is doubled, the reciprocal lattice is halved.
+  assert len(os.listdir(tmp_path)) == 1
+  for name in ("atoms", "vertices", "planes"):
+    assert np.allclose(scaled[name], computed[name] / 2)
+
+
+def test_geometry_is_keyed_by_crystal_parameters(tmp_path):
+  index = load_index_2d()
+  cache = GeometryCache(str(tmp_path))
+  crystal = PrimitiveCrystal(index.WIDTH, 2, index.CENTER)
+  computed = index.get_geometry(crystal, cache, with_polygons=False)
+  cached = index.get_geometry(PrimitiveCrystal(index.WIDTH, 2, index.CENTER),
+                              cache, with_polygons=False)
+  assert len(os.listdir(tmp_path)) == 1
+  for name, array in computed.items():
+    assert np.array_equal(array, cached[name])
+  # The period and the size of the crystal are parts of the key.
+  index.get_geometry(PrimitiveCrystal(index.WIDTH / 2, 2, index.CENTER),
+                     cache, with_polygons=False)
+  index.get_geometry(PrimitiveCrystal(index.WIDTH, 3, index.CENTER),
+                     cache, with_polygons=False)
+  assert len(os.listdir(tmp_path)) == 3
@@ -0,0 +1,54 @@
+"""Tests for the row-streaming PNG and TIFF writers."""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import image_stream
+from image_stream import write_image
+
+
+@pytest.mark.parametrize("extension", [".png", ".tif", ".TIFF"])
+@pytest.mark.parametrize("shape", [(1, 1), (300, 7), (130, 260)])
+def test_images_are_read_back(tmp_path, extension, shape):
+  pixels = np.random.default_rng(1).integers(0, 256, shape + (4,),
+                                             dtype=np.uint8)
+  file_name = str(tmp_path / ("image" + extension))
+  write_image(file_name, pixels, rows_per_chunk=64)
+  with Image.open(file_name) as image:
+    assert image.mode == "RGBA"
+    assert np.array_equal(np.asarray(image), pixels)
+
+
+def test_memory_mapped_image_is_streamed(tmp_path):
+  buffer_name = str(tmp_path / "pixels.npy")
+  pixels = np.lib.format.open_memmap(buffer_name, mode="w+", dtype=np.uint8,
+                                     shape=(1000, 50, 4))
+  pixels[:] = (10, 20, 30, 255)
+  pixels[500:] = (40, 50, 60, 128)
+  pixels.flush()
+  write_image(str(tmp_path / "image.png"), np.load(buffer_name, mmap_mode="r"))
+  with Image.open(tmp_path / "image.png") as image:
+    assert image.getpixel((0, 499)) == (10, 20, 30, 255)
+    assert image.getpixel((49, 500)) == (40, 50, 60, 128)
+
+
+def test_unknown_format_is_rejected(tmp_path):
+  with pytest.raises(ValueError):
+    write_image(str(tmp_path / "image.jpg"), np.zeros((1, 1, 4), np.uint8))
+
+
+def test_too_large_tiff_is_rejected_before_all_strips(tmp_path, monkeypatch):
+  monkeypatch.setattr(image_stream, "TIFF_LIMIT", 3000)
+  pixels = np.random.default_rng(2).integers(0, 256, (100, 10, 4),
+                                             dtype=np.uint8)
+  compressed = []
+  compress = image_stream.zlib.compress
+  monkeypatch.setattr(image_stream.zlib, "compress",
+                      lambda *args: compressed.append(1) or compress(*args))
+  file_name = tmp_path / "image.tif"
+  with pytest.raises(ValueError):
+    write_image(str(file_name), pixels, rows_per_chunk=10)
+  # Strips of 400 random bytes, 10 of them do not fit into 3000 bytes.
+  assert len(compressed) < 10
+  assert not file_name.exists()
@@ -0,0 +1,45 @@
+"""Tests for the point groups of 3D lattices."""
+
+import numpy as np
+import pytest
+
+from lattice_symmetry import orbit_representatives, permutations, point_group
+from test_zone_polyhedron_3d import load_index_3d
+
+
+@pytest.mark.parametrize("lattice_number, operations_count", [
+    ("1", 48), ("2", 48), ("3", 48), ("4", 24), ("5", 16)])
+def test_point_group_orders(lattice_number, operations_count):
+  index = load_index_3d()
+  lattice, _ = index.get_reciprocal_lattice_by_number(lattice_number)
+  operations = point_group([tuple(map(float, vector))
+                            for vector in lattice.reciprocal_primitive_vectors])
+  assert len(operations) == operations_count
+  assert np.allclose(operations[0], np.eye(3))
+  for operation in operations:
+    assert np.allclose(operation @ operation.T, np.eye(3))
+
+
+def test_orthorhombic_lattice_has_eight_operations():
+  operations = point_group(np.diag((1, 2, 3)))
+  assert len(operations) == 8
+  assert all(np.allclose(np.abs(operation), np.eye(3))
+             for operation in operations)
+
+
+def test_flat_lattice_is_rejected():
+  with pytest.raises(ValueError):
+    point_group(((1, 0, 0), (0, 1, 0), (1, 1, 0)))
+
+
+def test_orbits_of_cube_vectors():
+  operations = point_group(np.eye(3))
+  vectors = np.array([(1, 0, 0), (0, 1, 0), (1, 1, 0), (0, 0, -1),
+                      (-1, 0, 0), (0, -1, 0), (0, 0, 1), (-1, 1, 0),
+                      (1, -1, 0), (-1, -1, 0), (1, 0, 1), (1, 0, -1),
+                      (-1, 0, 1), (-1, 0, -1), (0, 1, 1), (0, 1, -1),
+                      (0, -1, 1), (0, -1, -1)], dtype=np.float64)
+  table = permutations(vectors, operations)
+  assert np.array_equal(orbit_representatives(table), [0, 2])
+  with pytest.raises(ValueError):
+    permutations(vectors[:3], operations)
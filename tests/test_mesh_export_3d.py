@@ -0,0 +1,95 @@
+"""Tests for the mesh export of 3D zones."""
+
+import json
+
+import numpy as np
+import pytest
+
+from mesh_export import triangles, write_mesh
+from zone_polyhedron import ConvexPolyhedron
+
+COLORS = [(1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 0, 0), (0, 1, 0), (0, 0, 1)]
+
+
+def cube_mesh():
+  cube = ConvexPolyhedron.box((0, 0, 0), 1)
+  faces = np.concatenate(cube.faces)
+  face_offsets = np.cumsum([0] + [len(face) for face in cube.faces])
+  return (cube.vertices, faces, face_offsets)
+
+
+def test_fan_triangles():
+  indices, triangle_faces = triangles([0, 1, 2, 3, 4, 5, 6, 7], [0, 5, 8])
+  assert indices.tolist() == [[0, 1, 2], [0, 2, 3], [0, 3, 4], [5, 6, 7]]
+  assert triangle_faces.tolist() == [0, 0, 0, 1]
+
+
+def test_binary_stl(tmp_path):
+  file_name = str(tmp_path / "cube.stl")
+  write_mesh(file_name, *cube_mesh(), face_colors=COLORS)
+  data = open(file_name, "rb").read()
+  count = int(np.frombuffer(data[80:84], dtype='<u4')[0])
+  assert count == 12 and len(data) == 84 + 50 * count
+  records = np.frombuffer(data[84:], dtype=np.dtype([
+      ('normal', '<f4', 3), ('vertices', '<f4', (3, 3)),
+      ('attribute', '<u2')]))
+  # Normals are directed out of the cube.
+  centers = records['vertices'].mean(axis=1)
+  assert np.all(np.sum(records['normal'] * centers, axis=1) > 0)
+  assert records['attribute'][0] == 0x8000 | 31 << 10
+
+
+def test_binary_ply(tmp_path):
+  vertices, faces, face_offsets = cube_mesh()
+  file_name = str(tmp_path / "cube.ply")
+  write_mesh(file_name, vertices, faces, face_offsets, face_colors=COLORS)
+  data = open(file_name, "rb").read()
+  header, body = data.split(b"end_header\n")
+  assert b"element vertex 8" in header and b"element face 6" in header
+  assert np.array_equal(np.frombuffer(body[:96], dtype='<f4').reshape(8, 3),
+                        vertices)
+  records = np.frombuffer(body[96:], dtype=np.dtype([
+      ('count', 'u1'), ('indices', '<u4', 4), ('color', 'u1', 3)]))
+  assert records['count'].tolist() == [4] * 6
+  assert np.array_equal(records['indices'].ravel(), faces)
+  assert records['color'][1].tolist() == [0, 255, 0]
+
+
+def test_obj_with_materials(tmp_path):
+  file_name = str(tmp_path / "cube.obj")
+  write_mesh(file_name, *cube_mesh(), face_colors=COLORS)
+  lines = open(file_name).read().splitlines()
+  assert lines[1] == "mtllib cube.mtl"
+  assert sum(line.startswith("v ") for line in lines) == 8
+  assert sum(line.startswith("f ") for line in lines) == 6
+  assert sum(line.startswith("usemtl") for line in lines) == 3
+  assert "Kd 1.0000 0.0000 0.0000" in open(str(tmp_path / "cube.mtl")).read()
+
+
+@pytest.mark.parametrize("extension", [".gltf", ".glb"])
+def test_gltf(tmp_path, extension):
+  vertices, faces, face_offsets = cube_mesh()
+  file_name = str(tmp_path / ("cube" + extension))
+  write_mesh(file_name, vertices, faces, face_offsets, face_colors=COLORS)
+  data = open(file_name, "rb").read()
+  if extension == ".glb":
+    magic, version, length, json_length = np.frombuffer(data[:16], '<u4')
+    assert (magic, version, length) == (0x46546C67, 2, len(data))
+    gltf = json.loads(data[20:20 + json_length])
+    binary = data[28 + json_length:]
+  else:
+    gltf = json.loads(data)
+    binary = None
+  primitives = gltf["meshes"][0]["primitives"]
+  assert len(primitives) == len(gltf["materials"]) == 3
+  assert sum(gltf["accessors"][primitive["indices"]]["count"]
+             for primitive in primitives) == 36
+  assert gltf["buffers"][0]["byteLength"] == 8 * 12 + 36 * 4
+  if binary is not None:
+    assert np.array_equal(np.frombuffer(binary[:96], '<f4').reshape(8, 3),
+                          vertices)
+
+
+def test_unknown_format(tmp_path):
+  with pytest.raises(ValueError):
+    write_mesh(str(tmp_path / "cube.x3d"), *cube_mesh())
@@ -0,0 +1,51 @@
+"""Tests for the software rasterizer of 3D zone meshes."""
+
+import numpy as np
+
+from mesh_raster import render_mesh, view_axes
+from zone_polyhedron import ConvexPolyhedron
+
+WHITE = [255, 255, 255]
+
+
+def cube_mesh():
+  cube = ConvexPolyhedron.box((0, 0, 0), 1)
+  faces = np.concatenate(cube.faces)
+  face_offsets = np.cumsum([0] + [len(face) for face in cube.faces])
+  return (cube.vertices, faces, face_offsets)
+
+
+def test_view_axes_are_orthonormal():
+  axes = view_axes()
+  assert np.allclose(axes @ axes.T, np.eye(3))
+  # The z axis is directed up on the screen.
+  assert axes[1, 2] > 0
+
+
+def test_cube_is_drawn_in_the_middle():
+  image = np.asarray(render_mesh(*cube_mesh(), image_size=(80, 60)))
+  assert image.shape == (60, 80, 3)
+  assert image[0, 0].tolist() == WHITE
+  assert image[30, 40].tolist() != WHITE
+  # The faces are shaded, the edges are black.
+  colors = {tuple(color) for color in image.reshape(-1, 3).tolist()}
+  assert (0, 0, 0) in colors and len(colors) >= 4
+
+
+def test_hidden_points_are_not_drawn():
+  vertices, faces, face_offsets = cube_mesh()
+  eye = view_axes()[2]
+  points = [eye * 3, -eye * 3]
+  image = np.asarray(render_mesh(vertices, faces, face_offsets,
+                                 image_size=(80, 80), points=points))
+  blue = np.all(image == [0, 0, 255], axis=2)
+  # Both points are projected to the middle, only the front one is seen.
+  assert blue[40, 40]
+  front = render_mesh(vertices, faces, face_offsets, image_size=(80, 80),
+                      points=points[1:])
+  assert not np.all(np.asarray(front)[40, 40] == [0, 0, 255])
+
+
+def test_supersampling_keeps_size():
+  image = render_mesh(*cube_mesh(), image_size=(50, 40), supersampling=3)
+  assert image.size == (50, 40)
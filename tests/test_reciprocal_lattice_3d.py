@@ -1,12 +1,19 @@
 """Tests for the 3D reciprocal lattice models."""
 
+import itertools
 import math
 from decimal import Decimal
 
+import numpy as np
+import pytest
+
 from body_centered_reciprocal_lattice import BodyCenteredReciprocalLattice
 from face_centered_reciprocal_lattice import FaceCenteredReciprocalLattice
-from geometry import GeometryUtils, Point3D
+from geometry import GeometryUtils, Point3D, numeric_backend
+from hexagonal_close_packed_reciprocal_lattice import (
+    HexagonalClosePackedReciprocalLattice)
 from primitive_reciprocal_lattice import PrimitiveReciprocalLattice
+from reciprocal_lattice import reduced_basis, commensurate_metric
 
 WIDTH = 0.05
 CENTER = Point3D(0, 0, 0)
@@ -63,15 +70,106 @@ def test_lattice_points_are_finite():
   for shell in lattice.points():
     for point in shell:
       for coord in point:
-        assert isinstance(coord, Decimal)
-        assert coord.is_finite()
+        assert isinstance(coord, float)
+        assert math.isfinite(coord)
+
+
+def test_decimal_lattice_points():
+  with numeric_backend("decimal", precision=40):
+    lattice = PrimitiveReciprocalLattice(WIDTH, 2, CENTER)
+    vector = lattice.reciprocal_primitive_vectors[0]
+    module = vector.module
+  assert all(isinstance(coord, Decimal) for coord in vector)
+  assert math.isclose(module, 2 * math.pi / (WIDTH / 2))
+  # The lattice keeps the backend of its constructor.
+  assert lattice.backend.name == "decimal"
+  assert all(isinstance(coord, Decimal)
+             for vector in lattice.reciprocal_primitive_vectors
+             for coord in vector)
 
 
 def test_shells_are_equidistant_and_sorted():
   lattice = PrimitiveReciprocalLattice(WIDTH, 2, CENTER)
-  previous = Decimal(-1)
+  previous = -1
   for shell in lattice.points():
     distances = [GeometryUtils.distance(CENTER, point) for point in shell]
-    assert max(distances) - min(distances) < Decimal("0.01")
+    assert max(distances) - min(distances) < 0.01
     assert min(distances) > previous
     previous = max(distances)
+
+
+def test_lattice_enumerates_points_within_size_steps():
+  # Points reachable in at most size steps: |n1| + |n2| + |n3| <= size.
+  assert len(PrimitiveReciprocalLattice(WIDTH, 2, CENTER)._points) == 25
+  assert len(PrimitiveReciprocalLattice(WIDTH, 10, CENTER)._points) == 1561
+
+
+def test_lattice_points_are_integer_combinations():
+  lattice = FaceCenteredReciprocalLattice(WIDTH, 3, CENTER)
+  basis = [[float(coord) for coord in vector]
+           for vector in lattice.reciprocal_primitive_vectors]
+  for indices, point in zip(lattice._indices, lattice._points):
+    expected = [sum(int(n) * vector[axis] for n, vector in zip(indices, basis))
+                for axis in range(3)]
+    assert all(math.isclose(float(coord), value, abs_tol=1e-9)
+               for coord, value in zip(point, expected))
+
+
+def test_reciprocal_basis_is_calculated_once():
+  calls = []
+
+  class CountingLattice(PrimitiveReciprocalLattice):
+    @property
+    def reciprocal_primitive_vectors(self):
+      calls.append(1)
+      return super().reciprocal_primitive_vectors
+
+  CountingLattice(WIDTH, 6, CENTER)
+  assert len(calls) == 1
+
+
+def test_shells_do_not_depend_on_size():
+  # A lattice of size 1 does not contain the third shell of the fcc
+  # lattice, the shells are enumerated lazily out of the block.
+  small = FaceCenteredReciprocalLattice(WIDTH, 1, CENTER)
+  large = FaceCenteredReciprocalLattice(WIDTH, 8, CENTER)
+  shells = list(itertools.islice(small.shells(), 8))
+  assert [len(shell) for shell in shells] == [1, 8, 6, 12, 24, 8, 6, 24]
+  assert shells == list(itertools.islice(large.points(), 8))
+
+
+def test_shells_are_sorted_by_distance():
+  lattice = BodyCenteredReciprocalLattice(WIDTH, 1, CENTER)
+  distances = []
+  for shell in itertools.islice(lattice.shells(), 20):
+    shell_distances = [float(GeometryUtils.distance(CENTER, point))
+                       for point in shell]
+    assert max(shell_distances) - min(shell_distances) < 0.01
+    distances.append(shell_distances[0])
+  assert distances == sorted(distances)
+
+
+def test_reduced_basis_spans_the_same_lattice():
+  basis = np.array([[1.0, 0, 0], [5, 1, 0], [7, 3, 1]])
+  reduced = reduced_basis(basis)
+  assert np.allclose(np.sort(np.linalg.norm(reduced, axis=1)), 1)
+  transform = reduced @ np.linalg.inv(basis)
+  assert np.allclose(transform, np.round(transform))
+  assert math.isclose(abs(np.linalg.det(transform)), 1)
+
+
+def test_commensurate_metric_is_integer():
+  matrix, scale = commensurate_metric([[2.0, -1.0, 0], [-1.0, 2.0, 0],
+                                       [0, 0, 0.75]])
+  assert matrix.dtype.kind == 'i'
+  assert np.allclose(matrix * scale, [[2, -1, 0], [-1, 2, 0], [0, 0, 0.75]])
+  matrix, scale = commensurate_metric(np.diag((1, 2, np.sqrt(2))))
+  assert matrix.dtype.kind == 'f' and scale == 1
+
+
+@pytest.mark.parametrize("a", [1e-4, 1, 1e4])
+def test_shells_do_not_depend_on_scale(a):
+  lattice = HexagonalClosePackedReciprocalLattice(a, 2, CENTER, c_to_a=1.7)
+  sizes = [len(shell) for shell in itertools.islice(lattice.shells(), 12)]
+  assert sizes == [1, 2, 6, 2, 12, 12, 2, 6, 12, 12, 6, 12]
+  assert [len(shell) for shell in lattice.points()][:4] == [1, 2, 6, 2]
@@ -0,0 +1,102 @@
+"""Tests for the regions between drawn lines and their adjacency."""
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from sympy.geometry import Point
+
+from bragg_lines import line_intersections
+from primitive_crystal import PrimitiveCrystal
+from region_graph import (NO_CROSSING, connected_components,
+                          crossing_labels, region_adjacency,
+                          region_distances)
+from test_zone_raster_2d import complete_lines
+from zone_raster import zone_indices
+
+
+def test_connected_components_unite_runs():
+  # The U shape has two runs in the upper rows which meet at the bottom.
+  mask = np.array([[1, 0, 1, 0, 1],
+                   [1, 0, 1, 0, 0],
+                   [1, 1, 1, 0, 1],
+                   [0, 0, 0, 0, 1]], dtype=bool)
+  labels, count = connected_components(mask)
+  assert count == 3
+  assert labels.dtype == np.int32
+  assert labels.tolist() == [[1, 0, 1, 0, 2],
+                             [1, 0, 1, 0, 0],
+                             [1, 1, 1, 0, 3],
+                             [0, 0, 0, 0, 3]]
+
+
+def test_diagonal_pixels_are_not_connected():
+  labels, count = connected_components(np.eye(3, dtype=bool))
+  assert count == 3
+  assert connected_components(np.zeros((2, 2), dtype=bool))[1] == 0
+
+
+def test_regions_across_a_crossing_are_not_adjacent():
+  mask = np.ones((9, 9), dtype=bool)
+  mask[4] = mask[:, 4] = False
+  labels, count = connected_components(mask)
+  assert count == 4
+  edges = region_adjacency(labels)
+  assert edges.tolist() == [[1, 2], [1, 3], [2, 4], [3, 4]]
+  assert region_distances(edges, count, 1).tolist() == [-1, 0, 1, 1, 2]
+
+
+def test_crossing_labels_of_windows():
+  labels = crossing_labels(np.array([[2.5, 2.5], [0.2, 6.7]]), (8, 6), 1)
+  assert labels.dtype == np.int32
+  assert np.count_nonzero(labels == 1) == 9
+  assert np.all(labels[1:4, 1:4] == 1)
+  # The window of the second crossing is cut by the border of the image.
+  assert np.count_nonzero(labels == 2) == 6
+  assert np.all(labels[5:, :2] == 2)
+  assert np.count_nonzero(labels == NO_CROSSING) == 48 - 15
+
+
+def test_regions_across_a_small_angle_crossing_are_not_adjacent():
+  # Lines at a small angle share pixels with at most two line neighbours
+  # near the crossing.
+  image = Image.new("L", (41, 41), 255)
+  draw = ImageDraw.Draw(image)
+  draw.line((0, 20.5, 41, 20.5), fill=0)
+  draw.line((0, 15.375, 41, 25.625), fill=0)
+  labels, count = connected_components(np.asarray(image) != 0)
+  assert count == 4
+  assert len(region_adjacency(labels)) == 5
+  crossings = line_intersections(np.array([[0, 1, 0], [-1, 4, 0]]))
+  edges = region_adjacency(labels, crossing_labels(crossings + 20.5,
+                                                   labels.shape))
+  assert len(edges) == 4
+  assert sorted(region_distances(edges, count, 1).tolist()) == [-1, 0, 1, 1, 2]
+
+
+def test_region_distances_of_disconnected_graph():
+  distances = region_distances(np.array([[1, 2]]), 3, 2)
+  assert distances.tolist() == [-1, 1, 0, -1]
+
+
+def test_regions_of_drawn_lines_are_zones():
+  crystal = PrimitiveCrystal(40, 3, Point(0, 0))
+  lines = complete_lines(crystal)
+  image = Image.new("L", (300, 300), 255)
+  draw = ImageDraw.Draw(image)
+  for vector_x, vector_y, offset in lines.tolist():
+    middle = np.array((vector_x, vector_y)) * offset / (
+        vector_x ** 2 + vector_y ** 2) + 150
+    direction = np.array((-vector_y, vector_x)) * 1000
+    draw.line(tuple(middle - direction) + tuple(middle + direction), fill=0)
+  labels, count = connected_components(np.asarray(image) != 0)
+  distances = region_distances(region_adjacency(labels), count,
+                               labels[150, 150])
+  zones = distances[labels] + 1
+  expected = zone_indices(lines, (300, 300), (150, 150), crystal.radius / 2)
+  # Zones agree off the lines where regions are wider than pixels.
+  padded = np.pad(labels == 0, 1)
+  near_lines = sum(padded[row:row + 300, column:column + 300]
+                   for row in range(3) for column in range(3)) > 0
+  known = ~near_lines & (expected != 0) & (expected <= 10)
+  assert np.count_nonzero(known) > 6000
+  assert np.array_equal(zones[known], expected[known])
@@ -0,0 +1,70 @@
+"""Tests for the tiled rendering of 2D zone images."""
+
+import itertools
+
+import numpy as np
+import pytest
+from PIL import Image
+from sympy.geometry import Point
+
+from bragg_lines import bragg_line_coefficients, points_array
+from primitive_crystal import PrimitiveCrystal
+from test_zone_raster_2d import complete_lines
+from tiled_render import render_tile, render_tiles, tile_windows
+from zone_polygons import zone_polygons
+
+CENTER = Point(0, 0)
+IMAGE_SIZE = (130, 110)
+COLORS = ((200, 0, 0, 255), (0, 200, 0, 255), (0, 0, 200, 255))
+
+
+def scene(polygons=False, supersampling=1):
+  crystal = PrimitiveCrystal(20, 3, CENTER)
+  lines = complete_lines(crystal)
+  shells = list(itertools.islice(crystal.points(), 1, 4))
+  result = {"image_center": (60.5, 50), "supersampling": supersampling,
+            "lines": lines, "radius": crystal.radius / 2, "polygons": None,
+            "bragg_lines": bragg_line_coefficients(shells, CENTER),
+            "atoms": points_array([point for shell in shells
+                                   for point in shell]),
+            "zone_colors": COLORS, "zones_count": 5,
+            "background": (255, 255, 255, 255), "line_color": "black",
+            "line_width": 1, "atom_color": (0, 0, 0), "atom_radius": 2.5}
+  if polygons:
+    domain = np.array([(-80, -80), (80, -80), (80, 80), (-80, 80)],
+                      dtype=np.float64)
+    result["polygons"] = zone_polygons(lines, 5, domain)
+  return result
+
+
+def test_tile_windows_cover_the_image():
+  windows = tile_windows((5, 3), 2)
+  assert windows == [(0, 0, 2, 2), (2, 0, 4, 2), (4, 0, 5, 2),
+                     (0, 2, 2, 3), (2, 2, 4, 3), (4, 2, 5, 3)]
+
+
+@pytest.mark.parametrize("polygons, supersampling",
+                         [(False, 1), (True, 1), (False, 3), (True, 2)])
+def test_tiles_are_parts_of_the_image(polygons, supersampling):
+  tiled_scene = scene(polygons, supersampling)
+  image = render_tile(tiled_scene, IMAGE_SIZE, (0, 0) + IMAGE_SIZE)
+  assert image.shape == (110, 130, 4)
+  assert len(np.unique(image.reshape(-1, 4), axis=0)) >= 5
+  for left, top, right, bottom in tile_windows(IMAGE_SIZE, 32):
+    tile = render_tile(tiled_scene, IMAGE_SIZE, (left, top, right, bottom))
+    assert np.array_equal(tile, image[top:bottom, left:right])
+
+
+@pytest.mark.parametrize("workers, extension", [(1, ".png"), (2, ".tif")])
+def test_tiles_are_saved(tmp_path, workers, extension):
+  tiled_scene = scene(polygons=True)
+  file_name = str(tmp_path / ("poster" + extension))
+  render_tiles(file_name, IMAGE_SIZE, tiled_scene, tile_size=48,
+               workers=workers)
+  with Image.open(file_name) as image:
+    assert np.array_equal(np.asarray(image),
+                          render_tile(tiled_scene, IMAGE_SIZE,
+                                      (0, 0) + IMAGE_SIZE))
+  # The temporary buffer is removed.
+  assert [path.name for path in tmp_path.iterdir()] == [
+      "poster" + extension]
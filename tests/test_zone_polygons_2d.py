@@ -0,0 +1,102 @@
+"""Tests for the exact polygons of 2D Brillouin zones."""
+
+import itertools
+
+import numpy as np
+import pytest
+from sympy.geometry import Point
+
+from bragg_lines import bragg_line_coefficients
+from primitive_crystal import PrimitiveCrystal
+from crystal_symmetry import fundamental_wedge, point_group, symmetric_polygons
+from zone_polygons import (circle_polygon, clip_polygon, load_polygons,
+                           merge_polygons, save_polygons, zone_polygons)
+
+CENTER = Point(0, 0)
+
+
+def polygon_area(polygon):
+  x, y = polygon[:, 0], polygon[:, 1]
+  return 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def crystal_polygons(crystal, zones_count):
+  shells = itertools.takewhile(
+      lambda points: next(iter(points)).distance(CENTER) < crystal.radius,
+      itertools.islice(crystal.points(), 1, None))
+  return zone_polygons(bragg_line_coefficients(shells, CENTER), zones_count,
+                       circle_polygon(crystal.radius / 2))
+
+
+def test_clip_polygon():
+  square = np.array([(0, 0), (2, 0), (2, 2), (0, 2)], dtype=np.float64)
+  part = clip_polygon(square, np.array([1.0, 0, 1]))
+  assert polygon_area(part) == pytest.approx(2)
+  assert np.all(part[:, 0] <= 1)
+
+
+def test_first_zone_of_square_lattice():
+  polygons = crystal_polygons(PrimitiveCrystal(2, 4, CENTER), 1)
+  assert len(polygons) == 1
+  zone, polygon = polygons[0]
+  assert zone == 1
+  assert sorted(map(tuple, np.round(polygon, 9).tolist())) == \
+      [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+def test_zone_areas():
+  zones_count = 6
+  polygons = crystal_polygons(PrimitiveCrystal(20, 4, CENTER), zones_count)
+  assert [zone for zone, _ in polygons] == \
+      sorted(zone for zone, _ in polygons)
+  for zone in range(1, zones_count + 1):
+    area = sum(polygon_area(polygon) for number, polygon in polygons
+               if number == zone)
+    assert area == pytest.approx(400)
+
+
+def test_merged_ring_keeps_its_hole():
+  def square(x, y):
+    return np.array([(x, y), (x + 1, y), (x + 1, y + 1), (x, y + 1)],
+                    dtype=np.float64)
+
+  # Every other square is clockwise, the zone 1 does not touch the ring.
+  polygons = [(2, square(x, y)[::(-1) ** (x + y)]) for x in range(3)
+              for y in range(3) if (x, y) != (1, 1)] + [(1, square(5, 5))]
+  merged = merge_polygons(polygons)
+  assert [zone for zone, _ in merged] == [1, 2]
+  assert polygon_area(merged[1][1]) == pytest.approx(8)
+  corners = set(map(tuple, merged[1][1].tolist()))
+  assert {(0, 0), (3, 3), (1, 1), (2, 2)} <= corners
+
+
+def test_wedge_images_merge_into_zones():
+  crystal = PrimitiveCrystal(20, 4, CENTER)
+  shells = itertools.takewhile(
+      lambda points: next(iter(points)).distance(CENTER) < crystal.radius,
+      itertools.islice(crystal.points(), 1, None))
+  lines = bragg_line_coefficients(shells, CENTER)
+  operations = point_group(lines[:, :2])
+  wedge = circle_polygon(crystal.radius / 2)
+  for line in fundamental_wedge(operations):
+    wedge = clip_polygon(wedge, line)
+  merged = merge_polygons(symmetric_polygons(zone_polygons(lines, 6, wedge),
+                                             operations))
+  whole = crystal_polygons(crystal, 6)
+  assert [zone for zone, _ in merged] == list(range(1, 7))
+  for zone, polygon in merged:
+    assert polygon_area(polygon) == pytest.approx(
+        sum(polygon_area(cell) for number, cell in whole if number == zone))
+  # The first zone is the square again, the sides of the wedge cancel.
+  assert np.allclose(np.max(np.abs(merged[0][1]), axis=1), 10)
+
+
+@pytest.mark.parametrize("file_name", ["zones.json", "zones.npz"])
+def test_save_and_load_polygons(tmp_path, file_name):
+  polygons = crystal_polygons(PrimitiveCrystal(20, 4, CENTER), 3)
+  path = str(tmp_path / file_name)
+  save_polygons(path, polygons)
+  loaded = load_polygons(path)
+  assert [zone for zone, _ in loaded] == [zone for zone, _ in polygons]
+  for (_, polygon), (_, loaded_polygon) in zip(polygons, loaded):
+    assert np.allclose(polygon, loaded_polygon)
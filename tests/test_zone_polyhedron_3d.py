@@ -0,0 +1,180 @@
+"""Tests for the half-space clipping engine of the first 3D zone."""
+
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+from array_geometry import PlaneArray
+from base_centered_reciprocal_lattice import BaseCenteredReciprocalLattice
+from body_centered_reciprocal_lattice import BodyCenteredReciprocalLattice
+from conftest import ROOT
+from face_centered_reciprocal_lattice import FaceCenteredReciprocalLattice
+from geometry import Point3D
+from hexagonal_close_packed_reciprocal_lattice import \
+    HexagonalClosePackedReciprocalLattice
+from primitive_reciprocal_lattice import PrimitiveReciprocalLattice
+from zone_polyhedron import (ConvexPolyhedron, Polyhedron,
+                             first_brillouin_zone, indexed_polyhedron,
+                             relevant_planes, zone_radius_bound)
+
+WIDTH = 0.05
+CENTER = Point3D(0, 0, 0)
+
+# (lattice class, zones count, vertices, faces, edges)
+LATTICES = [
+    (BodyCenteredReciprocalLattice, 2, 14, 12, 24), # rhombic dodecahedron
+    (FaceCenteredReciprocalLattice, 2, 24, 14, 36), # truncated octahedron
+    (PrimitiveReciprocalLattice, 2, 8, 6, 12), # cube
+    (HexagonalClosePackedReciprocalLattice, 3, 12, 8, 18), # hexagonal prism
+    (BaseCenteredReciprocalLattice, 2, 8, 6, 12), # rectangular prism
+]
+
+
+def load_index_3d():
+  path = os.path.join(ROOT, "3d Brillouin Zone", "index.py")
+  spec = importlib.util.spec_from_file_location("index_3d", path)
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return module
+
+
+def reciprocal_cell_volume(lattice):
+  basis = [[float(coord) for coord in vector]
+           for vector in lattice.reciprocal_primitive_vectors]
+  return abs(np.linalg.det(basis))
+
+
+def test_box_volume_and_edges():
+  box = ConvexPolyhedron.box((0, 0, 0), 1)
+  assert np.isclose(box.volume, 8)
+  assert len(box.edges) == 12
+
+
+def test_clip_cube_in_half():
+  box = ConvexPolyhedron.box((0, 0, 0), 1)
+  half = box.clip(np.zeros(3), np.array([1.0, 0, 0]), 7, 1e-9)
+  assert np.isclose(half.volume, 4)
+  assert len(half.vertices) == 8
+  assert sorted(half.face_planes.tolist()) == [-1] * 5 + [7]
+
+
+@pytest.mark.parametrize("lattice_class, zones_count, vertices, faces, edges",
+                         LATTICES)
+def test_first_zone_shape_and_volume(lattice_class, zones_count, vertices,
+                                     faces, edges):
+  lattice = lattice_class(WIDTH, 3, CENTER)
+  zone = first_brillouin_zone(lattice.bragg_planes(zones_count))
+  assert (len(zone.vertices), len(zone.faces), len(zone.edges)) == \
+      (vertices, faces, edges)
+  # The first zone is a primitive cell of the reciprocal lattice.
+  assert np.isclose(zone.volume, reciprocal_cell_volume(lattice))
+
+
+def test_half_edges_of_closed_and_open_surfaces():
+  box = ConvexPolyhedron.box((0, 0, 0), 1)
+  half_edges = box.half_edges
+  assert half_edges.shape == (24, 4)
+  origins, faces, following, twins = half_edges.T
+  assert np.array_equal(twins[twins], np.arange(24))
+  assert np.array_equal(origins[twins], origins[following])
+  assert np.array_equal(faces[following], faces)
+  square = Polyhedron(box.vertices, box.faces[:1], [0])
+  assert square.half_edges[:, 3].tolist() == [-1] * 4
+
+
+def test_indexed_polyhedron_shares_vertices():
+  # Two faces of the unit cube with unordered and slightly moved vertices.
+  faces = [np.array([(1, 0, 0), (1, 1, 1), (1, 1, 0), (1, 0, 1)]),
+           np.array([(0, 0, 1), (1, 1, 1.00001), (1, 0, 1), (0, 1, 1)])]
+  mesh = indexed_polyhedron(faces, [(1, 0, 0), (0, 0, 1)], [3, 5], 1e-3)
+  assert len(mesh.vertices) == 6 and len(mesh.edges) == 7
+  assert mesh.face_planes.tolist() == [3, 5]
+  # The shared edge is traversed in the opposite directions.
+  assert np.count_nonzero(mesh.half_edges[:, 3] >= 0) == 2
+
+
+@pytest.mark.parametrize("engine", ["clip", "planes"])
+def test_zone_polyhedron_is_closed_mesh(engine):
+  index = load_index_3d()
+  lattice, zones_count = index.get_reciprocal_lattice_by_number("4")
+  zone = index.get_zone_polyhedron(lattice, zones_count, engine)
+  assert len(zone.vertices) - len(zone.edges) + len(zone.faces) == 2
+  assert np.all(zone.half_edges[:, 3] >= 0)
+  assert np.isclose(zone.volume, reciprocal_cell_volume(lattice), rtol=1e-5)
+
+
+def test_first_zone_ignores_farther_planes():
+  lattice = FaceCenteredReciprocalLattice(WIDTH, 4, CENTER)
+  near = first_brillouin_zone(lattice.bragg_planes(2))
+  far = first_brillouin_zone(lattice.bragg_planes(6))
+  assert np.isclose(near.volume, far.volume)
+  assert len(near.vertices) == len(far.vertices)
+
+
+def test_relevant_planes_keep_the_zone():
+  lattice = FaceCenteredReciprocalLattice(WIDTH, 4, CENTER)
+  planes = lattice.bragg_planes(8)
+  relevant = relevant_planes(planes)
+  # The planes of the 8 hexagons and the 6 squares of 112 planes.
+  assert (len(planes), len(relevant)) == (112, 14)
+  zone = first_brillouin_zone(planes)
+  assert set(zone.face_planes.tolist()) <= set(relevant.tolist())
+  assert np.isclose(first_brillouin_zone(planes[relevant]).volume,
+                    zone.volume)
+
+
+def test_zone_radius_bound():
+  # The corners of the cube are the farthest points of its zone.
+  assert np.isclose(zone_radius_bound(np.eye(3)), np.sqrt(3) / 2)
+  # The sheared basis spans the same lattice.
+  assert np.isclose(zone_radius_bound([(1, 0, 0), (5, 1, 0), (3, 7, 1)]),
+                    np.sqrt(3) / 2)
+
+
+def test_relevant_planes_of_coplanar_vectors_are_rejected():
+  planes = PlaneArray([(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0)],
+                      [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0)])
+  with pytest.raises(ValueError):
+    relevant_planes(planes)
+
+
+def test_generous_zones_count_is_pruned():
+  index = load_index_3d()
+  lattice = FaceCenteredReciprocalLattice(WIDTH, 3, CENTER)
+  faces = index.get_zone_faces(lattice, 20, "planes")
+  assert len(faces) == 14
+
+
+def test_unbounded_zone_is_rejected():
+  planes = PlaneArray([(1, 0, 0), (-1, 0, 0)], [(1, 0, 0), (-1, 0, 0)])
+  with pytest.raises(ValueError):
+    first_brillouin_zone(planes)
+
+
+@pytest.mark.parametrize("lattice_number", ["1", "2", "3", "4", "5"])
+def test_clipping_matches_plane_intersections(lattice_number):
+  index = load_index_3d()
+  lattice, zones_count = index.get_reciprocal_lattice_by_number(lattice_number)
+  faces = {}
+  for engine in ("clip", "planes"):
+    faces[engine] = {frozenset(tuple(np.round(vertex, 2)) for vertex in face)
+                     for face in index.get_zone_faces(lattice, zones_count,
+                                                      engine)}
+  assert faces["clip"] == faces["planes"]
+
+
+@pytest.mark.parametrize("engine", ["clip", "planes"])
+def test_first_zone_enumerates_shells_once(engine, monkeypatch):
+  index = load_index_3d()
+  monkeypatch.setattr(index, "ENGINE", engine)
+  lattice, zones_count = index.get_reciprocal_lattice_by_number("2")
+  calls = []
+  shells = lattice.shells
+  monkeypatch.setattr(lattice, "shells",
+                      lambda: calls.append(1) or shells())
+  zone = index.compute_zone(lattice, zones_count)
+  assert len(calls) == 1
+  assert len(zone["face_offsets"]) == 15
+  assert len(zone["atoms"]) == len(zone["planes"])
@@ -0,0 +1,87 @@
+"""Tests for the Bragg line coefficients and the 2D zone rasterizer."""
+
+import itertools
+
+import numpy as np
+from sympy.geometry import Point
+
+from bragg_lines import bragg_line_coefficients, line_intersections
+from crystal_symmetry import point_group
+from primitive_crystal import PrimitiveCrystal
+from zone_raster import (sample_indices, sample_positions,
+                         symmetric_sample_indices, zone_colors, zone_indices)
+
+CENTER = Point(0, 0)
+
+
+def complete_lines(crystal):
+  shells = itertools.takewhile(
+      lambda points: next(iter(points)).distance(CENTER) < crystal.radius,
+      itertools.islice(crystal.points(), 1, None))
+  return bragg_line_coefficients(shells, CENTER)
+
+
+def test_bragg_line_coefficients():
+  lines = bragg_line_coefficients([{Point(2, 0)}, {Point(0, -4)}], CENTER)
+  assert lines.tolist() == [[2, 0, 2], [0, -4, 8]]
+  # The line bisects the vector from a shifted center too.
+  lines = bragg_line_coefficients([{Point(3, 1)}], Point(1, 1))
+  assert np.allclose(lines, [[2, 0, 4]])
+
+
+def test_line_intersections():
+  lines = np.array([[1, 0, 1], [2, 0, 4], [0, 1, 1], [1, 1, 2],
+                    [1, -1, 0]], dtype=np.float64)
+  points = line_intersections(lines)
+  # Parallel lines x = 1 and x = 2 do not intersect; the lines x = 1,
+  # y = 1, x + y = 2 and x - y = 0 share the same point (1, 1).
+  assert sorted(map(tuple, np.round(points, 9).tolist())) == \
+      [(1, 1), (2, 0), (2, 1), (2, 2)]
+
+
+def test_crystal_radius():
+  assert PrimitiveCrystal(1, 2, CENTER).radius == 3
+
+
+def test_zone_indices_of_square_lattice():
+  crystal = PrimitiveCrystal(20, 4, CENTER)
+  indices = zone_indices(complete_lines(crystal), (200, 200), (100, 100),
+                         crystal.radius / 2)
+  assert indices[100, 100] == 1
+  assert indices[100, 100 + 9] == 1
+  assert indices[100, 100 + 11] == 2
+  assert indices[100 + 8, 100 + 15] == 3
+  assert indices[100 + 11, 100 + 11] == 4
+  assert indices[0, 0] == 0 # out of the radius
+  # Every zone has the area of the primitive cell.
+  for zone in range(1, 6):
+    assert abs(np.count_nonzero(indices == zone) - 400) <= 60
+
+
+def test_symmetric_samples_are_copied():
+  crystal = PrimitiveCrystal(20, 4, CENTER)
+  lines = complete_lines(crystal)
+  operations = point_group(lines[:, :2])
+  assert len(operations) == 8
+  half_turn = np.array((np.eye(2), -np.eye(2)))
+  radius = crystal.radius / 2 - 0.05 # the circle misses the samples
+  for image_center in ((100, 100), (150.5, 80), (60, 40), (70.3, 100)):
+    positions = sample_positions((201, 160), image_center, 3)
+    pos_x, pos_y = np.meshgrid(*positions)
+    # Samples on the lines may be rounded to either side.
+    on_lines = np.min(np.abs(pos_x[..., np.newaxis] * lines[:, 0] +
+                             pos_y[..., np.newaxis] * lines[:, 1] -
+                             lines[:, 2]), axis=2) < 1e-6
+    expected = sample_indices(lines, positions, radius)
+    for group in (operations, half_turn):
+      indices = symmetric_sample_indices(lines, positions, radius, group)
+      assert np.array_equal(indices[~on_lines], expected[~on_lines])
+
+
+def test_zone_colors():
+  colors = ((1, 1, 1, 255), (2, 2, 2, 255))
+  background = (0, 0, 0, 0)
+  indices = np.array([[0, 1, 2, 3, 4]])
+  pixels = zone_colors(indices, colors, 3, background)
+  assert pixels.dtype == np.uint8
+  assert pixels[0, :, 0].tolist() == [0, 1, 2, 1, 0]
@@ -0,0 +1,81 @@
+"""Tests for the higher-order 3D Brillouin zones."""
+
+import numpy as np
+import pytest
+
+from body_centered_reciprocal_lattice import BodyCenteredReciprocalLattice
+from face_centered_reciprocal_lattice import FaceCenteredReciprocalLattice
+from geometry import Point3D
+from hexagonal_close_packed_reciprocal_lattice import \
+    HexagonalClosePackedReciprocalLattice
+from primitive_reciprocal_lattice import PrimitiveReciprocalLattice
+from zone_polyhedron import first_brillouin_zone
+from zone_shell import brillouin_zone, lattice_brillouin_zone
+
+WIDTH = 0.05
+CENTER = Point3D(0, 0, 0)
+
+
+def cell_volume(lattice):
+  basis = [[float(coord) for coord in vector]
+           for vector in lattice.reciprocal_primitive_vectors]
+  return abs(np.linalg.det(basis))
+
+
+def faces_area(shell, mask):
+  area = 0.0
+  for face, selected in zip(shell.faces, mask):
+    if selected:
+      points = shell.vertices[face]
+      area += np.linalg.norm(np.sum(np.cross(points, np.roll(points, -1,
+                                                              axis=0)),
+                                    axis=0)) / 2
+  return area
+
+
+@pytest.mark.parametrize("lattice_class", [
+    BodyCenteredReciprocalLattice,
+    FaceCenteredReciprocalLattice,
+    PrimitiveReciprocalLattice,
+    HexagonalClosePackedReciprocalLattice,
+])
+@pytest.mark.parametrize("zone_number", [1, 2, 3, 4])
+def test_zone_volume_is_cell_volume(lattice_class, zone_number):
+  lattice = lattice_class(WIDTH, 6, CENTER)
+  shell = lattice_brillouin_zone(lattice, zone_number)
+  assert np.isclose(shell.volume, cell_volume(lattice))
+
+
+def test_first_zone_matches_clipping():
+  lattice = FaceCenteredReciprocalLattice(WIDTH, 6, CENTER)
+  shell = brillouin_zone(lattice.bragg_planes(), 1, lattice.radius / 2)
+  zone = first_brillouin_zone(lattice.bragg_planes(2))
+  assert not np.any(~shell.face_outer)
+  assert len(shell.faces) == len(zone.faces)
+  assert {tuple(np.round(vertex, 6)) for vertex in shell.vertices} == \
+      {tuple(np.round(vertex, 6)) for vertex in zone.vertices}
+
+
+def test_inner_faces_of_second_zone_cover_first_zone():
+  lattice = BodyCenteredReciprocalLattice(WIDTH, 6, CENTER)
+  first = lattice_brillouin_zone(lattice, 1)
+  second = lattice_brillouin_zone(lattice, 2)
+  assert np.isclose(faces_area(second, ~second.face_outer),
+                    faces_area(first, first.face_outer))
+
+
+def test_small_lattice_is_enlarged():
+  lattice = FaceCenteredReciprocalLattice(WIDTH, 3, CENTER)
+  shell = lattice_brillouin_zone(lattice, 3)
+  # The lattice of the caller is not changed, a copy is enlarged.
+  assert lattice.size == 3
+  assert len(shell.planes) > len(lattice.bragg_planes())
+  assert np.isclose(shell.volume, cell_volume(lattice))
+
+
+def test_zone_out_of_radius_is_rejected():
+  lattice = FaceCenteredReciprocalLattice(WIDTH, 3, CENTER)
+  with pytest.raises(ValueError):
+    brillouin_zone(lattice.bragg_planes(), 3, lattice.radius / 2)
+  with pytest.raises(ValueError):
+    brillouin_zone(lattice.bragg_planes(), 0, lattice.radius / 2)
@@ -0,0 +1,75 @@
+"""Tests for the first zones of a family of lattices."""
+
+import numpy as np
+
+from base_centered_reciprocal_lattice import BaseCenteredReciprocalLattice
+from hexagonal_close_packed_reciprocal_lattice import (
+    HexagonalClosePackedReciprocalLattice)
+from zone_sweep import ZoneSweep, candidate_indices, sweep_c_to_a
+
+
+def body_centered_tetragonal(c_to_a):
+  """Return reciprocal primitive vectors of the body-centered tetragonal
+     lattice with a = 1, its zone changes the shape at c = a."""
+  real = np.array([(-0.5, 0.5, c_to_a / 2), (0.5, -0.5, c_to_a / 2),
+                   (0.5, 0.5, -c_to_a / 2)])
+  return 2 * np.pi * np.linalg.inv(real).T
+
+
+def test_candidates_contain_nearest_vectors():
+  indices = candidate_indices(np.eye(3))
+  assert {(1, 0, 0), (-1, 0, 0), (0, 0, 1)} <= set(map(tuple, indices))
+  assert not np.any(np.all(indices == 0, axis=1))
+
+
+def test_period_sweep_only_scales_the_zone():
+  sweep = ZoneSweep()
+  basis = body_centered_tetragonal(0.8)
+  first = sweep.zone(basis)
+  second = sweep.zone(basis / 3)
+  assert (sweep.computations, sweep.updates) == (1, 1)
+  assert np.allclose(second.vertices, first.vertices / 3)
+  assert np.isclose(second.volume, first.volume / 27)
+
+
+def test_dependent_vertex_planes_are_clipped_again():
+  sweep = ZoneSweep()
+  basis = body_centered_tetragonal(0.8)
+  first = sweep.zone(basis)
+  # Three equal planes of every vertex make the equations singular.
+  sweep._vertex_planes[:] = 0
+  second = sweep.zone(basis)
+  assert (sweep.computations, sweep.updates) == (2, 0)
+  assert np.allclose(second.vertices, first.vertices)
+
+
+def test_sweep_matches_full_computation():
+  sweep = ZoneSweep()
+  for c_to_a in np.linspace(0.6, 1.6, 11):
+    basis = body_centered_tetragonal(c_to_a)
+    zone = sweep.zone(basis)
+    full = ZoneSweep().zone(basis)
+    assert np.isclose(zone.volume, abs(np.linalg.det(basis)))
+    # At c = a edges of the updated zone shrink to points.
+    assert (np.unique(np.round(zone.vertices, 6), axis=0).tolist() ==
+            np.unique(np.round(full.vertices, 6), axis=0).tolist())
+  # The combinatorics changes after c = a only.
+  assert sweep.computations == 2
+  assert sweep.updates == 9
+
+
+def test_c_to_a_sweep_of_lattices():
+  for lattice_class, faces_count in (
+      (HexagonalClosePackedReciprocalLattice, 8),
+      (BaseCenteredReciprocalLattice, 6)):
+    ratios = [0.8, 1.2, 1.6, 2.0]
+    zones = list(sweep_c_to_a(lattice_class, ratios))
+    for ratio, zone in zones:
+      lattice = lattice_class(1, 0, (0, 0, 0), c_to_a=ratio)
+      basis = np.array([tuple(map(float, vector))
+                        for vector in lattice.reciprocal_primitive_vectors])
+      assert np.isclose(zone.volume, abs(np.linalg.det(basis)))
+      assert len(zone.faces) == faces_count
+      # The prism height is the reciprocal of c.
+      height = np.ptp(zone.vertices[:, 2])
+      assert np.isclose(height, 2 * np.pi / ratio)